@@ -0,0 +1,404 @@
+"""Offline benchmarks for the OpenweatherService and endpoint hot paths.
+
+Runs against FakeWeatherProvider, so no API key or network is needed:
+
+    python -m benchmarks.run --output bench.json
+
+Results are written as JSON so runs from different releases can be diffed.
+"""
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable
+import httpx
+from sky_alert import endpoint
+from sky_alert.changes import ChangeDetector, ChangeStream
+from sky_alert.config import Settings
+from sky_alert.constants import STARTUP_BUDGET_SECONDS
+from sky_alert.ephemeris import Ephemeris
+from sky_alert.fake_provider import FakeWeatherProvider, synthetic_one_call
+from sky_alert.forecast import CompactForecast
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.protocol import ForecastChange
+from sky_alert.push import condition_events
+from sky_alert.scoring import forecast_arrays, score_windows
+from sky_alert.sites import SiteIndex
+from sky_alert.weather_cache import WeatherCache
+
+
+def summarize(name: str, samples_ns: list[int], **extra: Any) -> dict[str, Any]:
+    samples_us = sorted(sample / 1000 for sample in samples_ns)
+
+    def percentile(p: float) -> float:
+        return samples_us[min(len(samples_us) - 1, int(p * len(samples_us)))]
+
+    return {
+        "name": name,
+        "iterations": len(samples_us),
+        "mean_us": round(statistics.fmean(samples_us), 3),
+        "p50_us": round(percentile(0.50), 3),
+        "p90_us": round(percentile(0.90), 3),
+        "p99_us": round(percentile(0.99), 3),
+        "max_us": round(samples_us[-1], 3),
+        **extra,
+    }
+
+
+async def time_calls(
+    iterations: int, call: Callable[[int], Awaitable[Any]]
+) -> list[int]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        await call(i)
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+async def bench_service(iterations: int) -> list[dict[str, Any]]:
+    results = []
+    for method in ("get_sun_data", "get_moon_data", "get_cloud_data", "get_outlook"):
+        ows = AsyncOpenweatherService(
+            cache=WeatherCache(max_entries=iterations + 1),
+            provider=FakeWeatherProvider(),
+        )
+        get = getattr(ows, method)
+
+        cold = await time_calls(iterations, lambda i: get(lat=str(i), lon="0"))
+        warm = await time_calls(iterations, lambda i: get(lat="0", lon="0"))
+
+        results.append(summarize(f"service.{method}.cold", cold))
+        results.append(summarize(f"service.{method}.warm", warm))
+    return results
+
+
+async def bench_endpoint(
+    requests: int, concurrency: int, distinct_coords: int
+) -> list[dict[str, Any]]:
+    endpoint.configure(Settings(provider="fake"))
+    transport = httpx.ASGITransport(app=endpoint.app)  # type: ignore[arg-type]
+    results = []
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for path in (
+            "/openweather_sun_data",
+            "/openweather_moon_data",
+            "/openweather_cloud_data",
+            "/sky_conditions",
+            "/stargazing_score",
+        ):
+            # Measure cache-hit serving; cold fetch cost is covered by bench_service
+            for i in range(distinct_coords):
+                lat = f"{40 + i * 0.1:.4f}"
+                await client.get(path, params={"lat": lat, "lon": "-79"})
+
+            samples: list[int] = []
+            queue: asyncio.Queue[int] = asyncio.Queue()
+            for i in range(requests):
+                queue.put_nowait(i)
+
+            async def worker() -> None:
+                while not queue.empty():
+                    i = queue.get_nowait()
+                    lat = f"{40 + (i % distinct_coords) * 0.1:.4f}"
+                    start = time.perf_counter_ns()
+                    response = await client.get(path, params={"lat": lat, "lon": "-79"})
+                    samples.append(time.perf_counter_ns() - start)
+                    response.raise_for_status()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+            results.append(
+                summarize(
+                    f"endpoint{path}",
+                    samples,
+                    concurrency=concurrency,
+                    requests_per_second=round(requests / elapsed, 1),
+                )
+            )
+    await endpoint.ows.aclose()
+    return results
+
+
+async def bench_memory(steps: list[int]) -> list[dict[str, Any]]:
+    results = []
+    ows = AsyncOpenweatherService(
+        cache=WeatherCache(max_entries=max(steps)), provider=FakeWeatherProvider()
+    )
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    filled = 0
+
+    for target in steps:
+        for i in range(filled, target):
+            await ows.update_most_recent_weather(lat=f"{i * 1e-4:.4f}", lon="0")
+        filled = target
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0] - baseline
+        results.append(
+            {
+                "name": "memory.distinct_coordinates",
+                "coordinates": target,
+                "bytes": current,
+                "bytes_per_coordinate": round(current / target, 1),
+                "cache_size_bytes": ows.most_recent_weather.stats().size_bytes,
+            }
+        )
+
+    tracemalloc.stop()
+    return results
+
+
+def bench_scoring(locations: int, rounds: int) -> list[dict[str, Any]]:
+    forecasts = [
+        CompactForecast.from_json(
+            synthetic_one_call(lat=f"{i * 1e-2:.2f}", lon="0", now=1_700_000_000)
+        )
+        for i in range(locations)
+    ]
+    pack, score = [], []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        arrays = forecast_arrays(forecasts)
+        packed = time.perf_counter_ns()
+        score_windows(arrays)
+        pack.append(packed - start)
+        score.append(time.perf_counter_ns() - packed)
+
+    def per_second(samples: list[int]) -> float:
+        return round(locations / (statistics.median(samples) / 1e9))
+
+    return [
+        summarize("scoring.pack", pack, locations=locations),
+        summarize(
+            "scoring.score",
+            score,
+            locations=locations,
+            locations_per_second=per_second(score),
+        ),
+        summarize(
+            "scoring.total",
+            [p + s for p, s in zip(pack, score)],
+            locations=locations,
+            locations_per_second=per_second([p + s for p, s in zip(pack, score)]),
+        ),
+    ]
+
+
+def bench_ephemeris(sites: int, days: int) -> list[dict[str, Any]]:
+    ephemeris = Ephemeris(max_entries=sites * days)
+    coords = [
+        (f"{-60 + i * 120 / sites:.2f}", f"{i * 0.37 % 360 - 180:.2f}")
+        for i in range(sites)
+    ]
+    start = time.perf_counter_ns()
+    computed = ephemeris.precompute(coords, datetime.date(2025, 1, 1), days)
+    elapsed = time.perf_counter_ns() - start
+
+    lookups = [
+        time_lookup(ephemeris, lat, lon) for lat, lon in coords[: min(sites, 1000)]
+    ]
+    return [
+        summarize(
+            "ephemeris.precompute",
+            [elapsed],
+            sites=sites,
+            days=days,
+            site_days_per_second=round(computed / (elapsed / 1e9)),
+        ),
+        summarize("ephemeris.sun_data.memoized", lookups),
+    ]
+
+
+def bench_sites(sites: int, queries: int) -> list[dict[str, Any]]:
+    # A synthetic catalogue spread over the populated latitudes
+    rng = random.Random(0)
+    lats = [rng.uniform(-60, 70) for _ in range(sites)]
+    lons = [rng.uniform(-180, 180) for _ in range(sites)]
+    start = time.perf_counter_ns()
+    index = SiteIndex([f"site {i}" for i in range(sites)], lats, lons)
+    built = time.perf_counter_ns() - start
+
+    samples = []
+    found = 0
+    for _ in range(queries):
+        lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+        start = time.perf_counter_ns()
+        found += len(index.within(lat, lon, 200.0)[0])
+        samples.append(time.perf_counter_ns() - start)
+    return [
+        summarize("sites.build", [built], sites=sites),
+        summarize(
+            "sites.within_200km",
+            samples,
+            sites=sites,
+            mean_matches=round(found / queries, 1),
+        ),
+    ]
+
+
+async def bench_push(connections: int, cells: int) -> list[dict[str, Any]]:
+    """Hold idle condition streams open, then push one change to every cell."""
+    stream = ChangeStream()
+    ows = AsyncOpenweatherService(
+        cache=WeatherCache(max_entries=cells + 1),
+        provider=FakeWeatherProvider(),
+        changes=ChangeDetector(stream),
+    )
+    coords = [(f"{40 + i * 0.1:.4f}", "-79") for i in range(cells)]
+    for lat, lon in coords:
+        await ows.update_most_recent_weather(lat=lat, lon=lon)
+
+    received = 0
+    all_received = asyncio.Event()
+
+    async def client(i: int) -> None:
+        nonlocal received
+        async for _ in condition_events(
+            ows, stream, [coords[i % cells]], keepalive_seconds=3600
+        ):
+            received += 1
+            if received >= connections:
+                all_received.set()
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    clients = [asyncio.create_task(client(i)) for i in range(connections)]
+    await all_received.wait()
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    received = 0
+    all_received.clear()
+    start = time.perf_counter()
+    for lat, lon in coords:
+        stream.publish(ForecastChange(lat=lat, lon=lon, kind="updated"))
+    await all_received.wait()
+    elapsed = time.perf_counter() - start
+
+    for task in clients:
+        task.cancel()
+    await asyncio.gather(*clients, return_exceptions=True)
+    return [
+        {
+            "name": "push.idle_connections",
+            "connections": connections,
+            "bytes_per_connection": round(memory / connections, 1),
+        },
+        {
+            "name": "push.fan_out",
+            "connections": connections,
+            "cells": cells,
+            "seconds": round(elapsed, 4),
+            "events_per_second": round(connections / elapsed, 1),
+        },
+    ]
+
+
+STARTUP_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+from sky_alert import endpoint
+from sky_alert.constants import STARTUP_BUDGET_SECONDS
+imported = time.perf_counter()
+
+async def main():
+    async with endpoint.lifespan(endpoint.app):
+        pass
+
+asyncio.run(main())
+print(json.dumps([imported - start, time.perf_counter() - imported]))
+"""
+
+
+def bench_startup(runs: int) -> list[dict[str, Any]]:
+    """Cold-start a fresh interpreter: import the endpoint and run its lifespan."""
+    env = {**os.environ, "SKY_ALERT_PROVIDER": "fake"}
+    imports, lifespans = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            env=env,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        imported, lifespan = json.loads(output.splitlines()[-1])
+        imports.append(int(imported * 1e9))
+        lifespans.append(int(lifespan * 1e9))
+    return [
+        summarize("startup.import", imports),
+        summarize(
+            "startup.lifespan",
+            lifespans,
+            budget_seconds=STARTUP_BUDGET_SECONDS,
+            within_budget=max(lifespans) / 1e9 <= STARTUP_BUDGET_SECONDS,
+        ),
+    ]
+
+
+def time_lookup(ephemeris: Ephemeris, lat: str, lon: str) -> int:
+    start = time.perf_counter_ns()
+    ephemeris.sun_data(lat=lat, lon=lon, day=datetime.date(2025, 6, 1))
+    return time.perf_counter_ns() - start
+
+
+async def run(quick: bool) -> dict[str, Any]:
+    iterations = 200 if quick else 2000
+    requests = 200 if quick else 2000
+    steps = [100, 1000] if quick else [1000, 10_000, 50_000]
+
+    results = []
+    results += await bench_service(iterations)
+    results += await bench_endpoint(requests, concurrency=32, distinct_coords=50)
+    results += await bench_memory(steps)
+    results += bench_ephemeris(sites=100 if quick else 2000, days=365)
+    results += bench_scoring(locations=1000 if quick else 20_000, rounds=5)
+    results += bench_startup(runs=3 if quick else 10)
+    results += bench_sites(sites=10_000 if quick else 300_000, queries=200)
+    results += await bench_push(connections=2000 if quick else 20_000, cells=100)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "quick": quick,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--quick", action="store_true", help="smaller run for CI")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(quick=args.quick))
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Evaluate stargazing alerts for every subscriber and deliver them.
+
+Subscribers are read from the store in cell order, one bounded batch at a time.
+Each distinct cell in a batch costs one forecast lookup, all of a batch's forecasts
+are scored in one vectorized pass, and alerts go out per channel in chunks. Run
+against a subscriber database with, e.g.:
+
+    python -m sky_alert.alerts --subscribers subscribers.db --file alerts.jsonl
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from sky_alert.constants import (
+    ALERT_BATCH_SUBSCRIBERS,
+    ALERT_FETCH_CONCURRENCY,
+    ALERT_NOTIFY_BATCH,
+    COORDINATE_GRID_DEGREES,
+)
+from sky_alert.config import Settings, build_provider
+from sky_alert.forecast import CompactForecast
+from sky_alert.metrics import ALERTS_SENT, ALERT_DELIVERY_FAILURES, STAGE_SECONDS
+from sky_alert.notifiers import FileNotifier, Notifier, SmtpNotifier
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.protocol import Alert, AlertRunStats, ObservingWindow, Subscriber
+from sky_alert.quantizer import GridQuantizer
+from sky_alert.scoring import score_forecasts
+from sky_alert.subscribers import CellKey, SqliteSubscriberStore
+
+logger = logging.getLogger(__name__)
+
+
+class AlertPipeline:
+    """Match every subscriber's thresholds against the best window in their cell.
+
+    `notifiers` maps a subscriber's channel to its backend; alerts for channels
+    without one are counted as undeliverable.
+    """
+
+    def __init__(
+        self,
+        service: AsyncOpenweatherService,
+        store: SqliteSubscriberStore,
+        notifiers: Mapping[str, Notifier],
+        batch_size: int = ALERT_BATCH_SUBSCRIBERS,
+        fetch_concurrency: int = ALERT_FETCH_CONCURRENCY,
+        notify_batch: int = ALERT_NOTIFY_BATCH,
+    ) -> None:
+        self.service = service
+        self.store = store
+        self.notifiers = notifiers
+        self.batch_size = batch_size
+        self.notify_batch = notify_batch
+        self._fetch_slots = asyncio.Semaphore(fetch_concurrency)
+
+    async def run(self, cells: Optional[Iterable[CellKey]] = None) -> AlertRunStats:
+        """Evaluate every subscriber, or only those in `cells`.
+
+        Pass the cells of forecast changes (see sky_alert.changes) to re-evaluate just
+        the subscribers a refresh may have affected.
+        """
+        stats = AlertRunStats()
+        batches = (
+            self.store.iter_batches(self.batch_size)
+            if cells is None
+            else self.store.iter_cells(cells, self.batch_size)
+        )
+        previous_cell: Optional[CellKey] = None
+        loop = asyncio.get_running_loop()
+        # Read pages off the event loop on one thread of our own, so that the run uses
+        # a single store connection, closed on that thread once the run is over
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="alerts") as reader:
+            try:
+                while batch := await loop.run_in_executor(reader, next, batches, None):
+                    alerts = await self._evaluate(batch, stats, previous_cell)
+                    previous_cell = batch[-1][0]
+                    await self._deliver(alerts, stats)
+            finally:
+                await loop.run_in_executor(reader, self.store.close)
+        return stats
+
+    async def _evaluate(
+        self,
+        batch: Sequence[tuple[CellKey, Subscriber]],
+        stats: AlertRunStats,
+        previous_cell: Optional[CellKey],
+    ) -> list[Alert]:
+        cells = list(dict.fromkeys(cell for cell, _ in batch))
+        forecasts = await asyncio.gather(*(self._forecast(cell) for cell in cells))
+        stats.subscribers += len(batch)
+        # A cell split across two batches is only counted once
+        stats.cells += len(cells) - (cells[0] == previous_cell)
+
+        with STAGE_SECONDS.time(stage="alert_evaluate"):
+            available = [
+                (i, forecast)
+                for i, forecast in enumerate(forecasts)
+                if forecast is not None
+            ]
+            fetched = [i for i, _ in available]
+            stats.failed_cells += len(cells) - len(fetched)
+            if not fetched:
+                return []
+            scores = score_forecasts([forecast for _, forecast in available])
+
+            # Per-cell score and hours, with cells that failed to fetch never passing
+            cell_score = np.full(len(cells), -1.0)
+            cell_hours = np.zeros(len(cells), dtype=np.int64)
+            cell_score[fetched] = scores.score
+            cell_hours[fetched] = scores.hours
+            windows: dict[int, ObservingWindow] = {}
+            for row, i in enumerate(fetched):
+                if scores.hours[row]:
+                    windows[i] = ObservingWindow(
+                        start=_utc(int(scores.start[row])),
+                        end=_utc(int(scores.end[row])),
+                        hours=int(scores.hours[row]),
+                        score=round(float(scores.score[row]), 3),
+                    )
+
+            index = {cell: i for i, cell in enumerate(cells)}
+            cell_of = np.fromiter(
+                (index[cell] for cell, _ in batch), dtype=np.int64, count=len(batch)
+            )
+            min_score = np.fromiter(
+                (s.min_score for _, s in batch), dtype=np.float64, count=len(batch)
+            )
+            min_hours = np.fromiter(
+                (s.min_hours for _, s in batch), dtype=np.int64, count=len(batch)
+            )
+            passing = (
+                (cell_hours[cell_of] > 0)
+                & (cell_hours[cell_of] >= min_hours)
+                & (cell_score[cell_of] >= min_score)
+            )
+
+            alerts = []
+            for position in np.flatnonzero(passing).tolist():
+                subscriber = batch[position][1]
+                alerts.append(
+                    Alert(
+                        subscriber_id=subscriber.id or 0,
+                        channel=subscriber.channel,
+                        contact=subscriber.contact,
+                        lat=subscriber.lat,
+                        lon=subscriber.lon,
+                        window=windows[int(cell_of[position])],
+                    )
+                )
+        stats.alerts += len(alerts)
+        return alerts
+
+    async def _forecast(self, cell: CellKey) -> Optional[CompactForecast]:
+        async with self._fetch_slots:
+            try:
+                return await self.service.update_most_recent_weather(*cell)
+            except Exception:
+                logger.warning("Could not fetch forecast for cell %s", cell)
+                return None
+
+    async def _deliver(self, alerts: list[Alert], stats: AlertRunStats) -> None:
+        by_channel: dict[str, list[Alert]] = {}
+        for alert in alerts:
+            by_channel.setdefault(alert.channel, []).append(alert)
+
+        sends = []
+        for channel, channel_alerts in by_channel.items():
+            notifier = self.notifiers.get(channel)
+            if notifier is None:
+                stats.undeliverable += len(channel_alerts)
+                ALERT_DELIVERY_FAILURES.inc(len(channel_alerts), channel=channel)
+                continue
+            for i in range(0, len(channel_alerts), self.notify_batch):
+                chunk = channel_alerts[i : i + self.notify_batch]
+                sends.append(self._send(channel, notifier, chunk, stats))
+        await asyncio.gather(*sends)
+
+    async def _send(
+        self,
+        channel: str,
+        notifier: Notifier,
+        alerts: Sequence[Alert],
+        stats: AlertRunStats,
+    ) -> None:
+        try:
+            delivered = await notifier.send(alerts)
+        except Exception:
+            logger.exception("Notifier for %s failed", channel)
+            delivered = 0
+        stats.delivered += delivered
+        stats.undeliverable += len(alerts) - delivered
+        ALERTS_SENT.inc(delivered, channel=channel)
+        ALERT_DELIVERY_FAILURES.inc(len(alerts) - delivered, channel=channel)
+
+
+def _utc(timestamp: int) -> datetime.datetime:
+    return datetime.datetime.utcfromtimestamp(timestamp)
+
+
+async def _run(args: argparse.Namespace) -> AlertRunStats:
+    settings = Settings.from_env()
+    if args.fake_provider:
+        settings = settings.model_copy(update={"provider": "fake"})
+    settings.check()
+    service = AsyncOpenweatherService(
+        quantizer=GridQuantizer(degrees=COORDINATE_GRID_DEGREES),
+        provider=build_provider(settings),
+    )
+    notifiers: dict[str, Notifier] = {}
+    if args.file:
+        notifiers["file"] = FileNotifier(args.file)
+    if args.smtp:
+        host, port = args.smtp.rsplit(":", 1)
+        notifiers["email"] = SmtpNotifier(host, int(port), sender=args.sender)
+
+    store = SqliteSubscriberStore(args.subscribers, cell_key=service.cache_key)
+    try:
+        return await AlertPipeline(service, store, notifiers).run()
+    finally:
+        store.close()
+        await service.aclose()
+        for notifier in notifiers.values():
+            await notifier.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", required=True, help="subscriber database")
+    parser.add_argument("--file", help="deliver the 'file' channel to this JSONL file")
+    parser.add_argument("--smtp", help="deliver the 'email' channel to host:port")
+    parser.add_argument("--sender", default="alerts@sky-alert.local")
+    parser.add_argument(
+        "--fake-provider", action="store_true", help="use synthetic forecasts"
+    )
+    stats = asyncio.run(_run(parser.parse_args()))
+    print(stats.model_dump_json())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""Detect meaningful changes between consecutive forecasts of a cell.
+
+When a refreshed forecast replaces a cached one, the two are compared over the hours
+they share: cloud cover crossing the clear-sky threshold and the best observing
+window opening, moving or closing become ForecastChange events on an in-process
+ChangeStream. Consumers subscribe to the cells they care about, so the work after a
+refresh follows what changed rather than how many cells are tracked.
+"""
+import asyncio
+import bisect
+import datetime
+from collections import deque
+from typing import AsyncIterator, Iterable, Optional
+from sky_alert.constants import CHANGE_CLOUD_THRESHOLD, CHANGE_QUEUE_SIZE
+from sky_alert.forecast import CompactForecast, HourlySlice
+from sky_alert.metrics import CHANGE_EVENTS_DROPPED, FORECAST_CHANGES, STAGE_SECONDS
+from sky_alert.protocol import ForecastChange, ObservingWindow
+from sky_alert.scoring import WindowScores, score_forecasts
+
+CellKey = tuple[str, str]
+
+SECONDS_PER_HOUR = 3600
+
+
+def _utc(timestamp: int) -> datetime.datetime:
+    return datetime.datetime.utcfromtimestamp(timestamp)
+
+
+def _same_hours(old: HourlySlice, new: HourlySlice) -> bool:
+    return (
+        old.dt == new.dt
+        and old.clouds == new.clouds
+        and old.humidity == new.humidity
+        and old.visibility == new.visibility
+        and old.wind_speed == new.wind_speed
+    )
+
+
+def _shared_hours(
+    previous: CompactForecast, current: CompactForecast
+) -> tuple[HourlySlice, HourlySlice]:
+    """Return the hours `previous` still covers from the start of `current` on."""
+    start = bisect.bisect_left(previous.hourly_dt, current.hourly_dt[0])
+    shared = min(len(previous.hourly_dt) - start, len(current.hourly_dt))
+    return previous.hours(start, shared), current.hours(0, shared)
+
+
+def forecast_changed(previous: CompactForecast, current: CompactForecast) -> bool:
+    """Whether `current` differs from `previous` in the hours they share, or adds hours."""
+    if not current.hourly_dt:
+        return False
+    old, new = _shared_hours(previous, current)
+    return not _same_hours(old, new) or len(new.dt) < len(current.hourly_dt)
+
+
+def _window(scores: WindowScores, row: int) -> Optional[ObservingWindow]:
+    if not scores.hours[row]:
+        return None
+    return ObservingWindow(
+        start=_utc(int(scores.start[row])),
+        end=_utc(int(scores.end[row])),
+        hours=int(scores.hours[row]),
+        score=round(float(scores.score[row]), 3),
+    )
+
+
+def _window_changes(
+    key: CellKey, previous: CompactForecast, current: CompactForecast
+) -> list[ForecastChange]:
+    scores = score_forecasts([previous, current])
+    old, new = _window(scores, 0), _window(scores, 1)
+    # Hours the previous forecast covered before the current one starts are past,
+    # so a window that only lost its past hours has not changed
+    since = _utc(current.hourly_dt[0])
+    if old is not None and old.end <= since:
+        old = None
+    if old is None and new is None:
+        return []
+    if old is None:
+        return [
+            ForecastChange(lat=key[0], lon=key[1], kind="window_opened", window=new)
+        ]
+    if new is None:
+        return [
+            ForecastChange(lat=key[0], lon=key[1], kind="window_closed", window=old)
+        ]
+    if (max(old.start, since), old.end) != (max(new.start, since), new.end):
+        return [
+            ForecastChange(lat=key[0], lon=key[1], kind="window_changed", window=new)
+        ]
+    return []
+
+
+def _cloud_changes(
+    key: CellKey, old: HourlySlice, new: HourlySlice, threshold: int
+) -> list[ForecastChange]:
+    """Report each run of consecutive hours that crossed `threshold` the same way."""
+    changes: list[ForecastChange] = []
+    run_kind: Optional[str] = None
+    run_start = 0
+    for i in range(len(new.dt) + 1):
+        kind: Optional[str] = None
+        if i < len(new.dt):
+            was_clear, is_clear = old.clouds[i] < threshold, new.clouds[i] < threshold
+            if was_clear != is_clear:
+                kind = "clearing" if is_clear else "clouding"
+        if kind != run_kind:
+            if run_kind is not None:
+                changes.append(
+                    ForecastChange(
+                        lat=key[0],
+                        lon=key[1],
+                        kind=run_kind,
+                        start=_utc(new.dt[run_start]),
+                        end=_utc(new.dt[i - 1] + SECONDS_PER_HOUR),
+                    )
+                )
+            run_kind, run_start = kind, i
+    return changes
+
+
+def diff_forecasts(
+    key: CellKey,
+    previous: CompactForecast,
+    current: CompactForecast,
+    cloud_threshold: int = CHANGE_CLOUD_THRESHOLD,
+) -> list[ForecastChange]:
+    """Return the meaningful changes from `previous` to `current` for one cell.
+
+    The forecasts are compared over the hours they share. If those are unchanged and
+    `current` adds no new hours, nothing is re-scored and no changes are reported.
+    """
+    if not forecast_changed(previous, current):
+        return []
+    old, new = _shared_hours(previous, current)
+
+    changes = _window_changes(key, previous, current)
+    # Hours are only compared one to one when both forecasts use the same hours
+    if old.dt == new.dt and old.clouds != new.clouds:
+        changes += _cloud_changes(key, old, new, cloud_threshold)
+    return changes
+
+
+class ChangeSubscription:
+    """One consumer's queue of changes, holding at most `max_queued` of them.
+
+    When the consumer falls behind, the oldest queued changes are dropped, so an idle
+    or slow consumer costs a bounded amount of memory. Use as a context manager, or
+    call `close`, to unsubscribe.
+    """
+
+    def __init__(
+        self,
+        stream: "ChangeStream",
+        cells: Optional[frozenset[CellKey]],
+        max_queued: int,
+    ) -> None:
+        self.cells = cells
+        self.dropped = 0
+        self._stream = stream
+        self._queue: deque[ForecastChange] = deque(maxlen=max_queued)
+        self._ready = asyncio.Event()
+
+    def push(self, change: ForecastChange) -> None:
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+            CHANGE_EVENTS_DROPPED.inc()
+        self._queue.append(change)
+        self._ready.set()
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def drain(self) -> list[ForecastChange]:
+        """Return and remove every queued change without waiting."""
+        changes = list(self._queue)
+        self._queue.clear()
+        return changes
+
+    async def get(self) -> ForecastChange:
+        """Wait for and return the oldest queued change."""
+        while not self._queue:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait up to `timeout` seconds for a queued change and return whether there is one.
+
+        The timeout is a timer on the loop rather than a task per call, so that many
+        idle subscribers can wait cheaply.
+        """
+        if self._queue:
+            return True
+        if timeout is None:
+            while not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+            return True
+        self._ready.clear()
+        timer = asyncio.get_running_loop().call_later(timeout, self._ready.set)
+        try:
+            await self._ready.wait()
+        finally:
+            timer.cancel()
+        return bool(self._queue)
+
+    def __aiter__(self) -> AsyncIterator[ForecastChange]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[ForecastChange]:
+        while True:
+            yield await self.get()
+
+    def close(self) -> None:
+        self._stream.unsubscribe(self)
+
+    def __enter__(self) -> "ChangeSubscription":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class ChangeStream:
+    """In-process fan-out of forecast changes to subscribers on one event loop.
+
+    Subscribers are indexed by cell, so publishing a change costs one dictionary
+    lookup plus one append per interested subscriber, however many are connected.
+    """
+
+    def __init__(self) -> None:
+        self._by_cell: dict[CellKey, set[ChangeSubscription]] = {}
+        self._everything: set[ChangeSubscription] = set()
+
+    def subscribe(
+        self,
+        cells: Optional[Iterable[CellKey]] = None,
+        max_queued: int = CHANGE_QUEUE_SIZE,
+    ) -> ChangeSubscription:
+        """Subscribe to changes of `cells`, or of every cell when None."""
+        if max_queued < 1:
+            raise ValueError("max_queued must be at least 1")
+        subscription = ChangeSubscription(
+            self, None if cells is None else frozenset(cells), max_queued
+        )
+        if subscription.cells is None:
+            self._everything.add(subscription)
+        for cell in subscription.cells or ():
+            self._by_cell.setdefault(cell, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription) -> None:
+        self._everything.discard(subscription)
+        for cell in subscription.cells or ():
+            subscribers = self._by_cell.get(cell)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_cell[cell]
+
+    def publish(self, change: ForecastChange) -> int:
+        """Queue `change` for its subscribers and return how many there were."""
+        subscribers = self._by_cell.get((change.lat, change.lon), set())
+        for subscription in (*self._everything, *subscribers):
+            subscription.push(change)
+        return len(self._everything) + len(subscribers)
+
+    def cells(self) -> list[CellKey]:
+        """Return the cells with at least one subscriber of their own."""
+        return list(self._by_cell)
+
+    def __len__(self) -> int:
+        return len(self._everything) + len(
+            {s for subscribers in self._by_cell.values() for s in subscribers}
+        )
+
+
+class ChangeDetector:
+    """Diff each refreshed forecast against the one it replaces and publish changes."""
+
+    def __init__(
+        self, stream: ChangeStream, cloud_threshold: int = CHANGE_CLOUD_THRESHOLD
+    ) -> None:
+        self.stream = stream
+        self.cloud_threshold = cloud_threshold
+
+    def observe(
+        self,
+        key: CellKey,
+        previous: Optional[CompactForecast],
+        current: CompactForecast,
+    ) -> list[ForecastChange]:
+        """Publish the changes from `previous` to `current`.
+
+        Any forecast that differs from the one it replaces, including a cell's first,
+        is also published as an "updated" change after the others.
+        """
+        if previous is current:
+            return []
+        with STAGE_SECONDS.time(stage="detect_changes"):
+            if previous is None:
+                changes = []
+            elif forecast_changed(previous, current):
+                changes = diff_forecasts(key, previous, current, self.cloud_threshold)
+            else:
+                return []
+        changes.append(ForecastChange(lat=key[0], lon=key[1], kind="updated"))
+        for change in changes:
+            FORECAST_CHANGES.inc(kind=change.kind)
+            self.stream.publish(change)
+        return changes
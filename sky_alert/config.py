@@ -0,0 +1,101 @@
+"""Service configuration, read from the environment (and a `.env` file) once.
+
+    OPENWEATHER_API_KEY, OPENWEATHER_API_URL   required unless SKY_ALERT_PROVIDER=fake
+    SKY_ALERT_PROVIDER                         "openweather" (default) or "fake"
+    SKY_ALERT_CACHE_PATH                       SQLite cache shared between workers
+    SKY_ALERT_HISTORY_DIR                      forecast history archive
+    SKY_ALERT_SNAPSHOT_DIR                     cache snapshots (default ./snapshots)
+    SKY_ALERT_SITES_PATH                       dark-sky site catalogue (CSV)
+    SKY_ALERT_WARM_SITES                       prefetch the known sites on startup
+    SKY_ALERT_STARTUP_BUDGET_SECONDS           warn when startup takes longer
+"""
+import os
+from typing import TYPE_CHECKING, Literal, Mapping, Optional
+from pydantic import BaseModel
+from sky_alert.constants import SNAPSHOT_DIRECTORY, STARTUP_BUDGET_SECONDS
+
+if TYPE_CHECKING:
+    from sky_alert.providers import WeatherProvider
+
+DEFAULT_SITES_PATH = os.path.join(
+    os.path.dirname(__file__), "data", "dark_sky_sites.csv"
+)
+
+_ENVIRONMENT = {
+    "openweather_api_key": "OPENWEATHER_API_KEY",
+    "openweather_api_url": "OPENWEATHER_API_URL",
+    "provider": "SKY_ALERT_PROVIDER",
+    "cache_path": "SKY_ALERT_CACHE_PATH",
+    "history_dir": "SKY_ALERT_HISTORY_DIR",
+    "snapshot_dir": "SKY_ALERT_SNAPSHOT_DIR",
+    "sites_path": "SKY_ALERT_SITES_PATH",
+    "warm_sites": "SKY_ALERT_WARM_SITES",
+    "startup_budget_seconds": "SKY_ALERT_STARTUP_BUDGET_SECONDS",
+}
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class Settings(BaseModel):
+    """Class for the service configuration; fields are validated on construction"""
+
+    openweather_api_key: Optional[str] = None
+    openweather_api_url: Optional[str] = None
+    provider: Literal["openweather", "fake"] = "openweather"
+    cache_path: Optional[str] = None
+    history_dir: Optional[str] = None
+    snapshot_dir: str = SNAPSHOT_DIRECTORY
+    sites_path: str = DEFAULT_SITES_PATH
+    warm_sites: bool = False
+    startup_budget_seconds: float = STARTUP_BUDGET_SECONDS
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "Settings":
+        """Read settings from `environ`, or from os.environ after loading `.env`.
+
+        Malformed values raise a pydantic ValidationError naming the field.
+        """
+        if environ is None:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            environ = os.environ
+        return cls.model_validate(
+            {
+                field: environ[variable]
+                for field, variable in _ENVIRONMENT.items()
+                if environ.get(variable)
+            }
+        )
+
+    def check(self) -> None:
+        """Raise ConfigError if the selected provider is missing settings it needs."""
+        if self.provider != "openweather":
+            return
+        missing = [
+            _ENVIRONMENT[field]
+            for field in ("openweather_api_key", "openweather_api_url")
+            if not getattr(self, field)
+        ]
+        if missing:
+            raise ConfigError(f"Missing required settings: {', '.join(missing)}")
+
+
+def build_provider(settings: Settings) -> "WeatherProvider":
+    """Build the configured upstream provider. Its HTTP client is created on first use."""
+    if settings.provider == "fake":
+        from sky_alert.fake_provider import FakeWeatherProvider
+
+        return FakeWeatherProvider()
+
+    from sky_alert.providers import OpenweatherProvider
+    from sky_alert.resilience import ResilientProvider
+
+    return ResilientProvider(
+        OpenweatherProvider(
+            api_url=settings.openweather_api_url,
+            api_key=settings.openweather_api_key,
+        )
+    )
@@ -6,3 +6,114 @@ COORDINATES_FRONTENAC = (45.01178996925867, -76.93457025022025)
 COORDINATES_TORONTO = (43.657250188873576, -79.33295003202332)
 
 HOURS_IN_DAY = 24
+
+# OpenWeather refreshes its model roughly every 10 minutes
+WEATHER_CACHE_TTL_SECONDS = 600
+WEATHER_CACHE_MAX_ENTRIES = 10_000
+
+# 0.01 degrees is roughly 1.1 km of latitude
+COORDINATE_GRID_DEGREES = 0.01
+
+OPENWEATHER_TIMEOUT_SECONDS = 10.0
+OPENWEATHER_MAX_CONNECTIONS = 200
+OPENWEATHER_MAX_KEEPALIVE_CONNECTIONS = 50
+
+# Background refresh of frequently read forecasts
+REFRESH_AHEAD_SECONDS = 60
+REFRESH_MIN_ACCESSES = 3
+REFRESH_CONCURRENCY = 8
+REFRESH_BUDGET_PER_MINUTE = 60
+REFRESH_INTERVAL_SECONDS = 10
+
+BATCH_CONCURRENCY = 32
+BATCH_MAX_COORDINATES = 10_000
+
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+# Shape of the synthetic One Call payloads served by the fake provider
+FAKE_PROVIDER_HOURS = 48
+FAKE_PROVIDER_DAYS = 8
+FAKE_PROVIDER_ERROR_STATUS = 503
+
+# Keep expired forecasts around to serve while the upstream is unhealthy
+WEATHER_CACHE_STALE_SECONDS = 3600
+
+# Upstream protection, sized for the OpenWeather One Call plan
+UPSTREAM_CALLS_PER_MINUTE = 60
+UPSTREAM_BURST = 10
+UPSTREAM_MAX_WAIT_SECONDS = 2.0
+UPSTREAM_MAX_ATTEMPTS = 3
+UPSTREAM_BACKOFF_BASE_SECONDS = 0.25
+UPSTREAM_BACKOFF_MAX_SECONDS = 4.0
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+
+# Stargazing window scoring over the hourly forecast
+SCORE_HORIZON_HOURS = 48
+SCORE_MIN_HOUR_QUALITY = 0.5
+SCORE_MOON_WEIGHT = 0.6
+SCORE_HUMIDITY_ONSET = 70
+SCORE_WIND_ONSET_MPS = 5.0
+
+# Local ephemeris memoization; 0.1 degree cells shift rise/set times by under a minute
+EPHEMERIS_GRID_DEGREES = 0.1
+EPHEMERIS_CACHE_MAX_ENTRIES = 100_000
+EPHEMERIS_MAX_DAYS = 366
+
+# Alert evaluation
+ALERT_DEFAULT_MIN_SCORE = 0.7
+ALERT_DEFAULT_MIN_HOURS = 2
+ALERT_BATCH_SUBSCRIBERS = 10_000
+ALERT_FETCH_CONCURRENCY = 32
+ALERT_NOTIFY_BATCH = 500
+
+# Dark-sky site index and nearest-site search
+DARK_SKY_BUCKET_DEGREES = 0.5
+DARK_SKY_DEFAULT_RADIUS_KM = 100.0
+DARK_SKY_MAX_RADIUS_KM = 500.0
+DARK_SKY_DEFAULT_LIMIT = 10
+# Uncached site forecasts fetched per search, nearest first; the rest must be cached
+DARK_SKY_MAX_FETCHES = 8
+
+# Forecast snapshot export
+SNAPSHOT_DIRECTORY = "snapshots"
+# gzip level 6 compresses about three times faster than 9 for ~4% larger files
+SNAPSHOT_COMPRESS_LEVEL = 6
+
+# Forecast history archive: hours ahead of issue that are archived (0 is observed)
+HISTORY_LEAD_HOURS = (0, 1, 3, 6, 12, 24)
+HISTORY_DEFAULT_DAYS = 90
+HISTORY_MAX_DAYS = 3660
+
+# Encoded response bodies kept per forecast view; ~1 KB each at most
+ENCODED_RESPONSE_MAX_ENTRIES = 30_000
+
+# Forecast horizon queries; One Call payloads carry 48 hours and 8 days
+OUTLOOK_MAX_HOURS = 48
+OUTLOOK_MAX_DAYS = 8
+
+# Multi-source forecast fusion: answer with whatever sources arrived by the deadline
+FUSION_DEADLINE_SECONDS = 1.0
+FUSION_SOURCE_TIMEOUT_SECONDS = 3.0
+
+# Forecast change detection: cloud cover below the threshold counts as clear
+CHANGE_CLOUD_THRESHOLD = 30
+# Changes queued per stream subscriber before the oldest are dropped
+CHANGE_QUEUE_SIZE = 64
+
+# Server-sent sky condition updates
+PUSH_MAX_COORDINATES = 50
+PUSH_KEEPALIVE_SECONDS = 15.0
+# Changes queued per connection; on overflow every coordinate is re-sent instead
+PUSH_QUEUE_SIZE = 16
+
+# Time the lifespan may take to get from config checks to serving cached data
+STARTUP_BUDGET_SECONDS = 2.0
+# Sites prefetched on startup when SKY_ALERT_WARM_SITES is set
+WARM_SITES = (
+    COORDINATES_NOTL,
+    COORDINATES_TORRANCE_BARRENS,
+    COORDINATES_SALEM_METHODIST_CHURCH,
+    COORDINATES_MCCRACKENS_LANDING,
+    COORDINATES_FRONTENAC,
+)
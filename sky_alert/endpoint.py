@@ -1,42 +1,505 @@
-from fastapi import FastAPI
-from dotenv import load_dotenv
-from sky_alert.protocol import SunData, MoonData, CloudData
-from typing import Union
-from sky_alert.openweather_service import OpenweatherService
-import json
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sky_alert.protocol import (
+    SunData,
+    MoonData,
+    CloudData,
+    SkyConditions,
+    StargazingScore,
+    EphemerisDay,
+    BestSites,
+    Coordinate,
+    SnapshotExport,
+    HistoricalHour,
+    CloudAccuracy,
+    Outlook,
+    FusedCloudCover,
+    CacheStats,
+)
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, Union
+from sky_alert.config import Settings, build_provider
+from sky_alert.ephemeris import Ephemeris
+from sky_alert.snapshots import SnapshotWriter
+from sky_alert.history import ForecastArchive
+from sky_alert.sites import SiteIndex, best_sites
+from sky_alert.fusion import ForecastSource, FusionEngine
+from sky_alert.changes import ChangeDetector, ChangeStream
+from sky_alert.push import condition_events
+from sky_alert.openweather_service import (
+    AsyncOpenweatherService,
+    parse_cloud_data,
+    parse_sky_conditions,
+    parse_stargazing_score,
+)
+from sky_alert.quantizer import GridQuantizer, format_coord
+from sky_alert.refresher import BackgroundRefresher
+from sky_alert.sqlite_cache import SqliteWeatherCache
+from sky_alert.weather_cache import WeatherCache
+from sky_alert.metrics import (
+    REGISTRY,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_SECONDS,
+    STARTUP_SECONDS,
+    register_cache_metrics,
+)
+from sky_alert.constants import (
+    COORDINATE_GRID_DEGREES,
+    BATCH_CONCURRENCY,
+    BATCH_MAX_COORDINATES,
+    WEATHER_CACHE_STALE_SECONDS,
+    EPHEMERIS_MAX_DAYS,
+    DARK_SKY_DEFAULT_LIMIT,
+    DARK_SKY_DEFAULT_RADIUS_KM,
+    DARK_SKY_MAX_RADIUS_KM,
+    HISTORY_DEFAULT_DAYS,
+    HISTORY_MAX_DAYS,
+    WARM_SITES,
+    OUTLOOK_MAX_DAYS,
+    OUTLOOK_MAX_HOURS,
+    PUSH_MAX_COORDINATES,
+)
+import asyncio
+import datetime
+import functools
+import logging
+import time
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Sun and moon events are computed locally rather than fetched
+ephemeris = Ephemeris()
 
-ows = OpenweatherService()
+# Built by `configure` when the app starts, from settings read once (see
+# sky_alert.config), so that importing the app neither reads the environment nor
+# creates clients
+settings: Settings
+# Changes between consecutive forecasts of a cell, for in-process consumers
+changes: ChangeStream
+ows: AsyncOpenweatherService
+refresher: BackgroundRefresher
+fusion: FusionEngine
+snapshot_writer: SnapshotWriter
 
 
-@app.get("/healthz")  # type: ignore
+def configure(app_settings: Settings) -> None:
+    """Build the forecast service and what depends on it from `app_settings`."""
+    global settings, changes, ows, refresher, fusion, snapshot_writer
+    settings = app_settings
+    changes = ChangeStream()
+    ows = AsyncOpenweatherService(
+        cache=WeatherCache(stale_seconds=WEATHER_CACHE_STALE_SECONDS),
+        quantizer=GridQuantizer(degrees=COORDINATE_GRID_DEGREES),
+        persistent_cache=(
+            SqliteWeatherCache(settings.cache_path) if settings.cache_path else None
+        ),
+        provider=build_provider(settings),
+        archive=(
+            ForecastArchive(settings.history_dir) if settings.history_dir else None
+        ),
+        changes=ChangeDetector(changes),
+    )
+    # Cells with streaming subscribers are kept fresh so that their changes get pushed
+    refresher = BackgroundRefresher(ows, watched=changes.cells)
+    # OpenWeather is the only source wired in so far; add sources to fuse more
+    fusion = FusionEngine([ForecastSource("openweather", ows)])
+    snapshot_writer = SnapshotWriter(settings.snapshot_dir)
+    site_index.cache_clear()
+
+
+def _cache_stats() -> CacheStats:
+    """Stats of the forecast cache, which is empty until `configure` builds it."""
+    if "ows" not in globals():
+        return WeatherCache().stats()
+    return ows.most_recent_weather.stats()
+
+
+register_cache_metrics(_cache_stats, REGISTRY)
+
+
+@functools.lru_cache(maxsize=None)
+def site_index() -> SiteIndex:
+    """The dark-sky site catalogue, loaded on startup or on first use."""
+    return SiteIndex.from_csv(settings.sites_path)
+
+
+@contextmanager
+def _startup_phase(phase: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_SECONDS.set(time.perf_counter() - start, phase=phase)
+
+
+async def warm_sites() -> None:
+    """Prefetch forecasts and precompute a week of sun and moon events for the sites."""
+    coords = [(format_coord(lat), format_coord(lon)) for lat, lon in WARM_SITES]
+    ephemeris.precompute(coords, datetime.date.today(), days=7)
+    async for result in ows.get_sky_conditions_batch(coords):
+        if result.error is not None:
+            logger.warning(
+                "Could not warm %s, %s: %s", result.lat, result.lon, result.error
+            )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    with _startup_phase("lifespan"):
+        with _startup_phase("config"):
+            app_settings = Settings.from_env()
+            app_settings.check()
+        with _startup_phase("build"):
+            configure(app_settings)
+        with _startup_phase("warm_start"):
+            ows.warm_start()
+        with _startup_phase("sites"):
+            site_index()
+    # Forecast warm-up needs the upstream, so it runs while we already serve
+    warming = asyncio.create_task(warm_sites()) if settings.warm_sites else None
+    refresher.start()
+
+    elapsed = STARTUP_SECONDS.value(phase="lifespan")
+    if elapsed > settings.startup_budget_seconds:
+        logger.warning(
+            "Startup took %.2fs, over the %.2fs budget",
+            elapsed,
+            settings.startup_budget_seconds,
+        )
+    yield
+    if warming is not None:
+        warming.cancel()
+    await refresher.stop()
+    await ows.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request_metrics(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    with HTTP_IN_FLIGHT.track_in_progress():
+        start = time.perf_counter()
+        response = await call_next(request)
+        elapsed = time.perf_counter() - start
+
+    # Label by route template rather than raw path to keep cardinality bounded
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        route=getattr(route, "path", "unmatched"),
+        status_code=str(response.status_code),
+    )
+    return response
+
+
+@app.get("/healthz")
 # https://stackoverflow.com/questions/75347974/mypy-untyped-decorator-makes-function-main-untyped-for-fastapi-routes
 def healthz() -> str:
     return "OK"
 
 
-@app.get("/openweather_sun_data")  # type: ignore
-def sun_data(lat: str = "0", lon: str = "0") -> Union[SunData, int]:
-    return ows.get_sun_data(lat=lat, lon=lon)
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    return REGISTRY.render()
+
+
+def json_response(body: Union[bytes, str]) -> Response:
+    """Send an already serialized body, bypassing response model validation."""
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/openweather_sun_data", response_model=SunData)
+def sun_data(
+    lat: str = "0", lon: str = "0", date: Optional[datetime.date] = None
+) -> Response:
+    try:
+        return json_response(
+            ephemeris.sun_data(lat=lat, lon=lon, day=date).model_dump_json()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/openweather_moon_data", response_model=MoonData)
+def moon_data(
+    lat: str = "0", lon: str = "0", date: Optional[datetime.date] = None
+) -> Response:
+    try:
+        return json_response(
+            ephemeris.moon_data(lat=lat, lon=lon, day=date).model_dump_json()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/ephemeris")
+def ephemeris_days(
+    lat: str = "0",
+    lon: str = "0",
+    start: Optional[datetime.date] = None,
+    days: int = 1,
+) -> list[EphemerisDay]:
+    if not (1 <= days <= EPHEMERIS_MAX_DAYS):
+        raise HTTPException(
+            status_code=422, detail=f"days must be between 1 and {EPHEMERIS_MAX_DAYS}"
+        )
+    try:
+        return ephemeris.days(lat=lat, lon=lon, start=start, days=days)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/openweather_cloud_data", response_model=CloudData)
+async def cloud_data(lat: str = "0", lon: str = "0") -> Response:
+    try:
+        return json_response(await ows.get_encoded(lat, lon, parse_cloud_data))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/sky_conditions", response_model=SkyConditions)
+async def sky_conditions(lat: str = "0", lon: str = "0") -> Response:
+    try:
+        return json_response(await ows.get_encoded(lat, lon, parse_sky_conditions))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/stargazing_score", response_model=StargazingScore)
+async def stargazing_score(lat: str = "0", lon: str = "0") -> Response:
+    try:
+        return json_response(await ows.get_encoded(lat, lon, parse_stargazing_score))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/outlook")
+async def outlook(
+    lat: str = "0",
+    lon: str = "0",
+    hours: int = OUTLOOK_MAX_HOURS,
+    first_day: int = 0,
+    days: int = OUTLOOK_MAX_DAYS,
+) -> Outlook:
+    """Forecast hours from now, and days from `first_day`, from one cached forecast."""
+    if not (0 <= hours <= OUTLOOK_MAX_HOURS):
+        raise HTTPException(
+            status_code=422, detail=f"hours must be between 0 and {OUTLOOK_MAX_HOURS}"
+        )
+    if not (0 <= first_day and 0 <= days and first_day + days <= OUTLOOK_MAX_DAYS):
+        raise HTTPException(
+            status_code=422,
+            detail=f"first_day and days must stay within {OUTLOOK_MAX_DAYS} days",
+        )
+    try:
+        return await ows.get_outlook(lat, lon, hours, first_day, days)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/clouds/consensus")
+async def clouds_consensus(
+    lat: str = "0", lon: str = "0", hours: int = OUTLOOK_MAX_HOURS
+) -> FusedCloudCover:
+    """Weighted consensus cloud cover of the forecast sources that answered in time."""
+    if not (0 <= hours <= OUTLOOK_MAX_HOURS):
+        raise HTTPException(
+            status_code=422, detail=f"hours must be between 0 and {OUTLOOK_MAX_HOURS}"
+        )
+    try:
+        fused = await fusion.cloud_cover(lat, lon, hours)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if all(source.status in ("timeout", "error") for source in fused.sources):
+        raise HTTPException(status_code=503, detail="No forecast source available")
+    return fused
+
+
+@app.get("/dark_sky_sites/best")
+async def best_dark_sky_sites(
+    lat: str = "0",
+    lon: str = "0",
+    radius_km: float = DARK_SKY_DEFAULT_RADIUS_KM,
+    limit: int = DARK_SKY_DEFAULT_LIMIT,
+) -> BestSites:
+    """Rank the dark-sky sites within `radius_km` by their best observing window."""
+    if not (0 < radius_km <= DARK_SKY_MAX_RADIUS_KM):
+        raise HTTPException(
+            status_code=422,
+            detail=f"radius_km must be between 0 and {DARK_SKY_MAX_RADIUS_KM}",
+        )
+    if limit < 1:
+        raise HTTPException(status_code=422, detail="limit must be at least 1")
+    try:
+        return await best_sites(ows, site_index(), lat, lon, radius_km, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _epoch(value: datetime.datetime) -> int:
+    """Epoch seconds of `value`, reading times without a zone as UTC like the archive."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp())
+
+
+def _history_range(
+    start: Optional[datetime.datetime], end: Optional[datetime.datetime]
+) -> tuple[int, int]:
+    """Resolve the query range to epoch seconds, defaulting to the recent past."""
+    if ows.archive is None:
+        raise HTTPException(status_code=404, detail="History archive is not enabled")
+    end_ts = _epoch(end) if end is not None else int(time.time())
+    start_ts = (
+        _epoch(start) if start is not None else end_ts - HISTORY_DEFAULT_DAYS * 86400
+    )
+    if not (0 <= end_ts - start_ts <= HISTORY_MAX_DAYS * 86400):
+        raise HTTPException(
+            status_code=422,
+            detail=f"start must be before end and within {HISTORY_MAX_DAYS} days",
+        )
+    return start_ts, end_ts
+
+
+@app.get("/history/hourly")
+def history_hourly(
+    lat: str = "0",
+    lon: str = "0",
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    lead_hours: int = 0,
+) -> list[HistoricalHour]:
+    """Archived hourly conditions, observed or as forecast `lead_hours` ahead."""
+    start_ts, end_ts = _history_range(start, end)
+    assert ows.archive is not None
+    try:
+        key = ows.cache_key(lat, lon)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return [
+        HistoricalHour(
+            time=datetime.datetime.utcfromtimestamp(record.hour),
+            clouds=record.clouds,
+            humidity=record.humidity,
+            visibility=record.visibility,
+            wind_speed=round(record.wind_speed, 2),
+        )
+        for record in ows.archive.hourly(key, start_ts, end_ts, lead_hours)
+    ]
+
+
+@app.get("/history/cloud_accuracy")
+def history_cloud_accuracy(
+    lat: str = "0",
+    lon: str = "0",
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    lead_hours: int = 24,
+) -> CloudAccuracy:
+    """Compare cloud cover forecast `lead_hours` ahead with what was observed."""
+    start_ts, end_ts = _history_range(start, end)
+    assert ows.archive is not None
+    if lead_hours not in ows.archive.lead_hours:
+        raise HTTPException(
+            status_code=422,
+            detail=f"lead_hours must be one of {list(ows.archive.lead_hours)}",
+        )
+    try:
+        key = ows.cache_key(lat, lon)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    comparisons = ows.archive.compare_clouds(key, start_ts, end_ts, lead_hours)
+    if not comparisons:
+        return CloudAccuracy(lead_hours=lead_hours, hours=0)
+    errors = [c.forecast - c.actual for c in comparisons]
+    return CloudAccuracy(
+        lead_hours=lead_hours,
+        hours=len(errors),
+        mean_absolute_error=round(sum(map(abs, errors)) / len(errors), 2),
+        bias=round(sum(errors) / len(errors), 2),
+    )
+
+
+@app.post("/sky_conditions/batch")
+async def sky_conditions_batch(
+    coordinates: list[Coordinate], concurrency: int = BATCH_CONCURRENCY
+) -> StreamingResponse:
+    """Stream one JSON line per coordinate as soon as its conditions are known."""
+    if len(coordinates) > BATCH_MAX_COORDINATES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BATCH_MAX_COORDINATES} coordinates per batch",
+        )
+    if not (1 <= concurrency <= BATCH_CONCURRENCY):
+        raise HTTPException(
+            status_code=422,
+            detail=f"concurrency must be between 1 and {BATCH_CONCURRENCY}",
+        )
+
+    async def lines() -> AsyncIterator[str]:
+        async for result in ows.get_sky_conditions_batch(
+            ((c.lat, c.lon) for c in coordinates), concurrency=concurrency
+        ):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 
+@app.get("/sky_conditions/stream")
+async def sky_conditions_stream(
+    coord: list[str] = Query(default=[], description="lat,lon; repeat for more"),
+) -> StreamingResponse:
+    """Push server-sent sky conditions for each `coord` now and whenever they change."""
+    if not (1 <= len(coord) <= PUSH_MAX_COORDINATES):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Pass between 1 and {PUSH_MAX_COORDINATES} coord parameters",
+        )
+    coordinates = []
+    for value in coord:
+        lat, _, lon = value.partition(",")
+        try:
+            ows.cache_key(lat, lon)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"{value!r}: {e}")
+        coordinates.append((lat, lon))
 
-@app.get("/openweather_moon_data")  # type: ignore
-def moon_data(lat: str = "0", lon: str = "0") -> Union[MoonData, int]:
-    return ows.get_moon_data(lat=lat, lon=lon)
+    return StreamingResponse(
+        condition_events(ows, changes, coordinates),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@app.get("/openweather_cloud_data")  # type: ignore
-def cloud_data(lat: str = "0", lon: str = "0") -> Union[CloudData, int]:
-    return ows.get_cloud_data(lat=lat, lon=lon)
+@app.post("/snapshots", status_code=202)
+async def export_snapshot(
+    background_tasks: BackgroundTasks,
+    coordinates: Optional[list[Coordinate]] = None,
+) -> SnapshotExport:
+    """Snapshot the cache, or just `coordinates`, to a new compressed file.
 
+    The chosen coordinates are fetched first if they are not cached, and those that
+    cannot be fetched are left out. The file is written after the response is sent
+    and appears at `path` once complete.
+    """
+    keys = None
+    if coordinates is not None:
+        if len(coordinates) > BATCH_MAX_COORDINATES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {BATCH_MAX_COORDINATES} coordinates per snapshot",
+            )
+        keys = set()
+        async for result in ows.get_sky_conditions_batch(
+            (c.lat, c.lon) for c in coordinates
+        ):
+            if result.error is None:
+                keys.add(ows.cache_key(result.lat, result.lon))
 
-@app.get("/get_and_write_openweather_data_to_file")  # type: ignore
-def get_and_write_openweather_data_to_file(lat: str = "0", lon: str = "0") -> bool:
-    ows.update_most_recent_weather(lat=lat, lon=lon)
-    with open("most_recent_weather.json", "w") as f:
-        json.dump(ows.most_recent_weather[(lat, lon)], f)
-        print("write to file succeeded")
-    return True
+    records = ows.snapshot_records(keys)
+    path = snapshot_writer.next_path()
+    background_tasks.add_task(snapshot_writer.write, records, path)
+    return SnapshotExport(path=path, entries=len(records))
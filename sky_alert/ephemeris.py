@@ -0,0 +1,445 @@
+"""Local sun and moon ephemeris, so rise/set times and phase need no upstream call.
+
+Positions use the low-precision formulas of the Astronomical Almanac (sun to about
+0.01°, moon to about 0.3°), which put events within a minute or two of published
+tables. Horizon crossings are found by sampling altitudes hourly across many sites
+and days at once with NumPy, then refining each crossing with one regula falsi step.
+
+A "day" at a site is the 24 hours starting at local mean midnight, i.e. UTC midnight
+shifted by `lon / 15` hours.
+"""
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from sky_alert.constants import (
+    EPHEMERIS_CACHE_MAX_ENTRIES,
+    EPHEMERIS_GRID_DEGREES,
+)
+from sky_alert.protocol import EphemerisDay, MoonData, SunData
+from sky_alert.quantizer import GridQuantizer, parse_coord
+
+Floats = npt.NDArray[np.float64]
+
+SECONDS_PER_DAY = 86400
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+
+# Altitudes of the sun's center at sunrise/sunset (refraction plus semidiameter) and
+# at the start and end of astronomical twilight.
+SUNRISE_ALTITUDE = -0.833
+ASTRONOMICAL_TWILIGHT_ALTITUDE = -18.0
+
+# Moon events get up to this many days past the requested range to find the next
+# rise or set, for the days the moon does not rise or does not set.
+MOON_LOOKAHEAD_DAYS = 2
+
+# Sites per vectorized pass in `Ephemeris.precompute`, bounding peak memory to a few
+# hundred MB for a year of events.
+PRECOMPUTE_BATCH_SITES = 256
+
+
+class DayEvents(NamedTuple):
+    """Sun and moon events of one site and day, as epoch seconds.
+
+    Sun events are None when they do not happen that day (polar day or night, or
+    summer nights that never reach astronomical darkness). A moonrise or moonset
+    that does not happen that day is replaced by the next one after it.
+    """
+
+    sunrise: Optional[int]
+    sunset: Optional[int]
+    astronomical_dawn: Optional[int]
+    astronomical_dusk: Optional[int]
+    moonrise: Optional[int]
+    moonset: Optional[int]
+    moon_phase: float
+
+
+def _days_since_j2000(t: Floats) -> Floats:
+    return t / SECONDS_PER_DAY + UNIX_EPOCH_JD - J2000_JD
+
+
+def _equatorial(
+    ecliptic_lon: Floats, ecliptic_lat: Floats, n: Floats
+) -> tuple[Floats, Floats]:
+    """Right ascension and declination (radians) from ecliptic coordinates (degrees)."""
+    lam, beta = np.radians(ecliptic_lon), np.radians(ecliptic_lat)
+    eps = np.radians(23.439 - 0.0000004 * n)
+    ra = np.arctan2(np.sin(lam) * np.cos(eps) - np.tan(beta) * np.sin(eps), np.cos(lam))
+    dec = np.arcsin(
+        np.sin(beta) * np.cos(eps) + np.cos(beta) * np.sin(eps) * np.sin(lam)
+    )
+    return ra, dec
+
+
+def sun_longitude(t: Floats) -> Floats:
+    """Apparent ecliptic longitude of the sun in degrees at epoch seconds `t`."""
+    n = _days_since_j2000(t)
+    mean_lon = 280.460 + 0.9856474 * n
+    anomaly = np.radians(357.528 + 0.9856003 * n)
+    longitude: Floats = (
+        mean_lon + 1.915 * np.sin(anomaly) + 0.020 * np.sin(2 * anomaly)
+    ) % 360
+    return longitude
+
+
+def moon_position(t: Floats) -> tuple[Floats, Floats, Floats]:
+    """Ecliptic longitude, latitude and horizontal parallax of the moon in degrees."""
+    c = _days_since_j2000(t) / 36525
+
+    def s(a: float, b: float) -> Floats:
+        sine: Floats = np.sin(np.radians(a + b * c))
+        return sine
+
+    def k(a: float, b: float) -> Floats:
+        cosine: Floats = np.cos(np.radians(a + b * c))
+        return cosine
+
+    longitude = (
+        218.32
+        + 481267.881 * c
+        + 6.29 * s(135.0, 477198.87)
+        - 1.27 * s(259.3, -413335.36)
+        + 0.66 * s(235.7, 890534.22)
+        + 0.21 * s(269.9, 954397.74)
+        - 0.19 * s(357.5, 35999.05)
+        - 0.11 * s(186.5, 966404.03)
+    )
+    latitude = (
+        5.13 * s(93.3, 483202.02)
+        + 0.28 * s(228.2, 960400.89)
+        - 0.28 * s(318.3, 6003.15)
+        - 0.17 * s(217.6, -407332.21)
+    )
+    parallax = (
+        0.9508
+        + 0.0518 * k(135.0, 477198.87)
+        + 0.0095 * k(259.3, -413335.36)
+        + 0.0078 * k(235.7, 890534.22)
+        + 0.0028 * k(269.9, 954397.74)
+    )
+    return longitude % 360, latitude, parallax
+
+
+def moon_phase(t: Floats) -> Floats:
+    """Phase in One Call convention: 0 new, 0.25 first quarter, 0.5 full moon."""
+    phase: Floats = ((moon_position(t)[0] - sun_longitude(t)) % 360) / 360
+    return phase
+
+
+def _altitude(ra: Floats, dec: Floats, lat: Floats, lon: Floats, n: Floats) -> Floats:
+    """Geocentric altitude in degrees; `lat`/`lon` in degrees, the rest in radians."""
+    sidereal = np.radians((280.46061837 + 360.98564736629 * n + lon) % 360)
+    phi = np.radians(lat)
+    altitude: Floats = np.degrees(
+        np.arcsin(
+            np.sin(phi) * np.sin(dec)
+            + np.cos(phi) * np.cos(dec) * np.cos(sidereal - ra)
+        )
+    )
+    return altitude
+
+
+def sun_equatorial(t: Floats) -> tuple[Floats, Floats, Floats]:
+    """Right ascension, declination and rise/set altitude (0) of the sun."""
+    n = _days_since_j2000(t)
+    ra, dec = _equatorial(sun_longitude(t), np.zeros_like(n), n)
+    return ra, dec, np.zeros_like(n)
+
+
+def moon_equatorial(t: Floats) -> tuple[Floats, Floats, Floats]:
+    """Right ascension, declination and rise/set altitude of the moon.
+
+    The rise/set altitude shifts with the moon's parallax, i.e. its distance.
+    """
+    n = _days_since_j2000(t)
+    longitude, latitude, parallax = moon_position(t)
+    ra, dec = _equatorial(longitude, latitude, n)
+    return ra, dec, 0.7275 * parallax - 0.5667
+
+
+def sun_altitude(t: Floats, lat: Floats, lon: Floats) -> Floats:
+    ra, dec, _ = sun_equatorial(t)
+    return _altitude(ra, dec, lat, lon, _days_since_j2000(t))
+
+
+def moon_rise_altitude(t: Floats, lat: Floats, lon: Floats) -> Floats:
+    """Moon altitude above its rise/set altitude."""
+    ra, dec, horizon = moon_equatorial(t)
+    return _altitude(ra, dec, lat, lon, _days_since_j2000(t)) - horizon
+
+
+def _hourly_equatorial(
+    equatorial: Callable[[Floats], tuple[Floats, Floats, Floats]],
+    t: Floats,
+) -> tuple[Floats, Floats, Floats]:
+    """Evaluate `equatorial` at site sample times `t` of shape `(sites, samples)`.
+
+    Sites differ only by a constant offset, so positions are computed once on a
+    shared hourly UTC grid and linearly interpolated, which for bodies moving at most
+    0.6° an hour costs well under a second of arc.
+    """
+    origin = np.floor(t[:, 0].min() / 3600) * 3600
+    offset = (t[:, 0] - origin) / 3600
+    shift = offset.astype(np.int64)
+    frac = (offset - shift)[:, None]
+    grid = origin + np.arange(shift.max() + t.shape[1] + 1) * 3600.0
+    ra, dec, horizon = equatorial(grid)
+    ra = np.unwrap(ra)
+    index = shift[:, None] + np.arange(t.shape[1])
+
+    def sample(series: Floats) -> Floats:
+        low = series[index]
+        interpolated: Floats = low + frac * (series[index + 1] - low)
+        return interpolated
+
+    return sample(ra), sample(dec), sample(horizon)
+
+
+AltitudeFn = Callable[[Floats, Floats, Floats], Floats]
+
+
+def _crossings(
+    fn: AltitudeFn,
+    lat: Floats,
+    lon: Floats,
+    t: Floats,
+    f: Floats,
+    days: int,
+    rising: bool,
+    lookahead_days: int,
+) -> Floats:
+    """Time of the first crossing at or after the start of each day, else NaN.
+
+    `t` and `f` are hourly samples of shape `(sites, hours + 1)`; crossings up to
+    `lookahead_days` past the end of a day count for that day.
+    """
+    sites, samples = f.shape
+    crossed = (
+        (f[:, :-1] < 0) & (f[:, 1:] >= 0)
+        if rising
+        else ((f[:, :-1] >= 0) & (f[:, 1:] < 0))
+    )
+    # Index of the next crossing at or after every sample, `samples` if none.
+    index = np.where(crossed, np.arange(samples - 1), samples)
+    following = np.minimum.accumulate(index[:, ::-1], axis=1)[:, ::-1]
+    first = following[:, : days * 24 : 24]
+    limit = (np.arange(days) + 1 + lookahead_days) * 24
+    found = first < np.minimum(limit, samples - 1)
+
+    rows = np.nonzero(found)[0]
+    i = first[found]
+    t0, t1, f0, f1 = t[rows, i], t[rows, i + 1], f[rows, i], f[rows, i + 1]
+    tm = t0 + f0 / (f0 - f1) * (t1 - t0)
+    fm = fn(tm, lat[rows], lon[rows])
+    # Keep the half of the bracket that still straddles the horizon.
+    low = (fm < 0) == (f0 < 0)
+    t0, f0 = np.where(low, tm, t0), np.where(low, fm, f0)
+    t1, f1 = np.where(low, t1, tm), np.where(low, f1, fm)
+
+    events = np.full((sites, days), np.nan)
+    events[found] = t0 + f0 / (f0 - f1) * (t1 - t0)
+    return events
+
+
+def compute_events(
+    lats: Sequence[float], lons: Sequence[float], start: datetime.date, days: int
+) -> list[list[DayEvents]]:
+    """Sun and moon events for every site over `days` days from `start`."""
+    lat = np.asarray(lats, dtype=np.float64)
+    lon = np.asarray(lons, dtype=np.float64)
+    midnight = (start - datetime.date(1970, 1, 1)).days * SECONDS_PER_DAY
+    day_starts = midnight - lon * SECONDS_PER_DAY / 360
+    hours = (days + MOON_LOOKAHEAD_DAYS) * 24
+    t = day_starts[:, None] + np.arange(hours + 1) * 3600.0
+    lat2, lon2 = lat[:, None], lon[:, None]
+    n = _days_since_j2000(t)
+
+    ra, dec, _ = _hourly_equatorial(sun_equatorial, t)
+    sun = _altitude(ra, dec, lat2, lon2, n)
+    ra, dec, horizon = _hourly_equatorial(moon_equatorial, t)
+    moon = _altitude(ra, dec, lat2, lon2, n) - horizon
+
+    def sun_fn(altitude: float) -> AltitudeFn:
+        return lambda t, lat, lon: sun_altitude(t, lat, lon) - altitude
+
+    columns = {}
+    for name, fn, f, rising, lookahead in (
+        ("sunrise", sun_fn(SUNRISE_ALTITUDE), sun - SUNRISE_ALTITUDE, True, 0),
+        ("sunset", sun_fn(SUNRISE_ALTITUDE), sun - SUNRISE_ALTITUDE, False, 0),
+        (
+            "astronomical_dawn",
+            sun_fn(ASTRONOMICAL_TWILIGHT_ALTITUDE),
+            sun - ASTRONOMICAL_TWILIGHT_ALTITUDE,
+            True,
+            0,
+        ),
+        (
+            "astronomical_dusk",
+            sun_fn(ASTRONOMICAL_TWILIGHT_ALTITUDE),
+            sun - ASTRONOMICAL_TWILIGHT_ALTITUDE,
+            False,
+            0,
+        ),
+        ("moonrise", moon_rise_altitude, moon, True, MOON_LOOKAHEAD_DAYS),
+        ("moonset", moon_rise_altitude, moon, False, MOON_LOOKAHEAD_DAYS),
+    ):
+        columns[name] = _crossings(fn, lat, lon, t, f, days, rising, lookahead)
+
+    noon = day_starts[:, None] + (np.arange(days) + 0.5) * SECONDS_PER_DAY
+    phases = moon_phase(noon)
+
+    # Convert whole columns at once; per-value conversion dominates otherwise.
+    flat: list[list[Any]] = [
+        _optional_ints(columns[name]) for name in DayEvents._fields[:-1]
+    ]
+    flat.append(np.round(phases, 4).ravel().tolist())
+    events = list(map(DayEvents._make, zip(*flat)))
+    return [events[site * days : (site + 1) * days] for site in range(len(lat))]
+
+
+def _optional_ints(values: Floats) -> list[Optional[int]]:
+    missing = np.isnan(values).ravel().tolist()
+    ints = np.rint(np.nan_to_num(values)).astype(np.int64).ravel().tolist()
+    return [None if m else v for v, m in zip(ints, missing)]
+
+
+class Ephemeris:
+    """Memoized per-day events for the grid cell of each coordinate.
+
+    Cells are `grid_degrees` wide; a 0.1° cell moves rise and set times by well under
+    a minute, so nearby coordinates share one computation.
+    """
+
+    def __init__(
+        self,
+        grid_degrees: float = EPHEMERIS_GRID_DEGREES,
+        max_entries: int = EPHEMERIS_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.quantizer = GridQuantizer(degrees=grid_degrees)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memo: OrderedDict[tuple[str, str, int], DayEvents] = OrderedDict()
+        self.computed = 0
+
+    def today(self, lat: str, lon: str) -> datetime.date:
+        """The site's current local (mean solar time) date."""
+        local = self._clock() + parse_coord(lat, lon)[1] * SECONDS_PER_DAY / 360
+        return datetime.datetime.utcfromtimestamp(local).date()
+
+    def events(
+        self, lat: str, lon: str, start: Optional[datetime.date] = None, days: int = 1
+    ) -> list[DayEvents]:
+        """Events for each day from `start` (the site's today by default)."""
+        cell = self.quantizer.cell(lat, lon)
+        start = self.today(lat, lon) if start is None else start
+        keys = [(*cell, start.toordinal() + d) for d in range(days)]
+        with self._lock:
+            cached = [self._memo.get(key) for key in keys]
+            for key, value in zip(keys, cached):
+                if value is not None:
+                    self._memo.move_to_end(key)
+        if all(value is not None for value in cached):
+            return [value for value in cached if value is not None]
+
+        computed = compute_events([float(cell[0])], [float(cell[1])], start, days)[0]
+        self._store(zip(keys, computed))
+        return computed
+
+    def precompute(
+        self, sites: Sequence[tuple[str, str]], start: datetime.date, days: int
+    ) -> int:
+        """Compute and memoize `days` days of events for many sites, in batches.
+
+        Returns the number of `(cell, day)` entries computed.
+        """
+        cells = list(dict.fromkeys(self.quantizer.cell(lat, lon) for lat, lon in sites))
+        for i in range(0, len(cells), PRECOMPUTE_BATCH_SITES):
+            batch = cells[i : i + PRECOMPUTE_BATCH_SITES]
+            computed = compute_events(
+                [float(lat) for lat, _ in batch],
+                [float(lon) for _, lon in batch],
+                start,
+                days,
+            )
+            self._store(
+                ((*cell, start.toordinal() + d), day)
+                for cell, cell_days in zip(batch, computed)
+                for d, day in enumerate(cell_days)
+            )
+        return len(cells) * days
+
+    def _store(self, items: Iterable[tuple[tuple[str, str, int], DayEvents]]) -> None:
+        with self._lock:
+            for key, value in items:
+                self._memo[key] = value
+                self._memo.move_to_end(key)
+                self.computed += 1
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+
+    def sun_data(
+        self, lat: str, lon: str, day: Optional[datetime.date] = None
+    ) -> SunData:
+        sun = to_sun_data(self.events(lat, lon, day)[0])
+        if sun is None:
+            raise ValueError("The sun does not rise or set at this location that day.")
+        return sun
+
+    def moon_data(
+        self, lat: str, lon: str, day: Optional[datetime.date] = None
+    ) -> MoonData:
+        moon = to_moon_data(self.events(lat, lon, day)[0])
+        if moon is None:
+            raise ValueError("The moon does not rise or set near this location's day.")
+        return moon
+
+    def days(
+        self, lat: str, lon: str, start: Optional[datetime.date] = None, days: int = 1
+    ) -> list[EphemerisDay]:
+        start = self.today(lat, lon) if start is None else start
+        return [
+            EphemerisDay(
+                date=start + datetime.timedelta(days=d),
+                sun=to_sun_data(events),
+                moon=to_moon_data(events),
+            )
+            for d, events in enumerate(self.events(lat, lon, start, days))
+        ]
+
+
+def to_sun_data(events: DayEvents) -> Optional[SunData]:
+    if events.sunrise is None or events.sunset is None:
+        return None
+    return SunData(
+        sunrise=_utc(events.sunrise),
+        sunset=_utc(events.sunset),
+        astronomical_dawn=_utc_or_none(events.astronomical_dawn),
+        astronomical_dusk=_utc_or_none(events.astronomical_dusk),
+    )
+
+
+def to_moon_data(events: DayEvents) -> Optional[MoonData]:
+    if events.moonrise is None or events.moonset is None:
+        return None
+    return MoonData(
+        moonrise=_utc(events.moonrise),
+        moonset=_utc(events.moonset),
+        moonphase=events.moon_phase,
+    )
+
+
+def _utc(timestamp: int) -> datetime.datetime:
+    return datetime.datetime.utcfromtimestamp(timestamp)
+
+
+def _utc_or_none(timestamp: Optional[int]) -> Optional[datetime.datetime]:
+    return None if timestamp is None else _utc(timestamp)
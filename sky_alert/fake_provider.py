@@ -0,0 +1,138 @@
+"""Offline stand-in for OpenWeather, for load tests and local development.
+
+Use FakeWeatherProvider in-process, or serve the same payloads over HTTP and point
+OPENWEATHER_API_URL at it:
+
+    uvicorn sky_alert.fake_provider:app --port 8001
+    OPENWEATHER_API_URL=http://localhost:8001/data/3.0/onecall
+"""
+import asyncio
+import math
+import os
+import random
+import time
+import zlib
+from typing import Any, Callable, Optional
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from sky_alert.providers import ProviderResponse
+from sky_alert.constants import (
+    FAKE_PROVIDER_HOURS,
+    FAKE_PROVIDER_DAYS,
+    FAKE_PROVIDER_ERROR_STATUS,
+)
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+SYNODIC_MONTH_DAYS = 29.530588853
+# 2000-01-06 18:14 UTC, a new moon
+KNOWN_NEW_MOON = 947182440
+
+
+def synthetic_one_call(lat: str, lon: str, now: Optional[float] = None) -> Any:
+    """Build a plausible One Call payload that is deterministic per coordinate and hour.
+
+    Cloud cover follows a smooth daily wave whose phase depends on the coordinate, so
+    nearby calls agree and repeated calls within an hour return the same payload.
+    """
+    now = time.time() if now is None else now
+    dt = int(now) - int(now) % SECONDS_PER_HOUR
+    seed = zlib.crc32(f"{lat},{lon}".encode())
+    phase = (seed % 360) * math.pi / 180
+    today = dt - dt % SECONDS_PER_DAY
+
+    def clouds(t: int) -> int:
+        wave = math.sin(2 * math.pi * t / SECONDS_PER_DAY + phase)
+        return int(round(50 + 50 * wave))
+
+    def moon_phase(t: int) -> float:
+        return round(
+            ((t - KNOWN_NEW_MOON) / SECONDS_PER_DAY)
+            % SYNODIC_MONTH_DAYS
+            / SYNODIC_MONTH_DAYS,
+            2,
+        )
+
+    return {
+        "lat": float(lat),
+        "lon": float(lon),
+        "current": {
+            "dt": dt,
+            "sunrise": today + 6 * SECONDS_PER_HOUR,
+            "sunset": today + 20 * SECONDS_PER_HOUR,
+            "clouds": clouds(dt),
+        },
+        "hourly": [
+            {
+                "dt": dt + i * SECONDS_PER_HOUR,
+                "clouds": clouds(dt + i * SECONDS_PER_HOUR),
+                "humidity": 40 + (seed + i) % 50,
+                "visibility": 10000,
+                "wind_speed": round(1 + ((seed >> 3) + i) % 8 * 0.5, 1),
+            }
+            for i in range(FAKE_PROVIDER_HOURS)
+        ],
+        "daily": [
+            {
+                "dt": today + d * SECONDS_PER_DAY + 12 * SECONDS_PER_HOUR,
+                "sunrise": today + d * SECONDS_PER_DAY + 6 * SECONDS_PER_HOUR,
+                "sunset": today + d * SECONDS_PER_DAY + 20 * SECONDS_PER_HOUR,
+                "moonrise": today + d * SECONDS_PER_DAY + (seed + 50 * d) % 86000,
+                "moonset": today
+                + d * SECONDS_PER_DAY
+                + (seed + 50 * d + 43200) % 86000,
+                "moon_phase": moon_phase(today + d * SECONDS_PER_DAY),
+            }
+            for d in range(FAKE_PROVIDER_DAYS)
+        ],
+    }
+
+
+class FakeWeatherProvider:
+    """WeatherProvider serving synthetic payloads with configurable latency and errors."""
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = FAKE_PROVIDER_ERROR_STATUS,
+        seed: Optional[int] = None,
+        payload_factory: Callable[[str, str], Any] = synthetic_one_call,
+    ) -> None:
+        if not (0.0 <= error_rate <= 1.0):
+            raise ValueError("error_rate must be between 0 and 1")
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payload_factory = payload_factory
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    async def fetch(self, lat: str, lon: str) -> ProviderResponse:
+        self.calls += 1
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        if self._random.random() < self.error_rate:
+            return ProviderResponse(status_code=self.error_status, json_data=None)
+        return ProviderResponse(
+            status_code=200, json_data=self.payload_factory(lat, lon)
+        )
+
+    async def aclose(self) -> None:
+        pass
+
+
+fake_provider = FakeWeatherProvider(
+    latency_seconds=float(os.environ.get("FAKE_PROVIDER_LATENCY_SECONDS", "0")),
+    error_rate=float(os.environ.get("FAKE_PROVIDER_ERROR_RATE", "0")),
+)
+
+app = FastAPI()
+
+
+@app.get("/data/3.0/onecall")
+async def onecall(lat: str, lon: str, appid: str = "") -> JSONResponse:
+    res = await fake_provider.fetch(lat=lat, lon=lon)
+    if res.json_data is None:
+        return JSONResponse({"cod": res.status_code}, status_code=res.status_code)
+    return JSONResponse(res.json_data)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+import bisect
+import json
+from array import array
+from typing import Any, NamedTuple, Optional
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    return int(value) if isinstance(value, (int, float)) else None
+
+
+def _number(value: Any, default: float = 0.0) -> float:
+    return float(value) if isinstance(value, (int, float)) else default
+
+
+# Values stored for hours that lack humidity, visibility or wind. Visibility defaults
+# to OpenWeather's 10 km ceiling, so a missing reading never penalises an hour.
+MAX_VISIBILITY_METERS = 10000
+
+SECONDS_PER_HOUR = 3600
+
+
+class HourlySlice(NamedTuple):
+    """Views of a run of consecutive hours of a forecast's hourly series."""
+
+    dt: memoryview
+    clouds: memoryview
+    humidity: memoryview
+    visibility: memoryview
+    wind_speed: memoryview
+
+
+class DailySlice(NamedTuple):
+    """Views of a run of consecutive days of a forecast's daily series."""
+
+    dt: memoryview
+    sunrise: memoryview
+    sunset: memoryview
+    moonrise: memoryview
+    moonset: memoryview
+    moon_phase: memoryview
+
+
+class CompactForecast:
+    """The parts of a One Call payload that SkyAlert uses, projected at ingest.
+
+    Timestamps are epoch seconds. Series live in typed arrays rather than lists of
+    dicts, which keeps an entry to a few hundred bytes and turns reads into plain
+    field accesses. Missing daily values are stored as 0, and the hourly series stop
+    at the first hour without cloud cover. Hours missing humidity or wind store 0,
+    and hours missing visibility store `MAX_VISIBILITY_METERS`.
+    """
+
+    __slots__ = (
+        "dt",
+        "sunrise",
+        "sunset",
+        "hourly_dt",
+        "hourly_clouds",
+        "hourly_humidity",
+        "hourly_visibility",
+        "hourly_wind_speed",
+        "daily_dt",
+        "daily_sunrise",
+        "daily_sunset",
+        "daily_moonrise",
+        "daily_moonset",
+        "daily_moon_phase",
+    )
+
+    def __init__(
+        self,
+        dt: Optional[int] = None,
+        sunrise: Optional[int] = None,
+        sunset: Optional[int] = None,
+        hourly_dt: Optional[array[int]] = None,
+        hourly_clouds: Optional[array[int]] = None,
+        hourly_humidity: Optional[array[int]] = None,
+        hourly_visibility: Optional[array[int]] = None,
+        hourly_wind_speed: Optional[array[float]] = None,
+        daily_dt: Optional[array[int]] = None,
+        daily_sunrise: Optional[array[int]] = None,
+        daily_sunset: Optional[array[int]] = None,
+        daily_moonrise: Optional[array[int]] = None,
+        daily_moonset: Optional[array[int]] = None,
+        daily_moon_phase: Optional[array[float]] = None,
+    ) -> None:
+        self.dt = dt
+        self.sunrise = sunrise
+        self.sunset = sunset
+        self.hourly_dt = hourly_dt if hourly_dt is not None else array("q")
+        self.hourly_clouds = hourly_clouds if hourly_clouds is not None else array("B")
+        self.hourly_humidity = (
+            hourly_humidity if hourly_humidity is not None else array("B")
+        )
+        self.hourly_visibility = (
+            hourly_visibility if hourly_visibility is not None else array("H")
+        )
+        self.hourly_wind_speed = (
+            hourly_wind_speed if hourly_wind_speed is not None else array("f")
+        )
+        self.daily_dt = daily_dt if daily_dt is not None else array("q")
+        self.daily_sunrise = daily_sunrise if daily_sunrise is not None else array("q")
+        self.daily_sunset = daily_sunset if daily_sunset is not None else array("q")
+        self.daily_moonrise = (
+            daily_moonrise if daily_moonrise is not None else array("q")
+        )
+        self.daily_moonset = daily_moonset if daily_moonset is not None else array("q")
+        self.daily_moon_phase = (
+            daily_moon_phase if daily_moon_phase is not None else array("d")
+        )
+
+    @classmethod
+    def from_json(cls, json_data: Any) -> "CompactForecast":
+        """Project a raw One Call payload, tolerating missing or malformed sections."""
+        forecast = cls()
+        if not isinstance(json_data, dict):
+            return forecast
+
+        current = json_data.get("current")
+        if isinstance(current, dict):
+            forecast.dt = _int_or_none(current.get("dt"))
+            forecast.sunrise = _int_or_none(current.get("sunrise"))
+            forecast.sunset = _int_or_none(current.get("sunset"))
+
+        hourly = json_data.get("hourly")
+        if isinstance(hourly, list):
+            for hour in hourly:
+                clouds = hour.get("clouds") if isinstance(hour, dict) else None
+                if not isinstance(clouds, (int, float)):
+                    break
+                forecast.hourly_dt.append(_int_or_none(hour.get("dt")) or 0)
+                forecast.hourly_clouds.append(int(clouds))
+                forecast.hourly_humidity.append(
+                    min(int(_number(hour.get("humidity"))), 100)
+                )
+                forecast.hourly_visibility.append(
+                    min(
+                        int(_number(hour.get("visibility"), MAX_VISIBILITY_METERS)),
+                        MAX_VISIBILITY_METERS,
+                    )
+                )
+                forecast.hourly_wind_speed.append(_number(hour.get("wind_speed")))
+
+        daily = json_data.get("daily")
+        if isinstance(daily, list):
+            for day in daily:
+                if not isinstance(day, dict):
+                    break
+                forecast.daily_dt.append(_int_or_none(day.get("dt")) or 0)
+                forecast.daily_sunrise.append(_int_or_none(day.get("sunrise")) or 0)
+                forecast.daily_sunset.append(_int_or_none(day.get("sunset")) or 0)
+                forecast.daily_moonrise.append(_int_or_none(day.get("moonrise")) or 0)
+                forecast.daily_moonset.append(_int_or_none(day.get("moonset")) or 0)
+                forecast.daily_moon_phase.append(_number(day.get("moon_phase")))
+
+        return forecast
+
+    def hours(self, start: int = 0, count: Optional[int] = None) -> HourlySlice:
+        """Return `count` hours from index `start`, or all of the remaining hours.
+
+        The slices are memoryviews sharing the series' memory, so taking a long
+        horizon costs the same as a short one. While any view is alive the series
+        cannot be resized, which is fine for forecasts that are already cached.
+        """
+        stop = None if count is None else start + count
+        return HourlySlice(
+            dt=memoryview(self.hourly_dt)[start:stop],
+            clouds=memoryview(self.hourly_clouds)[start:stop],
+            humidity=memoryview(self.hourly_humidity)[start:stop],
+            visibility=memoryview(self.hourly_visibility)[start:stop],
+            wind_speed=memoryview(self.hourly_wind_speed)[start:stop],
+        )
+
+    def hours_from(self, timestamp: float, count: Optional[int] = None) -> HourlySlice:
+        """Return `count` hours starting with the one in progress at `timestamp`.
+
+        Hours that have already ended are skipped, so a forecast fetched a while ago
+        still answers "the next N hours".
+        """
+        start = bisect.bisect_right(self.hourly_dt, timestamp - SECONDS_PER_HOUR)
+        return self.hours(start, count)
+
+    def days(self, start: int = 0, count: Optional[int] = None) -> DailySlice:
+        """Return `count` days from index `start`, or all of the remaining days.
+
+        Day 0 is the day the forecast was issued. Like `hours`, the slices are views.
+        """
+        stop = None if count is None else start + count
+        return DailySlice(
+            dt=memoryview(self.daily_dt)[start:stop],
+            sunrise=memoryview(self.daily_sunrise)[start:stop],
+            sunset=memoryview(self.daily_sunset)[start:stop],
+            moonrise=memoryview(self.daily_moonrise)[start:stop],
+            moonset=memoryview(self.daily_moonset)[start:stop],
+            moon_phase=memoryview(self.daily_moon_phase)[start:stop],
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the series, for cache byte budgets."""
+        return 64 + sum(
+            len(series) * series.itemsize for series in self._series().values()
+        )
+
+    def _series(self) -> dict[str, array[Any]]:
+        return {
+            "hourly_dt": self.hourly_dt,
+            "hourly_clouds": self.hourly_clouds,
+            "hourly_humidity": self.hourly_humidity,
+            "hourly_visibility": self.hourly_visibility,
+            "hourly_wind_speed": self.hourly_wind_speed,
+            "daily_dt": self.daily_dt,
+            "daily_sunrise": self.daily_sunrise,
+            "daily_sunset": self.daily_sunset,
+            "daily_moonrise": self.daily_moonrise,
+            "daily_moonset": self.daily_moonset,
+            "daily_moon_phase": self.daily_moon_phase,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "dt": self.dt,
+            "sunrise": self.sunrise,
+            "sunset": self.sunset,
+        }
+        data.update({name: series.tolist() for name, series in self._series().items()})
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CompactForecast":
+        """Rebuild a forecast, filling series that older snapshots did not store."""
+        forecast = cls(dt=data["dt"], sunrise=data["sunrise"], sunset=data["sunset"])
+        hours, days = len(data["hourly_clouds"]), len(data["daily_dt"])
+        defaults: dict[str, list[Any]] = {
+            "hourly_humidity": [0] * hours,
+            "hourly_visibility": [MAX_VISIBILITY_METERS] * hours,
+            "hourly_wind_speed": [0.0] * hours,
+            "daily_sunrise": [0] * days,
+            "daily_sunset": [0] * days,
+        }
+        for name, series in forecast._series().items():
+            series.extend(data[name] if name in data else defaults[name])
+        return forecast
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactForecast):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactForecast(dt={self.dt}, hours={len(self.hourly_clouds)}, "
+            f"days={len(self.daily_dt)})"
+        )
+
+
+def dumps_forecast(forecast: CompactForecast) -> str:
+    return json.dumps(forecast.to_dict(), separators=(",", ":"))
+
+
+def loads_forecast(data: str) -> CompactForecast:
+    return CompactForecast.from_dict(json.loads(data))
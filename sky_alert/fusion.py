@@ -0,0 +1,134 @@
+"""Consensus cloud cover from several forecast sources queried concurrently.
+
+Each source is an AsyncOpenweatherService over its own WeatherProvider, so it keeps
+its own cache, single-flight fetches and stale grace. A fused read waits for the
+sources up to a deadline and merges whatever has arrived; a source that misses it
+contributes its expired forecast if it still has one, and is left out otherwise.
+Its fetch is not cancelled, so it lands in that source's cache for the next read.
+"""
+import asyncio
+import datetime
+import time
+from typing import NamedTuple, Optional, Sequence
+from sky_alert.constants import (
+    FUSION_DEADLINE_SECONDS,
+    FUSION_SOURCE_TIMEOUT_SECONDS,
+    OUTLOOK_MAX_HOURS,
+)
+from sky_alert.forecast import CompactForecast
+from sky_alert.metrics import FUSION_SOURCE_RESULTS
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.protocol import FusedCloudCover, SourceStatus
+
+
+class ForecastSource(NamedTuple):
+    name: str
+    service: AsyncOpenweatherService
+    weight: float = 1.0
+    timeout_seconds: float = FUSION_SOURCE_TIMEOUT_SECONDS
+
+
+class FusionEngine:
+    """Merge the cloud cover of several sources into a weighted consensus."""
+
+    def __init__(
+        self,
+        sources: Sequence[ForecastSource],
+        deadline_seconds: float = FUSION_DEADLINE_SECONDS,
+    ) -> None:
+        if not sources:
+            raise ValueError("at least one source is required")
+        if len({source.name for source in sources}) != len(sources):
+            raise ValueError("source names must be unique")
+        if any(source.weight <= 0 for source in sources):
+            raise ValueError("source weights must be positive")
+        self.sources = list(sources)
+        self.deadline_seconds = deadline_seconds
+
+    async def _forecast(
+        self, source: ForecastSource, lat: str, lon: str
+    ) -> CompactForecast:
+        return await asyncio.wait_for(
+            source.service.update_most_recent_weather(lat=lat, lon=lon),
+            source.timeout_seconds,
+        )
+
+    async def forecasts(
+        self, lat: str, lon: str
+    ) -> list[tuple[SourceStatus, Optional[CompactForecast]]]:
+        """Query every source concurrently and return what each had by the deadline.
+
+        Raises ValueError for an invalid coordinate before any source is queried.
+        """
+        keys = [source.service.cache_key(lat, lon) for source in self.sources]
+        tasks = [
+            asyncio.ensure_future(self._forecast(source, lat, lon))
+            for source in self.sources
+        ]
+        await asyncio.wait(tasks, timeout=self.deadline_seconds)
+
+        results: list[tuple[SourceStatus, Optional[CompactForecast]]] = []
+        for source, key, task in zip(self.sources, keys, tasks):
+            forecast: Optional[CompactForecast] = None
+            if not task.done():
+                # Only this wait is cancelled; the fetch itself carries on
+                task.cancel()
+                status = "timeout"
+            elif task.exception() is not None:
+                status = (
+                    "timeout"
+                    if isinstance(task.exception(), asyncio.TimeoutError)
+                    else "error"
+                )
+            else:
+                forecast, status = task.result(), "ok"
+            if forecast is None:
+                forecast = source.service.most_recent_weather.get_stale(key)
+                if forecast is not None:
+                    status = "stale"
+            FUSION_SOURCE_RESULTS.inc(source=source.name, result=status)
+            results.append(
+                (
+                    SourceStatus(name=source.name, weight=source.weight, status=status),
+                    forecast,
+                )
+            )
+        return results
+
+    async def cloud_cover(
+        self,
+        lat: str,
+        lon: str,
+        hours: int = OUTLOOK_MAX_HOURS,
+        now: Optional[float] = None,
+    ) -> FusedCloudCover:
+        """Weighted mean cloud cover for the next `hours` hours across the sources.
+
+        Sources are aligned on their hour timestamps, and each hour averages only the
+        sources that forecast it. With no source available the series are empty.
+        """
+        results = await self.forecasts(lat, lon)
+        now = time.time() if now is None else now
+
+        totals: dict[int, list[float]] = {}
+        for status, forecast in results:
+            if forecast is None:
+                continue
+            hourly = forecast.hours_from(now, hours)
+            for dt, clouds in zip(hourly.dt.tolist(), hourly.clouds.tolist()):
+                total = totals.setdefault(dt, [0.0, 0.0, 0])
+                total[0] += status.weight * clouds
+                total[1] += status.weight
+                total[2] += 1
+
+        hour_times = sorted(totals)[:hours]
+        return FusedCloudCover(
+            time=[datetime.datetime.utcfromtimestamp(dt) for dt in hour_times],
+            cloud_cover=[round(totals[dt][0] / totals[dt][1], 1) for dt in hour_times],
+            source_count=[int(totals[dt][2]) for dt in hour_times],
+            sources=[status for status, _ in results],
+        )
+
+    async def aclose(self) -> None:
+        for source in self.sources:
+            await source.service.aclose()
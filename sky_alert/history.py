@@ -0,0 +1,277 @@
+"""Append-only archive of every forecast fetched, for forecast-vs-actual analysis.
+
+Each fetched forecast is broken into compact hourly records (cloud cover, humidity,
+visibility, wind) and daily sun and moon records per forecast cell. Only the hours
+`lead_hours` ahead of the hour the forecast was issued, for a few fixed leads, are
+kept: lead 0 is the observed conditions ("actual"), and the others are what was
+forecast that far ahead. That bounds the archive to a handful of rows per cell and
+hour however often forecasts are refreshed.
+
+Records are partitioned by UTC month into one SQLite file each, so a time-range query
+only opens the months it covers, and old months can be archived or deleted as whole
+files.
+"""
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Iterator, NamedTuple, Optional
+from sky_alert.constants import HISTORY_LEAD_HOURS, SQLITE_BUSY_TIMEOUT_MS
+from sky_alert.forecast import CompactForecast
+
+CacheKey = tuple[str, str]
+
+SECONDS_PER_HOUR = 3600
+PARTITION_PREFIX = "history-"
+PARTITION_SUFFIX = ".db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly (
+    cell_lat TEXT NOT NULL,
+    cell_lon TEXT NOT NULL,
+    lead_hours INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    clouds INTEGER NOT NULL,
+    humidity INTEGER NOT NULL,
+    visibility INTEGER NOT NULL,
+    wind_speed REAL NOT NULL,
+    PRIMARY KEY (cell_lat, cell_lon, lead_hours, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily (
+    cell_lat TEXT NOT NULL,
+    cell_lon TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    sunrise INTEGER NOT NULL,
+    sunset INTEGER NOT NULL,
+    moonrise INTEGER NOT NULL,
+    moonset INTEGER NOT NULL,
+    moon_phase REAL NOT NULL,
+    PRIMARY KEY (cell_lat, cell_lon, day)
+) WITHOUT ROWID;
+"""
+
+
+class HourRecord(NamedTuple):
+    hour: int
+    clouds: int
+    humidity: int
+    visibility: int
+    wind_speed: float
+
+
+class DayRecord(NamedTuple):
+    day: int
+    sunrise: int
+    sunset: int
+    moonrise: int
+    moonset: int
+    moon_phase: float
+
+
+class CloudComparison(NamedTuple):
+    hour: int
+    forecast: int
+    actual: int
+
+
+def _month(timestamp: int) -> str:
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime("%Y-%m")
+
+
+def _months(start: int, end: int) -> Iterator[str]:
+    """Yield the partitions covering `[start, end)`, oldest first."""
+    if end <= start:
+        return
+    first = datetime.datetime.utcfromtimestamp(start)
+    last = _month(end - 1)
+    year, month = first.year, first.month
+    while (name := f"{year:04d}-{month:02d}") <= last:
+        yield name
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class ForecastArchive:
+    """Monthly SQLite partitions of hourly and daily forecast records.
+
+    Records are keyed by cell, lead and hour, and the first record for a key wins,
+    so the archive only ever grows. Connection handling mirrors SqliteWeatherCache:
+    WAL mode, one connection per partition and thread.
+    """
+
+    def __init__(
+        self, directory: str, lead_hours: tuple[int, ...] = HISTORY_LEAD_HOURS
+    ) -> None:
+        if 0 not in lead_hours:
+            raise ValueError("lead_hours must include 0, the observed conditions")
+        self.directory = directory
+        self.lead_hours = lead_hours
+        self._local = threading.local()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, month: str) -> str:
+        return os.path.join(
+            self.directory, f"{PARTITION_PREFIX}{month}{PARTITION_SUFFIX}"
+        )
+
+    def _connection(
+        self, month: str, create: bool = False
+    ) -> Optional[sqlite3.Connection]:
+        """Return this thread's connection to a partition.
+
+        Reads pass `create=False` and get None for months that were never written,
+        rather than creating empty files.
+        """
+        connections: dict[str, sqlite3.Connection] = (
+            getattr(self._local, "connections", None) or {}
+        )
+        self._local.connections = connections
+        connection = connections.get(month)
+        if connection is None:
+            path = self._path(month)
+            if not create and not os.path.exists(path):
+                return None
+            connection = sqlite3.connect(
+                path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            connections[month] = connection
+        return connection
+
+    def record(self, key: CacheKey, forecast: CompactForecast) -> int:
+        """Archive a fetched forecast and return how many new hourly rows it added."""
+        if forecast.dt is None:
+            return 0
+        issued = forecast.dt - forecast.dt % SECONDS_PER_HOUR
+        wanted = set(self.lead_hours)
+
+        hourly: dict[str, list[tuple[object, ...]]] = {}
+        for i, hour in enumerate(forecast.hourly_dt):
+            lead, offset = divmod(hour - issued, SECONDS_PER_HOUR)
+            if offset or lead not in wanted:
+                continue
+            hourly.setdefault(_month(hour), []).append(
+                (
+                    key[0],
+                    key[1],
+                    lead,
+                    hour,
+                    forecast.hourly_clouds[i],
+                    forecast.hourly_humidity[i],
+                    forecast.hourly_visibility[i],
+                    forecast.hourly_wind_speed[i],
+                )
+            )
+        daily: dict[str, list[tuple[object, ...]]] = {}
+        for i, day in enumerate(forecast.daily_dt):
+            daily.setdefault(_month(day), []).append(
+                (
+                    key[0],
+                    key[1],
+                    day,
+                    forecast.daily_sunrise[i],
+                    forecast.daily_sunset[i],
+                    forecast.daily_moonrise[i],
+                    forecast.daily_moonset[i],
+                    forecast.daily_moon_phase[i],
+                )
+            )
+
+        added = 0
+        for month in sorted(hourly.keys() | daily.keys()):
+            connection = self._connection(month, create=True)
+            assert connection is not None
+            connection.execute("BEGIN")
+            try:
+                before = connection.total_changes
+                connection.executemany(
+                    "INSERT OR IGNORE INTO hourly VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    hourly.get(month, []),
+                )
+                added += connection.total_changes - before
+                connection.executemany(
+                    "INSERT OR IGNORE INTO daily VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    daily.get(month, []),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return added
+
+    def hourly(
+        self, key: CacheKey, start: int, end: int, lead_hours: int = 0
+    ) -> list[HourRecord]:
+        """Return the records for hours in `[start, end)` at a lead, oldest first.
+
+        With the default lead of 0 these are the observed conditions.
+        """
+        records: list[HourRecord] = []
+        for month in _months(start, end):
+            connection = self._connection(month)
+            if connection is None:
+                continue
+            rows = connection.execute(
+                "SELECT hour, clouds, humidity, visibility, wind_speed FROM hourly "
+                "WHERE cell_lat = ? AND cell_lon = ? AND lead_hours = ? "
+                "AND hour >= ? AND hour < ? ORDER BY hour",
+                (key[0], key[1], lead_hours, start, end),
+            )
+            records.extend(HourRecord._make(row) for row in rows)
+        return records
+
+    def daily(self, key: CacheKey, start: int, end: int) -> list[DayRecord]:
+        """Return the sun and moon records for days starting in `[start, end)`."""
+        records: list[DayRecord] = []
+        for month in _months(start, end):
+            connection = self._connection(month)
+            if connection is None:
+                continue
+            rows = connection.execute(
+                "SELECT day, sunrise, sunset, moonrise, moonset, moon_phase FROM daily "
+                "WHERE cell_lat = ? AND cell_lon = ? AND day >= ? AND day < ? "
+                "ORDER BY day",
+                (key[0], key[1], start, end),
+            )
+            records.extend(DayRecord._make(row) for row in rows)
+        return records
+
+    def compare_clouds(
+        self, key: CacheKey, start: int, end: int, lead_hours: int
+    ) -> list[CloudComparison]:
+        """Pair the cloud cover forecast `lead_hours` ahead with what was observed.
+
+        Only hours with both a forecast and an observation are returned.
+        """
+        comparisons: list[CloudComparison] = []
+        for month in _months(start, end):
+            connection = self._connection(month)
+            if connection is None:
+                continue
+            rows = connection.execute(
+                "SELECT f.hour, f.clouds, a.clouds FROM hourly AS f "
+                "JOIN hourly AS a ON a.cell_lat = f.cell_lat "
+                "AND a.cell_lon = f.cell_lon AND a.lead_hours = 0 AND a.hour = f.hour "
+                "WHERE f.cell_lat = ? AND f.cell_lon = ? AND f.lead_hours = ? "
+                "AND f.hour >= ? AND f.hour < ? ORDER BY f.hour",
+                (key[0], key[1], lead_hours, start, end),
+            )
+            comparisons.extend(CloudComparison._make(row) for row in rows)
+        return comparisons
+
+    def partitions(self) -> list[str]:
+        """Return the months with a partition on disk, oldest first."""
+        return sorted(
+            name[len(PARTITION_PREFIX) : -len(PARTITION_SUFFIX)]
+            for name in os.listdir(self.directory)
+            if name.startswith(PARTITION_PREFIX) and name.endswith(PARTITION_SUFFIX)
+        )
+
+    def close(self) -> None:
+        connections: dict[str, sqlite3.Connection] = (
+            getattr(self._local, "connections", None) or {}
+        )
+        for connection in connections.values():
+            connection.close()
+        self._local.connections = {}
@@ -0,0 +1,413 @@
+"""Minimal Prometheus-style metrics with text exposition.
+
+Metrics are registered in a Registry and rendered in the Prometheus text format by
+`Registry.render`, which the `/metrics` endpoint serves.
+"""
+from abc import ABC, abstractmethod
+import bisect
+import functools
+import threading
+import time
+from sky_alert.protocol import CacheStats
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"{self.name} expects labels {self.label_names}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> list[tuple[str, str, float]]:
+        """Return `(suffix, formatted labels, value)` for every sample."""
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Counter that is either incremented directly or read from `function` at render time."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+        self.function = function
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        if self.function is not None:
+            return self.function()
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        if self.function is not None:
+            return [("", "", self.function())]
+        with self._lock:
+            return [
+                ("", _format_labels(self.label_names, key), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(_Metric):
+    """Gauge that is either set directly or read from `function` at render time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+        self.function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        if self.function is not None:
+            return self.function()
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        self.inc(1.0, **labels)
+        try:
+            yield
+        finally:
+            self.dec(1.0, **labels)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        if self.function is not None:
+            return [("", "", self.function())]
+        with self._lock:
+            return [
+                ("", _format_labels(self.label_names, key), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            return sum(self._counts.get(self._label_values(labels), []))
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels: str) -> Callable[[F], F]:
+        """Decorate a function so that each call is observed."""
+
+        def decorator(fn: F) -> F:
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        samples = []
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                for bound, count in zip(
+                    self.buckets + (float("inf"),), self._counts[key]
+                ):
+                    cumulative += count
+                    labels = _format_labels(
+                        self.label_names + ("le",), key + (_format_value(bound),)
+                    )
+                    samples.append(("_bucket", labels, float(cumulative)))
+                labels = _format_labels(self.label_names, key)
+                samples.append(("_sum", labels, self._sums[key]))
+                samples.append(("_count", labels, float(cumulative)))
+        return samples
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        function: Optional[Callable[[], float]] = None,
+    ) -> Counter:
+        metric = Counter(name, documentation, labels, function=function)
+        self.register(metric)
+        return metric
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        function: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        metric = Gauge(name, documentation, labels, function=function)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labels, buckets=buckets)
+        self.register(metric)
+        return metric
+
+    def unregister(self, name: str) -> None:
+        self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+def register_cache_metrics(
+    stats: Callable[[], CacheStats],
+    registry: "Registry",
+    prefix: str = "sky_alert_cache",
+) -> None:
+    """Expose a forecast cache's counters, size and hit ratio, read at render time."""
+    for field in ("hits", "misses", "evictions", "expirations"):
+        registry.counter(
+            f"{prefix}_{field}_total",
+            f"Forecast cache {field}.",
+            function=_stat_reader(stats, field),
+        )
+    registry.gauge(
+        f"{prefix}_entries",
+        "Forecasts currently cached.",
+        function=lambda: float(stats().entries),
+    )
+    registry.gauge(
+        f"{prefix}_size_bytes",
+        "Approximate memory held by cached forecasts.",
+        function=lambda: float(stats().size_bytes),
+    )
+    registry.gauge(
+        f"{prefix}_hit_ratio",
+        "Fraction of cache lookups that were hits.",
+        function=lambda: _hit_ratio(stats()),
+    )
+
+
+def _stat_reader(stats: Callable[[], CacheStats], field: str) -> Callable[[], float]:
+    return lambda: float(getattr(stats(), field))
+
+
+def _hit_ratio(stats: CacheStats) -> float:
+    lookups = stats.hits + stats.misses
+    return stats.hits / lookups if lookups else 0.0
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "sky_alert_stage_seconds",
+    "Time spent in each stage of the weather pipeline.",
+    labels=("stage",),
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "sky_alert_upstream_responses_total",
+    "Upstream weather provider responses by HTTP status code.",
+    labels=("status_code",),
+)
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "sky_alert_upstream_in_flight",
+    "Upstream weather provider calls currently in flight.",
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "sky_alert_http_request_seconds",
+    "Latency of HTTP requests served by SkyAlert, by route and status code.",
+    labels=("route", "status_code"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "sky_alert_http_requests_in_flight",
+    "HTTP requests currently being served.",
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "sky_alert_upstream_retries_total",
+    "Upstream weather provider calls retried after a failure.",
+)
+UPSTREAM_SHORT_CIRCUITED = REGISTRY.counter(
+    "sky_alert_upstream_short_circuited_total",
+    "Upstream calls answered locally by the rate limiter or open circuit.",
+    labels=("reason",),
+)
+STALE_SERVED = REGISTRY.counter(
+    "sky_alert_stale_served_total",
+    "Expired forecasts served because the upstream fetch failed.",
+)
+ALERTS_SENT = REGISTRY.counter(
+    "sky_alert_alerts_sent_total",
+    "Stargazing alerts delivered, by notification channel.",
+    labels=("channel",),
+)
+ALERT_DELIVERY_FAILURES = REGISTRY.counter(
+    "sky_alert_alert_delivery_failures_total",
+    "Stargazing alerts that could not be delivered, by notification channel.",
+    labels=("channel",),
+)
+ENCODED_RESPONSES = REGISTRY.counter(
+    "sky_alert_encoded_responses_total",
+    "Forecast response bodies served from the encoded cache (hit) or encoded (miss).",
+    labels=("result",),
+)
+STARTUP_SECONDS = REGISTRY.gauge(
+    "sky_alert_startup_seconds",
+    "Time spent in each startup phase of the app lifespan.",
+    labels=("phase",),
+)
+FUSION_SOURCE_RESULTS = REGISTRY.counter(
+    "sky_alert_fusion_source_results_total",
+    "Forecast sources by how they contributed to a fused forecast.",
+    labels=("source", "result"),
+)
+FORECAST_CHANGES = REGISTRY.counter(
+    "sky_alert_forecast_changes_total",
+    "Changes detected between consecutive forecasts of a cell.",
+    labels=("kind",),
+)
+CHANGE_EVENTS_DROPPED = REGISTRY.counter(
+    "sky_alert_change_events_dropped_total",
+    "Changes dropped because a stream subscriber's queue was full.",
+)
+PUSH_CONNECTIONS = REGISTRY.gauge(
+    "sky_alert_push_connections",
+    "Open server-sent event streams of sky condition updates.",
+)
+PUSH_EVENTS = REGISTRY.counter(
+    "sky_alert_push_events_total",
+    "Sky condition events sent to streaming clients.",
+)
@@ -0,0 +1,206 @@
+"""Notifier backends that deliver alerts, plus a local SMTP sink for testing.
+
+Run the sink and point SmtpNotifier at it to see alert emails without a mail server:
+
+    python -m sky_alert.notifiers --port 8025 --output mail.jsonl
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import smtplib
+import sys
+import threading
+from email.message import EmailMessage
+from typing import Optional, Protocol, Sequence, TextIO, TypedDict
+from sky_alert.protocol import Alert
+
+
+class Notifier(Protocol):
+    async def send(self, alerts: Sequence[Alert]) -> int:
+        """Deliver alerts and return how many were delivered."""
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+def format_alert(alert: Alert) -> tuple[str, str]:
+    """Return the subject and plain-text body of an alert message."""
+    window = alert.window
+    subject = (
+        f"Clear skies at {alert.lat}, {alert.lon}: "
+        f"{window.hours}h from {window.start:%a %H:%M} UTC"
+    )
+    body = (
+        f"A {window.hours} hour stargazing window is forecast at {alert.lat}, "
+        f"{alert.lon}.\n\n"
+        f"Starts: {window.start:%Y-%m-%d %H:%M} UTC\n"
+        f"Ends:   {window.end:%Y-%m-%d %H:%M} UTC\n"
+        f"Score:  {window.score:.2f}\n"
+    )
+    return subject, body
+
+
+class FileNotifier:
+    """Append alerts as JSON lines to a file, e.g. for a downstream push service."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    async def send(self, alerts: Sequence[Alert]) -> int:
+        if alerts:
+            await asyncio.to_thread(self._write, alerts)
+        return len(alerts)
+
+    def _write(self, alerts: Sequence[Alert]) -> None:
+        lines = "".join(alert.model_dump_json() + "\n" for alert in alerts)
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class SmtpNotifier:
+    """Email alerts over SMTP, one connection per batch.
+
+    smtplib is blocking, so batches are sent from a worker thread. Messages that the
+    server refuses are not counted as delivered.
+    """
+
+    def __init__(
+        self, host: str, port: int, sender: str, timeout_seconds: float = 10.0
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout_seconds = timeout_seconds
+
+    async def send(self, alerts: Sequence[Alert]) -> int:
+        if not alerts:
+            return 0
+        return await asyncio.to_thread(self._send, alerts)
+
+    def _send(self, alerts: Sequence[Alert]) -> int:
+        delivered = 0
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout_seconds) as smtp:
+            for alert in alerts:
+                subject, body = format_alert(alert)
+                message = EmailMessage()
+                message["From"] = self.sender
+                message["To"] = alert.contact
+                message["Subject"] = subject
+                message.set_content(body)
+                try:
+                    smtp.send_message(message)
+                    delivered += 1
+                except smtplib.SMTPRecipientsRefused:
+                    continue
+        return delivered
+
+    async def aclose(self) -> None:
+        pass
+
+
+# "from" is a keyword, so the fields are declared with the functional syntax
+SinkMessage = TypedDict("SinkMessage", {"from": str, "to": list[str], "data": str})
+
+
+class SmtpSink:
+    """Minimal SMTP server that accepts every message and keeps it.
+
+    Speaks just enough of RFC 5321 for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET,
+    NOOP, QUIT). Messages are written to `output` as JSON lines if it is given, and
+    kept in `messages` otherwise.
+    """
+
+    def __init__(self, output: Optional[TextIO] = None) -> None:
+        self.output = output
+        self.messages: list[SinkMessage] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening and return the bound port."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return int(self._server.sockets[0].getsockname()[1])
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        sender = ""
+        recipients: list[str] = []
+        await reply("220 sky-alert SMTP sink")
+        try:
+            while line := (await reader.readline()).decode("utf-8", "replace"):
+                command = line[:4].upper()
+                if command in ("EHLO", "HELO"):
+                    await reply("250 sky-alert")
+                elif command == "MAIL":
+                    sender, recipients = line.split(":", 1)[1].strip(), []
+                    await reply("250 OK")
+                elif command == "RCPT":
+                    recipients.append(line.split(":", 1)[1].strip())
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    self._keep(sender, recipients, await self._read_data(reader))
+                    await reply("250 OK")
+                elif command == "RSET":
+                    sender, recipients = "", []
+                    await reply("250 OK")
+                elif command == "NOOP":
+                    await reply("250 OK")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+    async def _read_data(self, reader: asyncio.StreamReader) -> str:
+        lines = []
+        while (line := await reader.readline()) not in (b".\r\n", b".\n", b""):
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines).decode("utf-8", "replace")
+
+    def _keep(self, sender: str, recipients: list[str], data: str) -> None:
+        message: SinkMessage = {"from": sender, "to": recipients, "data": data}
+        if self.output is None:
+            self.messages.append(message)
+        else:
+            self.output.write(json.dumps(message) + "\n")
+            self.output.flush()
+
+
+async def _serve(port: int, output: Optional[str]) -> None:
+    with open(output, "a") if output else contextlib.nullcontext(sys.stdout) as f:
+        sink = SmtpSink(output=f)
+        bound = await sink.start(port=port)
+        print(f"SMTP sink listening on 127.0.0.1:{bound}", file=sys.stderr)
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local SMTP sink for alert testing")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--output", help="append messages here instead of stdout")
+    args = parser.parse_args()
+    asyncio.run(_serve(args.port, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,134 +1,634 @@
-import os
-import requests
+import asyncio
+import threading
+from collections import Counter
 import datetime
-from typing import Any
-from sky_alert.protocol import SunData, MoonData, CloudData, OpenweatherResponse
-from sky_alert.constants import HOURS_IN_DAY
-
-from dotenv import load_dotenv
-
-load_dotenv()
+import time
+from typing import Any, AsyncIterator, Iterable, Optional
+from sky_alert.protocol import (
+    SunData,
+    MoonData,
+    CloudData,
+    SkyConditions,
+    SkyConditionsResult,
+    EphemerisDay,
+    HourlyOutlook,
+    Outlook,
+    StargazingScore,
+    ObservingWindow,
+    OpenweatherResponse,
+)
+from sky_alert.constants import (
+    HOURS_IN_DAY,
+    BATCH_CONCURRENCY,
+    OUTLOOK_MAX_DAYS,
+    OUTLOOK_MAX_HOURS,
+)
+from sky_alert.config import ConfigError, Settings
+from sky_alert.weather_cache import WeatherCache
+from sky_alert.forecast import CompactForecast, DailySlice
+from sky_alert.sqlite_cache import SqliteWeatherCache
+from sky_alert.history import ForecastArchive
+from sky_alert.changes import ChangeDetector
+from sky_alert.responses import EncodedResponseCache, View
+from sky_alert.quantizer import CoordinateQuantizer
+from sky_alert.scoring import score_forecasts
+from sky_alert.metrics import (
+    STAGE_SECONDS,
+    STALE_SERVED,
+    UPSTREAM_IN_FLIGHT,
+    UPSTREAM_RESPONSES,
+)
+from sky_alert.snapshots import SnapshotRecord, load_snapshot
+from sky_alert.singleflight import SingleFlight, AsyncSingleFlight
+from sky_alert.providers import (
+    OPENWEATHER_HEADERS,
+    OpenweatherProvider,
+    WeatherProvider,
+)
+
+
+class BaseOpenweatherService:
+    """Cache, keying and parsing shared by the sync and async OpenWeather services."""
+
+    def __init__(
+        self,
+        cache: Optional[WeatherCache] = None,
+        quantizer: Optional[CoordinateQuantizer] = None,
+        persistent_cache: Optional[SqliteWeatherCache] = None,
+        archive: Optional[ForecastArchive] = None,
+        changes: Optional[ChangeDetector] = None,
+    ) -> None:
+        self.most_recent_weather = cache if cache is not None else WeatherCache()
+        self.quantizer = quantizer
+        self.persistent_cache = persistent_cache
+        self.archive = archive
+        self.changes = changes
+        self.encoded_responses = EncodedResponseCache()
+        self._access_lock = threading.Lock()
+        self._access_counts: Counter[tuple[str, str]] = Counter()
+
+    def cache_key(self, lat: str, lon: str) -> tuple[str, str]:
+        """Map the requested coordinate to its cache key (the quantized cell, if any)."""
+        if self.quantizer is None:
+            return (lat, lon)
+        return self.quantizer.cell(lat, lon)
+
+    def _handle_response(
+        self, lat: str, lon: str, status_code: int, json_data: Any
+    ) -> OpenweatherResponse:
+        """Cache a successful payload and translate the status code into a response.
+
+        Payloads are projected into a CompactForecast before they are cached.
+        """
+        UPSTREAM_RESPONSES.inc(status_code=str(status_code))
+
+        if 200 <= status_code <= 299:
+            with STAGE_SECONDS.time(stage="ingest"):
+                forecast = CompactForecast.from_json(json_data)
+            expires_at = self.most_recent_weather.expiry_for(forecast.dt)
+            previous = (
+                self.most_recent_weather.get_stale((lat, lon))
+                if self.changes is not None
+                else None
+            )
+            self.most_recent_weather.set((lat, lon), forecast, expires_at=expires_at)
+            if self.persistent_cache is not None:
+                self.persistent_cache.set((lat, lon), forecast, expires_at=expires_at)
+            if self.archive is not None:
+                with STAGE_SECONDS.time(stage="archive"):
+                    self.archive.record((lat, lon), forecast)
+            if self.changes is not None:
+                self.changes.observe((lat, lon), previous, forecast)
+            return OpenweatherResponse(status_code=status_code, message="Success...")
+
+        elif status_code == 401:
+            return OpenweatherResponse(
+                status_code=status_code, message="Error: Unauthorized"
+            )
 
+        elif status_code == 404:
+            return OpenweatherResponse(
+                status_code=status_code, message="Error: Resource not found"
+            )
 
-class OpenweatherService:
-    def __init__(self) -> None:
-        self.most_recent_weather: dict[tuple[str, str], Any] = {}
+        else:
+            return OpenweatherResponse(
+                status_code=status_code, message="Error: Internal server error"
+            )
 
-    def populate_for_coord(self, lat: str, lon: str) -> OpenweatherResponse:
-        headers = {
-            "Content-Type": "application/json",
-        }
+    def _cached_weather(
+        self, lat: str, lon: str
+    ) -> tuple[tuple[str, str], Optional[CompactForecast]]:
+        """Return the cache key for the coordinate and its cached forecast, if any."""
+        with STAGE_SECONDS.time(stage="cache_lookup"):
+            key = self.cache_key(lat, lon)
+            forecast = self._lookup(key)
+
+        with self._access_lock:
+            self._access_counts[key] += 1
+
+        if self.quantizer is not None:
+            self.quantizer.record_lookup(
+                key,
+                (lat, lon),
+                hit=forecast is not None,
+                max_entries=self.most_recent_weather.max_entries,
+            )
 
-        params: dict[str, str] = {
+        return key, forecast
+
+    def cached_forecast(self, lat: str, lon: str) -> Optional[CompactForecast]:
+        """Return the cached forecast for the coordinate's cell without fetching."""
+        return self._cached_weather(lat=lat, lon=lon)[1]
+
+    def _lookup(self, key: tuple[str, str]) -> Optional[CompactForecast]:
+        """Return the cached forecast from memory, falling back to the persistent cache."""
+        forecast = self.most_recent_weather.get(key)
+        if forecast is None:
+            forecast = self._load_persisted(key)
+        return forecast
+
+    def _load_persisted(self, key: tuple[str, str]) -> Optional[CompactForecast]:
+        """Promote an entry written by another worker (or a previous run) into memory."""
+        if self.persistent_cache is None:
+            return None
+        record = self.persistent_cache.get(key)
+        if record is None:
+            return None
+        forecast: CompactForecast = record[0]
+        self.most_recent_weather.set(key, forecast, expires_at=record[1])
+        return forecast
+
+    def warm_start(self, limit: Optional[int] = None) -> int:
+        """Load unexpired entries from the persistent cache into memory.
+
+        Loads as many entries as the memory cache holds unless `limit` is given, and
+        returns the number of entries loaded.
+        """
+        if self.persistent_cache is None:
+            return 0
+        if limit is None:
+            limit = self.most_recent_weather.max_entries
+        loaded = 0
+        for key, forecast, expires_at in self.persistent_cache.load_unexpired(limit):
+            self.most_recent_weather.set(key, forecast, expires_at=expires_at)
+            loaded += 1
+        return loaded
+
+    def snapshot_records(
+        self, keys: Optional[Iterable[tuple[str, str]]] = None
+    ) -> list[SnapshotRecord]:
+        """Return the unexpired cached forecasts, or only those for `keys`."""
+        wanted = None if keys is None else set(keys)
+        return [
+            SnapshotRecord(key, forecast, expires_at)
+            for key, forecast, expires_at in self.most_recent_weather.items()
+            if wanted is None or key in wanted
+        ]
+
+    def restore_snapshot(self, path: str) -> int:
+        """Load the unexpired forecasts of a snapshot into memory.
+
+        Returns the number of entries loaded.
+        """
+        now = time.time()
+        loaded = 0
+        for key, forecast, expires_at in load_snapshot(path):
+            if expires_at > now:
+                self.most_recent_weather.set(key, forecast, expires_at=expires_at)
+                loaded += 1
+        return loaded
+
+    def hot_keys(self, min_accesses: int) -> list[tuple[str, str]]:
+        """Return keys read at least `min_accesses` times, then halve every count.
+
+        Halving on each call keeps the counts an exponentially decaying frequency, so
+        coordinates nobody asks about anymore drop out of the table.
+        """
+        with self._access_lock:
+            hot = [
+                key
+                for key, count in self._access_counts.items()
+                if count >= min_accesses
+            ]
+            self._access_counts = Counter(
+                {
+                    key: count // 2
+                    for key, count in self._access_counts.items()
+                    if count // 2 > 0
+                }
+            )
+        return hot
+
+    def _serve_stale(self, key: tuple[str, str], error: Exception) -> CompactForecast:
+        """Fall back to an expired copy of the forecast when fetching it failed."""
+        forecast: Optional[CompactForecast] = self.most_recent_weather.get_stale(key)
+        if forecast is None:
+            raise error
+        STALE_SERVED.inc()
+        return forecast
+
+    def _read_back(
+        self, key: tuple[str, str], res: OpenweatherResponse
+    ) -> CompactForecast:
+        if not (200 <= res.status_code <= 299):
+            raise Exception(f"Error: {res.status_code}, {res.message}")
+
+        forecast: CompactForecast = self.most_recent_weather[key]
+        return forecast
+
+
+class OpenweatherService(BaseOpenweatherService):
+    def __init__(
+        self,
+        cache: Optional[WeatherCache] = None,
+        quantizer: Optional[CoordinateQuantizer] = None,
+        persistent_cache: Optional[SqliteWeatherCache] = None,
+        archive: Optional[ForecastArchive] = None,
+        settings: Optional[Settings] = None,
+    ) -> None:
+        super().__init__(
+            cache=cache,
+            quantizer=quantizer,
+            persistent_cache=persistent_cache,
+            archive=archive,
+        )
+        # Read once, from the environment unless given
+        self.settings = settings if settings is not None else Settings.from_env()
+        self._flight: SingleFlight[tuple[str, str], CompactForecast] = SingleFlight()
+
+    def _request_params(self, lat: str, lon: str) -> dict[str, str]:
+        if self.settings.openweather_api_key is None:
+            raise ConfigError("Missing required settings: OPENWEATHER_API_KEY")
+        return {
             "lat": lat,
             "lon": lon,
-            "appid": os.environ["OPENWEATHER_API_KEY"],
+            "appid": self.settings.openweather_api_key,
         }
 
-        api_url = os.environ["OPENWEATHER_API_URL"]
-
-        res = requests.get(api_url, params=params, headers=headers)
+    def populate_for_coord(self, lat: str, lon: str) -> OpenweatherResponse:
+        # Only the sync service uses requests, so don't pay for importing it otherwise
+        import requests
 
-        if 200 <= res.status_code <= 299:
-            json_data = res.json()
-            self.most_recent_weather[(lat, lon)] = json_data
-            return OpenweatherResponse(
-                status_code=res.status_code, message="Success..."
-            )
+        params = self._request_params(lat=lat, lon=lon)
 
-        elif res.status_code == 401:
-            return OpenweatherResponse(
-                status_code=res.status_code, message="Error: Unauthorized"
-            )
+        api_url = self.settings.openweather_api_url
+        if api_url is None:
+            raise ConfigError("Missing required settings: OPENWEATHER_API_URL")
 
-        elif res.status_code == 404:
-            return OpenweatherResponse(
-                status_code=res.status_code, message="Error: Resource not found"
-            )
+        with UPSTREAM_IN_FLIGHT.track_in_progress(), STAGE_SECONDS.time(
+            stage="upstream_fetch"
+        ):
+            res = requests.get(api_url, params=params, headers=OPENWEATHER_HEADERS)
 
-        else:
-            return OpenweatherResponse(
-                status_code=res.status_code, message="Error: Internal server error"
-            )
+        json_data = res.json() if 200 <= res.status_code <= 299 else None
+        return self._handle_response(lat, lon, res.status_code, json_data)
 
     def get_sun_data(self, lat: str, lon: str) -> SunData:
-        sunrise, sunset = None, None
+        return parse_sun_data(self.update_most_recent_weather(lat=lat, lon=lon))
 
-        self.update_most_recent_weather(lat=lat, lon=lon)
+    def get_moon_data(self, lat: str, lon: str) -> MoonData:
+        return parse_moon_data(self.update_most_recent_weather(lat=lat, lon=lon))
 
-        json_data = self.most_recent_weather[(lat, lon)]
+    def get_cloud_data(self, lat: str, lon: str) -> CloudData:
+        """Get the following 24 hours of cloud data (current hour inclusive)."""
+        return parse_cloud_data(self.update_most_recent_weather(lat=lat, lon=lon))
+
+    def get_sky_conditions(self, lat: str, lon: str) -> SkyConditions:
+        """Get sun, moon and cloud data from a single cache lookup."""
+        return parse_sky_conditions(self.update_most_recent_weather(lat=lat, lon=lon))
+
+    def get_stargazing_score(self, lat: str, lon: str) -> StargazingScore:
+        """Score the forecast hours for stargazing and find the best window."""
+        return parse_stargazing_score(self.update_most_recent_weather(lat=lat, lon=lon))
+
+    def get_outlook(
+        self,
+        lat: str,
+        lon: str,
+        hours: int = OUTLOOK_MAX_HOURS,
+        first_day: int = 0,
+        days: int = OUTLOOK_MAX_DAYS,
+    ) -> Outlook:
+        """Get the next `hours` hours and the days `first_day` onwards in one lookup."""
+        return parse_outlook(
+            self.update_most_recent_weather(lat=lat, lon=lon), hours, first_day, days
+        )
 
-        # Check for key existence at different levels
-        if "current" in json_data and isinstance(json_data["current"], dict):
-            current_data = json_data["current"]
-            sunrise = current_data.get("sunrise")
-            sunset = current_data.get("sunset")
+    def update_most_recent_weather(self, lat: str, lon: str) -> CompactForecast:
+        """Return the cached forecast for the coordinate, fetching it if missing or expired."""
+        key, forecast = self._cached_weather(lat=lat, lon=lon)
+
+        if forecast is None:
+            forecast = self._flight.do(key, lambda: self._fetch(key))
+
+        return forecast
+
+    def _fetch(self, key: tuple[str, str]) -> CompactForecast:
+        # A flight that finished just before ours began may already have filled the cache
+        forecast = self.most_recent_weather.peek(key)
+        if forecast is None:
+            forecast = self._load_persisted(key)
+        if forecast is None:
+            try:
+                res = self.populate_for_coord(lat=key[0], lon=key[1])
+                forecast = self._read_back(key, res)
+            except Exception as e:
+                forecast = self._serve_stale(key, e)
+        return forecast
+
+
+class AsyncOpenweatherService(BaseOpenweatherService):
+    """Non-blocking variant of OpenweatherService that fetches through a WeatherProvider.
+
+    Defaults to OpenweatherProvider, which keeps a pooled keep-alive connection to
+    OpenWeather; call `aclose` on shutdown to release it. With a `changes` detector,
+    every refreshed forecast is diffed against the one it replaces.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[WeatherCache] = None,
+        quantizer: Optional[CoordinateQuantizer] = None,
+        persistent_cache: Optional[SqliteWeatherCache] = None,
+        provider: Optional[WeatherProvider] = None,
+        archive: Optional[ForecastArchive] = None,
+        changes: Optional[ChangeDetector] = None,
+    ) -> None:
+        super().__init__(
+            cache=cache,
+            quantizer=quantizer,
+            persistent_cache=persistent_cache,
+            archive=archive,
+            changes=changes,
+        )
+        self.provider: WeatherProvider = (
+            provider if provider is not None else OpenweatherProvider()
+        )
+        self._flight: AsyncSingleFlight[
+            tuple[str, str], CompactForecast
+        ] = AsyncSingleFlight()
+        self._refresh_flight: AsyncSingleFlight[
+            tuple[str, str], OpenweatherResponse
+        ] = AsyncSingleFlight()
 
-        # Perform the necessary operations if sunrise and sunset are available
-        if sunrise and sunset:
-            sunrise_datetime = datetime.datetime.utcfromtimestamp(sunrise)
-            sunset_datetime = datetime.datetime.utcfromtimestamp(sunset)
-            return SunData(sunrise=sunrise_datetime, sunset=sunset_datetime)
+    async def aclose(self) -> None:
+        await self.provider.aclose()
+
+    async def populate_for_coord(self, lat: str, lon: str) -> OpenweatherResponse:
+        with UPSTREAM_IN_FLIGHT.track_in_progress(), STAGE_SECONDS.time(
+            stage="upstream_fetch"
+        ):
+            res = await self.provider.fetch(lat=lat, lon=lon)
+
+        return self._handle_response(lat, lon, res.status_code, res.json_data)
+
+    async def get_sun_data(self, lat: str, lon: str) -> SunData:
+        return parse_sun_data(await self.update_most_recent_weather(lat=lat, lon=lon))
+
+    async def get_moon_data(self, lat: str, lon: str) -> MoonData:
+        return parse_moon_data(await self.update_most_recent_weather(lat=lat, lon=lon))
+
+    async def get_cloud_data(self, lat: str, lon: str) -> CloudData:
+        """Get the following 24 hours of cloud data (current hour inclusive)."""
+        return parse_cloud_data(await self.update_most_recent_weather(lat=lat, lon=lon))
 
-        raise KeyError(
-            "Sunrise/sunset data from OpenWeather does not match expected format."
+    async def get_sky_conditions(self, lat: str, lon: str) -> SkyConditions:
+        """Get sun, moon and cloud data from a single cache lookup."""
+        return parse_sky_conditions(
+            await self.update_most_recent_weather(lat=lat, lon=lon)
         )
 
-    def get_moon_data(self, lat: str, lon: str) -> MoonData:
-        moonrise, moonset, moon_phase = None, None, None
-
-        self.update_most_recent_weather(lat=lat, lon=lon)
-
-        json_data = self.most_recent_weather[(lat, lon)]
-
-        # Check for key existence at different levels
-        if "daily" in json_data and isinstance(json_data["daily"], list):
-            current_data = json_data["daily"][0]
-            moonrise = current_data.get("moonrise")
-            moonset = current_data.get("moonset")
-            moon_phase = current_data.get("moon_phase")
-
-        # Perform the necessary operations if moonrise/moonset/mooon phase are available
-        if moonrise and moonset and moon_phase:
-            moonrise_datetime = datetime.datetime.utcfromtimestamp(moonrise)
-            moonset_datetime = datetime.datetime.utcfromtimestamp(moonset)
-            return MoonData(
-                moonrise=moonrise_datetime,
-                moonset=moonset_datetime,
-                moonphase=moon_phase,
-            )
-        raise KeyError(
-            "Moonrise/moonset/moon phase data from OpenWeather does not match expected format."
+    async def get_stargazing_score(self, lat: str, lon: str) -> StargazingScore:
+        """Score the forecast hours for stargazing and find the best window."""
+        return parse_stargazing_score(
+            await self.update_most_recent_weather(lat=lat, lon=lon)
         )
 
-    def get_cloud_data(self, lat: str, lon: str) -> CloudData:
-        """Get the following 24 hours of cloud data (current hour inclusive)."""
+    async def get_outlook(
+        self,
+        lat: str,
+        lon: str,
+        hours: int = OUTLOOK_MAX_HOURS,
+        first_day: int = 0,
+        days: int = OUTLOOK_MAX_DAYS,
+    ) -> Outlook:
+        """Get the next `hours` hours and the days `first_day` onwards in one lookup."""
+        return parse_outlook(
+            await self.update_most_recent_weather(lat=lat, lon=lon),
+            hours,
+            first_day,
+            days,
+        )
+
+    async def get_encoded(self, lat: str, lon: str, view: View) -> bytes:
+        """Get `view` of the coordinate's forecast as JSON bytes.
+
+        The body is encoded once per cached forecast, so repeat reads of a cached
+        entry skip building, validating and serializing the response model.
+        """
+        forecast = await self.update_most_recent_weather(lat=lat, lon=lon)
+        return self.encoded_responses.get(view, self.cache_key(lat, lon), forecast)
+
+    async def update_most_recent_weather(self, lat: str, lon: str) -> CompactForecast:
+        """Return the cached forecast for the coordinate, fetching it if missing or expired."""
+        key, forecast = self._cached_weather(lat=lat, lon=lon)
+
+        if forecast is None:
+            forecast = await self._flight.do(key, lambda: self._fetch(key))
+
+        return forecast
+
+    async def get_sky_conditions_batch(
+        self,
+        coords: Iterable[tuple[str, str]],
+        concurrency: int = BATCH_CONCURRENCY,
+    ) -> AsyncIterator[SkyConditionsResult]:
+        """Yield sky conditions for many coordinates, in order of completion.
+
+        Coordinates sharing a cache key are fetched once, cached keys resolve
+        immediately and misses are fetched at most `concurrency` at a time. Failures
+        are reported per location instead of aborting the batch.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        coords_by_key: dict[tuple[str, str], list[tuple[str, str]]] = {}
+        for lat, lon in coords:
+            try:
+                key = self.cache_key(lat, lon)
+            except ValueError as e:
+                yield SkyConditionsResult(lat=lat, lon=lon, error=str(e))
+                continue
+            coords_by_key.setdefault(key, []).append((lat, lon))
+
+        keys = iter(list(coords_by_key))
+        pending: set[asyncio.Task[tuple[tuple[str, str], Any]]] = set()
+
+        while True:
+            for key in keys:
+                pending.add(asyncio.ensure_future(self._conditions_for_key(key)))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                key, outcome = task.result()
+                for lat, lon in coords_by_key.pop(key):
+                    if isinstance(outcome, SkyConditions):
+                        yield SkyConditionsResult(lat=lat, lon=lon, conditions=outcome)
+                    else:
+                        yield SkyConditionsResult(lat=lat, lon=lon, error=outcome)
+
+    async def _conditions_for_key(
+        self, key: tuple[str, str]
+    ) -> tuple[tuple[str, str], Any]:
+        """Return the key with either its SkyConditions or an error message."""
+        try:
+            forecast = self._lookup(key)
+            if forecast is None:
+                forecast = await self._flight.do(key, lambda: self._fetch(key))
+            return key, parse_sky_conditions(forecast)
+        except Exception as e:
+            return key, f"{type(e).__name__}: {e}"
+
+    async def refresh(self, key: tuple[str, str]) -> OpenweatherResponse:
+        """Re-fetch a cache key even if its entry is still valid."""
+        return await self._refresh_flight.do(
+            key, lambda: self.populate_for_coord(lat=key[0], lon=key[1])
+        )
 
-        cloud_data = []
+    async def _fetch(self, key: tuple[str, str]) -> CompactForecast:
+        # A flight that finished just before ours began may already have filled the cache
+        forecast = self.most_recent_weather.peek(key)
+        if forecast is None:
+            forecast = self._load_persisted(key)
+        if forecast is None:
+            try:
+                res = await self.populate_for_coord(lat=key[0], lon=key[1])
+                forecast = self._read_back(key, res)
+            except Exception as e:
+                forecast = self._serve_stale(key, e)
+        return forecast
+
+
+@STAGE_SECONDS.timed(stage="parse_sun")
+def parse_sun_data(forecast: CompactForecast) -> SunData:
+    # Perform the necessary operations if sunrise and sunset are available
+    if forecast.sunrise and forecast.sunset:
+        sunrise_datetime = datetime.datetime.utcfromtimestamp(forecast.sunrise)
+        sunset_datetime = datetime.datetime.utcfromtimestamp(forecast.sunset)
+        return SunData(sunrise=sunrise_datetime, sunset=sunset_datetime)
+
+    raise KeyError(
+        "Sunrise/sunset data from OpenWeather does not match expected format."
+    )
+
+
+@STAGE_SECONDS.timed(stage="parse_moon")
+def parse_moon_data(forecast: CompactForecast) -> MoonData:
+    moon = _day_moon(forecast.days(0, 1), 0) if forecast.daily_dt else None
+    if moon is not None:
+        return moon
+    raise KeyError(
+        "Moonrise/moonset/moon phase data from OpenWeather does not match expected format."
+    )
+
+
+def _day_sun(days: DailySlice, i: int) -> Optional[SunData]:
+    if days.sunrise[i] and days.sunset[i]:
+        return SunData(
+            sunrise=datetime.datetime.utcfromtimestamp(days.sunrise[i]),
+            sunset=datetime.datetime.utcfromtimestamp(days.sunset[i]),
+        )
+    return None
+
+
+def _day_moon(days: DailySlice, i: int) -> Optional[MoonData]:
+    moonrise, moonset, moon_phase = (
+        days.moonrise[i],
+        days.moonset[i],
+        days.moon_phase[i],
+    )
+
+    # Perform the necessary operations if moonrise/moonset/mooon phase are available
+    if moonrise and moonset and moon_phase:
+        return MoonData(
+            moonrise=datetime.datetime.utcfromtimestamp(moonrise),
+            moonset=datetime.datetime.utcfromtimestamp(moonset),
+            moonphase=moon_phase,
+        )
+    return None
 
-        self.update_most_recent_weather(lat=lat, lon=lon)
 
-        json_data = self.most_recent_weather[(lat, lon)]
+@STAGE_SECONDS.timed(stage="parse_cloud")
+def parse_cloud_data(forecast: CompactForecast) -> CloudData:
+    if len(forecast.hourly_clouds) >= HOURS_IN_DAY:
+        return CloudData(cloud_cover=forecast.hours(0, HOURS_IN_DAY).clouds.tolist())
 
-        # Check for key existence at different levels
-        if "hourly" in json_data and isinstance(json_data["hourly"], list):
-            current_data = json_data["hourly"]
-            for i in range(HOURS_IN_DAY):
-                current_hourly_cloud_data = current_data[i].get("clouds")
+    raise KeyError("Cloud data from OpenWeather does not match expected format.")
 
-                if current_hourly_cloud_data is not None:
-                    cloud_data.append(current_hourly_cloud_data)
-                else:
-                    raise KeyError(
-                        "Cloud data from OpenWeather does not match expected format!"
-                    )
-            return CloudData(cloud_cover=cloud_data)
 
-        raise KeyError("Cloud data from OpenWeather does not match expected format.")
+@STAGE_SECONDS.timed(stage="parse_sky_conditions")
+def parse_sky_conditions(forecast: CompactForecast) -> SkyConditions:
+    return SkyConditions(
+        sun=parse_sun_data(forecast),
+        moon=parse_moon_data(forecast),
+        clouds=parse_cloud_data(forecast),
+    )
 
-    def update_most_recent_weather(self, lat: str, lon: str) -> None:
-        if (lat, lon) not in self.most_recent_weather:
-            res = self.populate_for_coord(lat=lat, lon=lon)
 
-            if not (200 <= res.status_code <= 299):
-                raise Exception(f"Error: {res.status_code}, {res.message}")
+@STAGE_SECONDS.timed(stage="score")
+def parse_stargazing_score(forecast: CompactForecast) -> StargazingScore:
+    hours = len(forecast.hourly_clouds)
+    scores = score_forecasts([forecast], hours=hours)
+    best_window = None
+    if scores.hours[0]:
+        best_window = ObservingWindow(
+            start=datetime.datetime.utcfromtimestamp(int(scores.start[0])),
+            end=datetime.datetime.utcfromtimestamp(int(scores.end[0])),
+            hours=int(scores.hours[0]),
+            score=round(float(scores.score[0]), 3),
+        )
+    return StargazingScore(
+        hourly_quality=[round(q, 3) for q in scores.hourly_quality[0].tolist()],
+        best_window=best_window,
+    )
+
+
+@STAGE_SECONDS.timed(stage="parse_outlook")
+def parse_outlook(
+    forecast: CompactForecast,
+    hours: int,
+    first_day: int,
+    days: int,
+    now: Optional[float] = None,
+) -> Outlook:
+    """Build the next `hours` forecast hours and days `first_day` onwards.
+
+    Both are cut from views of the cached series, so only the requested entries are
+    ever converted. Horizons beyond the forecast return what it has.
+    """
+    hourly = forecast.hours_from(time.time() if now is None else now, hours)
+    daily = forecast.days(first_day, days)
+    return Outlook(
+        hours=HourlyOutlook(
+            time=[datetime.datetime.utcfromtimestamp(dt) for dt in hourly.dt],
+            cloud_cover=hourly.clouds.tolist(),
+            humidity=hourly.humidity.tolist(),
+            visibility=hourly.visibility.tolist(),
+            wind_speed=[round(speed, 2) for speed in hourly.wind_speed.tolist()],
+        ),
+        days=[
+            EphemerisDay(
+                date=datetime.datetime.utcfromtimestamp(dt).date(),
+                sun=_day_sun(daily, i),
+                moon=_day_moon(daily, i),
+            )
+            for i, dt in enumerate(daily.dt)
+        ],
+    )
@@ -1,13 +1,16 @@
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, field_validator
-from typing import Type
+from typing import Optional, Type
+from sky_alert.constants import ALERT_DEFAULT_MIN_HOURS, ALERT_DEFAULT_MIN_SCORE
 
 
 class SunData(BaseModel):
-    """Class for sunrise and sunset times."""
+    """Class for sunrise and sunset times, and astronomical twilight when known."""
 
     sunrise: datetime
     sunset: datetime
+    astronomical_dawn: Optional[datetime] = None
+    astronomical_dusk: Optional[datetime] = None
 
 
 class MoonData(BaseModel):
@@ -35,3 +38,223 @@ class OpenweatherResponse(BaseModel):
         if not (100 <= value <= 599):
             raise ValueError("status_code must be a valid HTTP status code (100-599)")
         return value
+
+
+class CacheStats(BaseModel):
+    """Class for forecast cache counters"""
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    size_bytes: int
+
+
+class QuantizerStats(BaseModel):
+    """Class for coordinate quantizer counters"""
+
+    requests: int
+    remapped: int
+    saved_upstream_calls: int
+
+
+class SkyConditions(BaseModel):
+    """Class for sun, moon and cloud data of one location, derived from one forecast"""
+
+    sun: SunData
+    moon: MoonData
+    clouds: CloudData
+
+
+class Coordinate(BaseModel):
+    """Class for a requested location"""
+
+    lat: str
+    lon: str
+
+
+class SkyConditionsResult(BaseModel):
+    """Class for one location of a batch, holding either its conditions or an error"""
+
+    lat: str
+    lon: str
+    conditions: Optional[SkyConditions] = None
+    error: Optional[str] = None
+
+
+class ObservingWindow(BaseModel):
+    """Class for a contiguous run of good stargazing hours"""
+
+    start: datetime
+    end: datetime
+    hours: int
+    score: float
+
+
+class StargazingScore(BaseModel):
+    """Class for per-hour observing quality (0-1) and the best window within it"""
+
+    hourly_quality: list[float]
+    best_window: Optional[ObservingWindow] = None
+
+
+class EphemerisDay(BaseModel):
+    """Class for one day of sun and moon events, computed locally or forecast.
+
+    `sun` is None during polar day or night, `moon` when the moon does not rise or set
+    within a few days (or when the forecast lacks them).
+    """
+
+    date: date
+    sun: Optional[SunData] = None
+    moon: Optional[MoonData] = None
+
+
+class Subscriber(BaseModel):
+    """Class for someone to alert when the best window at their location is good enough"""
+
+    id: Optional[int] = None
+    lat: str
+    lon: str
+    channel: str
+    contact: str
+    min_score: float = ALERT_DEFAULT_MIN_SCORE
+    min_hours: int = ALERT_DEFAULT_MIN_HOURS
+
+
+class Alert(BaseModel):
+    """Class for a stargazing alert addressed to one subscriber"""
+
+    subscriber_id: int
+    channel: str
+    contact: str
+    lat: str
+    lon: str
+    window: ObservingWindow
+
+
+class AlertRunStats(BaseModel):
+    """Class for the counters of one alert evaluation run"""
+
+    subscribers: int = 0
+    cells: int = 0
+    failed_cells: int = 0
+    alerts: int = 0
+    delivered: int = 0
+    undeliverable: int = 0
+
+
+class DarkSkySite(BaseModel):
+    """Class for a dark-sky site and its distance from the searched coordinate"""
+
+    name: str
+    lat: str
+    lon: str
+    distance_km: float
+
+
+class SiteScore(BaseModel):
+    """Class for a dark-sky site and the best observing window forecast there"""
+
+    site: DarkSkySite
+    best_window: Optional[ObservingWindow] = None
+
+
+class BestSites(BaseModel):
+    """Class for nearby dark-sky sites ranked by their best window.
+
+    `unscored` counts sites in range that were skipped because their forecast was
+    neither cached nor among the cells fetched for this search.
+    """
+
+    sites: list[SiteScore]
+    unscored: int = 0
+
+
+class SnapshotExport(BaseModel):
+    """Class for a snapshot scheduled for writing in the background"""
+
+    path: str
+    entries: int
+
+
+class HistoricalHour(BaseModel):
+    """Class for the archived conditions of one hour at a location"""
+
+    time: datetime
+    clouds: int
+    humidity: int
+    visibility: int
+    wind_speed: float
+
+
+class CloudAccuracy(BaseModel):
+    """Class for how well cloud cover forecast `lead_hours` ahead matched observations.
+
+    The error and bias are in percentage points of cloud cover, and are None when no
+    hour has both a forecast and an observation.
+    """
+
+    lead_hours: int
+    hours: int
+    mean_absolute_error: Optional[float] = None
+    bias: Optional[float] = None
+
+
+class HourlyOutlook(BaseModel):
+    """Class for consecutive forecast hours, with one list entry per hour"""
+
+    time: list[datetime]
+    cloud_cover: list[int]
+    humidity: list[int]
+    visibility: list[int]
+    wind_speed: list[float]
+
+
+class Outlook(BaseModel):
+    """Class for the forecast hours from now and the forecast days requested"""
+
+    hours: HourlyOutlook
+    days: list[EphemerisDay]
+
+
+class SourceStatus(BaseModel):
+    """Class for how one forecast source contributed to a fused forecast.
+
+    `status` is "ok", "stale" (an expired forecast served because the source missed
+    the deadline or failed), "timeout" or "error".
+    """
+
+    name: str
+    weight: float
+    status: str
+
+
+class FusedCloudCover(BaseModel):
+    """Class for the weighted consensus cloud cover of several forecast sources.
+
+    `source_count` holds, per hour, how many sources forecast that hour.
+    """
+
+    time: list[datetime]
+    cloud_cover: list[float]
+    source_count: list[int]
+    sources: list[SourceStatus]
+
+
+class ForecastChange(BaseModel):
+    """Class for a meaningful change between two forecasts of one cell.
+
+    `kind` is "window_opened", "window_changed" or "window_closed", with the new (or,
+    once closed, the old) best window, or "clearing" or "clouding" when cloud cover
+    crosses the threshold for the hours from `start` to `end`. Every refresh that
+    changed the forecast at all is also reported as "updated".
+    """
+
+    lat: str
+    lon: str
+    kind: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    window: Optional[ObservingWindow] = None
@@ -0,0 +1,79 @@
+import os
+import httpx
+from typing import Any, NamedTuple, Optional, Protocol
+from sky_alert.constants import (
+    OPENWEATHER_MAX_CONNECTIONS,
+    OPENWEATHER_MAX_KEEPALIVE_CONNECTIONS,
+    OPENWEATHER_TIMEOUT_SECONDS,
+)
+
+OPENWEATHER_HEADERS = {
+    "Content-Type": "application/json",
+}
+
+
+class ProviderResponse(NamedTuple):
+    """Status code and decoded body (None unless successful) of one upstream call."""
+
+    status_code: int
+    json_data: Any
+
+
+class WeatherProvider(Protocol):
+    """Source of One Call-shaped forecast payloads for a coordinate."""
+
+    async def fetch(self, lat: str, lon: str) -> ProviderResponse:
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+class OpenweatherProvider:
+    """Fetches One Call payloads from OpenWeather over a pooled httpx.AsyncClient.
+
+    The client is created on first use and keeps connections to OpenWeather alive
+    between calls. The API URL and key default to the OPENWEATHER_API_URL and
+    OPENWEATHER_API_KEY environment variables.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        api_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ) -> None:
+        self.client = client
+        self.api_url = api_url
+        self.api_key = api_key
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                headers=OPENWEATHER_HEADERS,
+                timeout=OPENWEATHER_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=OPENWEATHER_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENWEATHER_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+        return self.client
+
+    async def fetch(self, lat: str, lon: str) -> ProviderResponse:
+        params: dict[str, str] = {
+            "lat": lat,
+            "lon": lon,
+            "appid": self.api_key or os.environ["OPENWEATHER_API_KEY"],
+        }
+
+        api_url = self.api_url or os.environ["OPENWEATHER_API_URL"]
+
+        res = await self._get_client().get(api_url, params=params)
+
+        json_data = res.json() if 200 <= res.status_code <= 299 else None
+        return ProviderResponse(status_code=res.status_code, json_data=json_data)
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
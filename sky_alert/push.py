@@ -0,0 +1,97 @@
+"""Server-sent events of sky conditions, pushed when a subscribed forecast changes.
+
+A client opens one stream for a handful of coordinates and receives a
+`sky_conditions` event for each of them straight away, then again whenever the
+forecast of its cell is refreshed with different data:
+
+    event: sky_conditions
+    data: {"lat": "43.65", "lon": "-79.38", "conditions": {"sun": ..., "moon": ..., "clouds": ...}}
+
+Event bodies come from the service's encoded response cache, so a refresh is encoded
+once however many clients watch the cell. An idle stream is a ChangeSubscription
+with a small bounded queue and one suspended coroutine; changes that arrive together
+are coalesced into one event per coordinate.
+"""
+import asyncio
+import json
+from typing import AsyncGenerator, Sequence
+from sky_alert.changes import ChangeStream
+from sky_alert.constants import PUSH_KEEPALIVE_SECONDS, PUSH_QUEUE_SIZE
+from sky_alert.metrics import PUSH_CONNECTIONS, PUSH_EVENTS
+from sky_alert.openweather_service import AsyncOpenweatherService, parse_sky_conditions
+from sky_alert.protocol import SkyConditionsResult
+
+CellKey = tuple[str, str]
+
+KEEPALIVE = b": keep-alive\n\n"
+
+
+def sse_event(event: str, data: bytes) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+async def _conditions_event(
+    service: AsyncOpenweatherService, lat: str, lon: str
+) -> bytes:
+    try:
+        body = await service.get_encoded(lat, lon, parse_sky_conditions)
+    except Exception as e:
+        error = SkyConditionsResult(lat=lat, lon=lon, error=str(e))
+        return sse_event("sky_conditions", error.model_dump_json().encode())
+    # Splice the cached body in rather than re-encoding it for every client
+    data = b'{"lat":%s,"lon":%s,"conditions":%s}' % (
+        json.dumps(lat).encode(),
+        json.dumps(lon).encode(),
+        body,
+    )
+    return sse_event("sky_conditions", data)
+
+
+async def condition_events(
+    service: AsyncOpenweatherService,
+    stream: ChangeStream,
+    coordinates: Sequence[tuple[str, str]],
+    keepalive_seconds: float = PUSH_KEEPALIVE_SECONDS,
+    max_queued: int = PUSH_QUEUE_SIZE,
+) -> AsyncGenerator[bytes, None]:
+    """Yield SSE frames with the conditions at `coordinates` now and on every change.
+
+    Coordinates are mapped to cells first, so an invalid one raises ValueError
+    before anything is yielded. A comment frame is sent after `keepalive_seconds`
+    without events so that proxies keep the connection open. If the queue overflows,
+    every coordinate is re-sent rather than trying to work out what was dropped.
+    """
+    by_cell: dict[CellKey, list[tuple[str, str]]] = {}
+    for lat, lon in coordinates:
+        by_cell.setdefault(service.cache_key(lat, lon), []).append((lat, lon))
+
+    # Fetch before subscribing, so that a cell's first forecast does not come straight
+    # back as a change
+    await asyncio.gather(
+        *(
+            service.update_most_recent_weather(*coords[0])
+            for coords in by_cell.values()
+        ),
+        return_exceptions=True,
+    )
+    with PUSH_CONNECTIONS.track_in_progress(), stream.subscribe(
+        by_cell, max_queued=max_queued
+    ) as subscription:
+        changed = set(by_cell)
+        dropped = 0
+        while True:
+            for cell, cell_coordinates in by_cell.items():
+                if cell not in changed:
+                    continue
+                PUSH_EVENTS.inc(len(cell_coordinates))
+                for lat, lon in cell_coordinates:
+                    yield await _conditions_event(service, lat, lon)
+
+            if not await subscription.wait(keepalive_seconds):
+                changed = set()
+                yield KEEPALIVE
+                continue
+            changed = {(c.lat, c.lon) for c in subscription.drain()}
+            if subscription.dropped != dropped:
+                dropped = subscription.dropped
+                changed = set(by_cell)
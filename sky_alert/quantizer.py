@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+import math
+import threading
+from typing import Optional
+from sky_alert.protocol import QuantizerStats
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def parse_coord(lat: str, lon: str) -> tuple[float, float]:
+    """Parse query-string coordinates, wrapping longitude into [-180, 180)."""
+    lat_value, lon_value = float(lat), float(lon)
+    if not (-90.0 <= lat_value <= 90.0):
+        raise ValueError(f"Latitude out of range: {lat}")
+    if not math.isfinite(lon_value):
+        raise ValueError(f"Longitude out of range: {lon}")
+    return lat_value, (lon_value + 180.0) % 360.0 - 180.0
+
+
+def format_coord(value: float) -> str:
+    return f"{value:.6f}"
+
+
+class CoordinateQuantizer(ABC):
+    """Base class mapping raw coordinates to the center of a canonical cell.
+
+    Every request that falls into the same cell shares one cache entry, and thus one
+    upstream fetch.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._remapped = 0
+        self._shared_hits = 0
+        # The raw coordinate whose request filled each cell's cache entry, for as many
+        # cells as the cache holds
+        self._fillers: dict[tuple[str, str], tuple[str, str]] = {}
+
+    @abstractmethod
+    def _cell_center(self, lat: float, lon: float) -> tuple[float, float]:
+        """Return the center of the cell containing the wrapped coordinate."""
+
+    def cell(self, lat: str, lon: str) -> tuple[str, str]:
+        """Return the canonical `(lat, lon)` cache key for the raw coordinate."""
+        cell_lat, cell_lon = self._cell_center(*parse_coord(lat, lon))
+        key = (format_coord(cell_lat), format_coord(cell_lon))
+        with self._lock:
+            self._requests += 1
+            if key != (lat, lon):
+                self._remapped += 1
+        return key
+
+    def record_lookup(
+        self,
+        key: tuple[str, str],
+        raw: tuple[str, str],
+        hit: bool,
+        max_entries: Optional[int],
+    ) -> None:
+        """Record a lookup of cell `key` for `raw` in a cache of `max_entries` cells.
+
+        A miss means `raw` fills the entry. A hit only saved an upstream call if it
+        came from a different raw coordinate than the one that filled the entry, as
+        repeats of the same coordinate would have hit the cache without quantizing.
+        """
+        with self._lock:
+            filler = self._fillers.pop(key, raw) if hit else raw
+            # Reinserted, so that cells leave in the cache's least recently used order
+            self._fillers[key] = filler
+            if hit and filler != raw:
+                self._shared_hits += 1
+            if max_entries is not None and len(self._fillers) > max_entries:
+                del self._fillers[next(iter(self._fillers))]
+
+    def stats(self) -> QuantizerStats:
+        with self._lock:
+            return QuantizerStats(
+                requests=self._requests,
+                remapped=self._remapped,
+                saved_upstream_calls=self._shared_hits,
+            )
+
+
+class GridQuantizer(CoordinateQuantizer):
+    """Snap coordinates to a fixed-degree lat/lon grid."""
+
+    def __init__(self, degrees: float) -> None:
+        super().__init__()
+        if not (0 < degrees <= 90):
+            raise ValueError("degrees must be in (0, 90]")
+        self.degrees = degrees
+
+    def _snap(self, value: float, low: float, high: float) -> float:
+        center = (math.floor(value / self.degrees) + 0.5) * self.degrees
+        return max(low, min(high, center))
+
+    def _cell_center(self, lat: float, lon: float) -> tuple[float, float]:
+        return self._snap(lat, -90.0, 90.0), self._snap(lon, -180.0, 180.0)
+
+
+class GeohashQuantizer(CoordinateQuantizer):
+    """Snap coordinates to the center of their geohash cell at a given precision.
+
+    Precision 5 is roughly a 4.9 km x 4.9 km cell, precision 6 roughly 1.2 km x 0.6 km.
+    """
+
+    def __init__(self, precision: int) -> None:
+        super().__init__()
+        if not (1 <= precision <= 12):
+            raise ValueError("precision must be between 1 and 12")
+        self.precision = precision
+
+    def _cell_center(self, lat: float, lon: float) -> tuple[float, float]:
+        return geohash_decode(geohash_encode(lat, lon, self.precision))
+
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars: list[str] = []
+    bits, bit_count, even = 0, 0, True
+
+    while len(chars) < precision:
+        value, interval = (lon, lon_range) if even else (lat, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+
+    return "".join(chars)
+
+
+def geohash_decode(geohash: str) -> tuple[float, float]:
+    """Return the `(lat, lon)` center of the geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        bits = _GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if (bits >> shift) & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Iterable, Optional
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.constants import (
+    REFRESH_AHEAD_SECONDS,
+    REFRESH_MIN_ACCESSES,
+    REFRESH_CONCURRENCY,
+    REFRESH_BUDGET_PER_MINUTE,
+    REFRESH_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """Re-fetch frequently read forecasts shortly before they expire.
+
+    Callers keep being served the cached copy, which is still valid, until the
+    refreshed forecast replaces it, so hot coordinates never pay upstream latency
+    inline. Refreshes run at most `concurrency` at a time and at most
+    `budget_per_minute` per rolling minute.
+    """
+
+    def __init__(
+        self,
+        service: AsyncOpenweatherService,
+        refresh_ahead_seconds: float = REFRESH_AHEAD_SECONDS,
+        min_accesses: int = REFRESH_MIN_ACCESSES,
+        concurrency: int = REFRESH_CONCURRENCY,
+        budget_per_minute: int = REFRESH_BUDGET_PER_MINUTE,
+        interval_seconds: float = REFRESH_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        watched: Optional[Callable[[], Iterable[tuple[str, str]]]] = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if budget_per_minute < 0:
+            raise ValueError("budget_per_minute must not be negative")
+
+        self.service = service
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.min_accesses = min_accesses
+        self.concurrency = concurrency
+        self.budget_per_minute = budget_per_minute
+        self.interval_seconds = interval_seconds
+        self._clock = clock
+        self._watched = watched
+        self._recent_refreshes: list[float] = []
+        self._task: Optional[asyncio.Task[None]] = None
+
+        self.refreshed = 0
+        self.failed = 0
+        self.over_budget = 0
+
+    def _remaining_budget(self) -> int:
+        cutoff = self._clock() - 60
+        self._recent_refreshes = [t for t in self._recent_refreshes if t > cutoff]
+        return self.budget_per_minute - len(self._recent_refreshes)
+
+    def due_keys(self) -> list[tuple[str, str]]:
+        """Return hot keys that will expire within the refresh-ahead window, soonest first.
+
+        Keys returned by `watched` are kept fresh however rarely they are read, and
+        are due as soon as they are missing from the cache.
+        """
+        due = []
+        for key in self.service.hot_keys(self.min_accesses):
+            remaining = self.service.most_recent_weather.ttl_remaining(key)
+            if remaining is not None and remaining <= self.refresh_ahead_seconds:
+                due.append((remaining, key))
+        hot = {key for _, key in due}
+        for key in self._watched() if self._watched is not None else ():
+            remaining = self.service.most_recent_weather.ttl_remaining(key)
+            if key not in hot and (
+                remaining is None or remaining <= self.refresh_ahead_seconds
+            ):
+                due.append((remaining or 0.0, key))
+        return [key for _, key in sorted(due)]
+
+    async def _refresh(
+        self, key: tuple[str, str], semaphore: asyncio.Semaphore
+    ) -> None:
+        async with semaphore:
+            try:
+                res = await self.service.refresh(key)
+            except Exception:
+                logger.exception("Background refresh of %s failed", key)
+                self.failed += 1
+                return
+
+        if 200 <= res.status_code <= 299:
+            self.refreshed += 1
+        else:
+            logger.warning("Background refresh of %s failed: %s", key, res.message)
+            self.failed += 1
+
+    async def run_once(self) -> int:
+        """Refresh every due key that fits in the budget. Returns the number scheduled."""
+        due = self.due_keys()
+        budget = max(self._remaining_budget(), 0)
+        if len(due) > budget:
+            self.over_budget += len(due) - budget
+            due = due[:budget]
+
+        now = self._clock()
+        self._recent_refreshes.extend(now for _ in due)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._refresh(key, semaphore) for key in due))
+        return len(due)
+
+    async def run(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Callable, Optional
+import httpx
+from sky_alert.providers import ProviderResponse, WeatherProvider
+from sky_alert.metrics import UPSTREAM_RETRIES, UPSTREAM_SHORT_CIRCUITED
+from sky_alert.constants import (
+    UPSTREAM_CALLS_PER_MINUTE,
+    UPSTREAM_BURST,
+    UPSTREAM_MAX_WAIT_SECONDS,
+    UPSTREAM_MAX_ATTEMPTS,
+    UPSTREAM_BACKOFF_BASE_SECONDS,
+    UPSTREAM_BACKOFF_MAX_SECONDS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable(status_code: int) -> bool:
+    return status_code == 429 or 500 <= status_code <= 599
+
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts to upstream throttling (AIMD).
+
+    A 429 halves the rate, down to `min_rate_per_second`, and every success adds back
+    a small step, up to the configured plan rate.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        capacity: float,
+        min_rate_per_second: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate_per_second <= 0 or capacity < 1:
+            raise ValueError("rate_per_second must be positive and capacity at least 1")
+        self.max_rate = rate_per_second
+        self.min_rate = min_rate_per_second or rate_per_second / 16
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Seconds until a token will be available."""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Take a token, waiting up to `max_wait` seconds for one. Returns success."""
+        while not self.try_acquire():
+            wait = self.wait_time()
+            if wait > max_wait:
+                return False
+            max_wait -= wait
+            await asyncio.sleep(wait)
+        return True
+
+    def on_throttled(self) -> None:
+        self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+
+class CircuitBreaker:
+    """Stop calling an unhealthy upstream for a while after repeated failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail
+    fast. Once `reset_seconds` have passed, one trial call is let through (half
+    open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.state = self.CLOSED
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if self._clock() - self._opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def cancel_trial(self) -> None:
+        """Release an allowed call that was never made, without recording an outcome."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_in_flight = False
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    "Upstream circuit opened after %d failures", self._failures
+                )
+            self.state = self.OPEN
+            self._opened_at = self._clock()
+
+
+class ResilientProvider:
+    """WeatherProvider wrapper adding rate limiting, retries and a circuit breaker.
+
+    Retries 429s, 5xx and transport errors with full-jitter exponential backoff.
+    Calls refused by the limiter or the open circuit are answered locally with a 429
+    or 503 without touching the upstream, so the service can fall back to stale data.
+    """
+
+    def __init__(
+        self,
+        provider: WeatherProvider,
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_attempts: int = UPSTREAM_MAX_ATTEMPTS,
+        backoff_base_seconds: float = UPSTREAM_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds: float = UPSTREAM_BACKOFF_MAX_SECONDS,
+        max_wait_seconds: float = UPSTREAM_MAX_WAIT_SECONDS,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.provider = provider
+        self.limiter = (
+            limiter
+            if limiter is not None
+            else TokenBucket(UPSTREAM_CALLS_PER_MINUTE / 60, UPSTREAM_BURST)
+        )
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.max_wait_seconds = max_wait_seconds
+
+    def _backoff(self, attempt: int) -> float:
+        cap = min(self.backoff_max_seconds, self.backoff_base_seconds * 2**attempt)
+        return random.uniform(0, cap)
+
+    async def fetch(self, lat: str, lon: str) -> ProviderResponse:
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                UPSTREAM_RETRIES.inc()
+                await asyncio.sleep(self._backoff(attempt - 1))
+
+            if not self.breaker.allow_request():
+                UPSTREAM_SHORT_CIRCUITED.inc(reason="circuit_open")
+                return ProviderResponse(status_code=503, json_data=None)
+            if not await self.limiter.acquire(self.max_wait_seconds):
+                self.breaker.cancel_trial()
+                UPSTREAM_SHORT_CIRCUITED.inc(reason="rate_limited")
+                return ProviderResponse(status_code=429, json_data=None)
+
+            try:
+                res = await self.provider.fetch(lat=lat, lon=lon)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if attempt == self.max_attempts - 1:
+                    raise
+                continue
+
+            if res.status_code == 429:
+                self.limiter.on_throttled()
+            if not is_retryable(res.status_code):
+                self.limiter.on_success()
+                self.breaker.record_success()
+                return res
+
+            self.breaker.record_failure()
+
+        return res
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
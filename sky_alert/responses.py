@@ -0,0 +1,56 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+from pydantic import BaseModel
+from sky_alert.constants import ENCODED_RESPONSE_MAX_ENTRIES
+from sky_alert.forecast import CompactForecast
+from sky_alert.metrics import ENCODED_RESPONSES, STAGE_SECONDS
+
+CacheKey = tuple[str, str]
+View = Callable[[CompactForecast], BaseModel]
+
+
+class EncodedResponseCache:
+    """LRU cache of JSON response bodies derived from cached forecasts.
+
+    Each body is stored with the forecast it was built from and is only reused while
+    that same forecast object is cached, so a refreshed entry is re-encoded on its
+    first read and a stale body is never served.
+    """
+
+    def __init__(self, max_entries: int = ENCODED_RESPONSE_MAX_ENTRIES) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[
+            tuple[Hashable, CacheKey], tuple[CompactForecast, bytes]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, view: View, key: CacheKey, forecast: CompactForecast) -> bytes:
+        """Return the encoded `view` of `forecast`, building and storing it on a miss.
+
+        Errors raised by `view` propagate and nothing is stored.
+        """
+        entry_key = (view, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] is forecast:
+                self._entries.move_to_end(entry_key)
+                ENCODED_RESPONSES.inc(result="hit")
+                return entry[1]
+
+        ENCODED_RESPONSES.inc(result="miss")
+        model = view(forecast)
+        with STAGE_SECONDS.time(stage="encode"):
+            body = model.model_dump_json().encode()
+        with self._lock:
+            self._entries[entry_key] = (forecast, body)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,249 @@
+"""Vectorized scoring of stargazing windows over hourly forecasts.
+
+`forecast_arrays` packs many CompactForecasts into `(locations, hours)` matrices, and
+`score_windows` rates every hour and picks each location's best contiguous observing
+window in one pass over those matrices, with no per-location Python work.
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any, NamedTuple, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from sky_alert.constants import (
+    SCORE_HORIZON_HOURS,
+    SCORE_HUMIDITY_ONSET,
+    SCORE_MIN_HOUR_QUALITY,
+    SCORE_MOON_WEIGHT,
+    SCORE_WIND_ONSET_MPS,
+)
+from sky_alert.forecast import MAX_VISIBILITY_METERS, CompactForecast
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+Floats = npt.NDArray[np.float64]
+Ints = npt.NDArray[np.int64]
+Bools = npt.NDArray[np.bool_]
+
+
+class ForecastArrays(NamedTuple):
+    """Hourly series and sun/moon intervals of many locations, padded to one shape.
+
+    Hours past the end of a location's forecast are fully clouded, so they never
+    score. Intervals are `[start, end)` epoch seconds; unused slots are `(0, 0)`.
+    """
+
+    hour_dt: Ints
+    clouds: Floats
+    humidity: Floats
+    visibility: Floats
+    wind_speed: Floats
+    sun_up: Ints
+    moon_up: Ints
+    moon_illumination: Floats
+
+
+class WindowScores(NamedTuple):
+    """Per-location results of `score_windows`.
+
+    `start`/`end` are epoch seconds of the best window (`end` is exclusive) and are 0
+    with `hours` 0 when no hour reaches the quality threshold. `score` is the mean
+    hourly quality within the window.
+    """
+
+    hourly_quality: Floats
+    start: Ints
+    end: Ints
+    hours: Ints
+    score: Floats
+
+
+def moon_illumination(phase: Floats) -> Floats:
+    """Illuminated fraction of the moon for One Call phases (0 new, 0.5 full)."""
+    illumination: Floats = (1 - np.cos(2 * np.pi * phase)) / 2
+    return illumination
+
+
+def _pad(
+    series: Sequence[array[Any]], width: int, dtype: npt.DTypeLike, fill: float
+) -> npt.NDArray[Any]:
+    """Stack typed arrays of varying length into a `(len(series), width)` matrix.
+
+    The buffers are joined without conversion and scattered into place in one step,
+    so packing costs a memcpy per series rather than Python work per value.
+    """
+    lengths = np.fromiter(map(len, series), dtype=np.int64, count=len(series))
+    flat = np.frombuffer(b"".join(series), dtype=dtype)
+    rows = np.repeat(np.arange(len(series)), lengths)
+    cols = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    keep = cols < width
+    out = np.full((len(series), width), fill, dtype=np.result_type(dtype, type(fill)))
+    out[rows[keep], cols[keep]] = flat[keep]
+    return out
+
+
+def _sun_intervals(forecasts: Sequence[CompactForecast], hours: int) -> Ints:
+    days = max((len(f.daily_sunrise) for f in forecasts), default=0)
+    rise = _pad([f.daily_sunrise for f in forecasts], days, np.int64, 0)
+    set_ = _pad([f.daily_sunset for f in forecasts], days, np.int64, 0)
+    known = (rise != 0) & (set_ != 0)
+
+    # Without daily sun times, repeat today's sunrise/sunset across the horizon.
+    offsets = np.arange(-1, math.ceil(hours / 24) + 2) * SECONDS_PER_DAY
+    current = np.array(
+        [(f.sunrise or 0, f.sunset or 0) for f in forecasts], dtype=np.int64
+    ).reshape(-1, 2)
+    fallback = ~known.any(axis=1) & (current != 0).all(axis=1)
+
+    intervals = np.zeros((len(forecasts), max(days, len(offsets)), 2), dtype=np.int64)
+    intervals[:, :days, 0] = np.where(known, rise, 0)
+    intervals[:, :days, 1] = np.where(known, set_, 0)
+    intervals[fallback, : len(offsets)] = (
+        current[fallback, None, :] + offsets[None, :, None]
+    )
+    return intervals
+
+
+def _moon_intervals(forecasts: Sequence[CompactForecast]) -> tuple[Ints, Floats]:
+    days = max((len(f.daily_moonrise) for f in forecasts), default=0)
+    rise = _pad([f.daily_moonrise for f in forecasts], days, np.int64, 0)
+    set_ = _pad([f.daily_moonset for f in forecasts], days, np.int64, 0)
+    phase = _pad([f.daily_moon_phase for f in forecasts], days, np.float64, 0.0)
+    known = (rise != 0) & (set_ != 0)
+    # A moonset before moonrise belongs to the following day.
+    set_ = np.where(set_ <= rise, set_ + SECONDS_PER_DAY, set_)
+
+    intervals = np.zeros((len(forecasts), days, 2), dtype=np.int64)
+    intervals[:, :, 0] = np.where(known, rise, 0)
+    intervals[:, :, 1] = np.where(known, set_, 0)
+    return intervals, np.where(known, phase, 0.0)
+
+
+def forecast_arrays(
+    forecasts: Sequence[CompactForecast], hours: int = SCORE_HORIZON_HOURS
+) -> ForecastArrays:
+    """Pack forecasts into matrices of `hours` columns, one row per forecast."""
+    moon_up, phases = _moon_intervals(forecasts)
+    return ForecastArrays(
+        hour_dt=_pad([f.hourly_dt for f in forecasts], hours, np.int64, 0),
+        clouds=_pad([f.hourly_clouds for f in forecasts], hours, np.uint8, 100.0),
+        humidity=_pad([f.hourly_humidity for f in forecasts], hours, np.uint8, 0.0),
+        visibility=_pad(
+            [f.hourly_visibility for f in forecasts],
+            hours,
+            np.uint16,
+            float(MAX_VISIBILITY_METERS),
+        ),
+        wind_speed=_pad(
+            [f.hourly_wind_speed for f in forecasts], hours, np.float32, 0.0
+        ),
+        sun_up=_sun_intervals(forecasts, hours),
+        moon_up=moon_up,
+        moon_illumination=moon_illumination(phases),
+    )
+
+
+def _relevant(hour_dt: Ints, intervals: Ints) -> Bools:
+    """Interval slots that overlap the forecast hours of at least one location."""
+    # Rows are padded with zeros past the end of their forecast, so the first hour of
+    # each row with any hours is its earliest
+    has_hours = hour_dt.any(axis=1)
+    if not has_hours.any():
+        return np.zeros(intervals.shape[1], dtype=np.bool_)
+    overlaps = (intervals[..., 0] <= hour_dt.max()) & (
+        intervals[..., 1] > hour_dt[has_hours, 0].min()
+    )
+    relevant: Bools = overlaps.any(axis=0)
+    return relevant
+
+
+def _within(hour_dt: Ints, interval: Ints) -> Bools:
+    """Mask of hours falling inside each location's `[start, end)` interval."""
+    inside: Bools = (hour_dt >= interval[:, None, 0]) & (hour_dt < interval[:, None, 1])
+    return inside
+
+
+# Both masks loop over the handful of interval slots rather than broadcasting a third
+# axis: reducing over a short trailing axis is several times slower in NumPy.
+
+
+def darkness_mask(arrays: ForecastArrays) -> Bools:
+    """Hours when the sun is below the horizon."""
+    daylight = np.zeros(arrays.hour_dt.shape, dtype=np.bool_)
+    for slot in np.flatnonzero(_relevant(arrays.hour_dt, arrays.sun_up)):
+        daylight |= _within(arrays.hour_dt, arrays.sun_up[:, slot])
+    return ~daylight
+
+
+def moon_interference(arrays: ForecastArrays) -> Floats:
+    """Illuminated fraction of the moon for hours it is above the horizon, else 0."""
+    interference = np.zeros(arrays.hour_dt.shape)
+    for slot in np.flatnonzero(_relevant(arrays.hour_dt, arrays.moon_up)):
+        up = _within(arrays.hour_dt, arrays.moon_up[:, slot])
+        illumination = arrays.moon_illumination[:, slot, None]
+        np.maximum(interference, up * illumination, out=interference)
+    return interference
+
+
+def hourly_quality(arrays: ForecastArrays) -> Floats:
+    """Observing quality of each hour in `[0, 1]`; 0 whenever the sun is up."""
+    cloud = 1 - arrays.clouds / 100
+    moon = 1 - SCORE_MOON_WEIGHT * moon_interference(arrays)
+    # Dew and turbulence set in gradually past their onsets, costing at most half.
+    damp = 1 - 0.5 * np.clip((arrays.humidity - SCORE_HUMIDITY_ONSET) / 30, 0, 1)
+    wind = 1 - 0.5 * np.clip((arrays.wind_speed - SCORE_WIND_ONSET_MPS) / 10, 0, 1)
+    clear = np.clip(arrays.visibility / MAX_VISIBILITY_METERS, 0, 1)
+    quality: Floats = darkness_mask(arrays) * cloud * moon * damp * wind * clear
+    return quality
+
+
+def score_windows(
+    arrays: ForecastArrays, min_quality: float = SCORE_MIN_HOUR_QUALITY
+) -> WindowScores:
+    """Find each location's best run of consecutive hours of at least `min_quality`.
+
+    Runs are ranked by their summed quality, so long good windows beat short
+    excellent ones.
+    """
+    quality = hourly_quality(arrays)
+    n, hours = quality.shape
+    good = np.zeros((n, hours + 2), dtype=np.int8)
+    good[:, 1:-1] = quality >= min_quality
+    edges = np.diff(good, axis=1)
+    # Both nonzero scans are row-major, so the k-th start pairs with the k-th end.
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    cumulative = np.zeros((n, hours + 1))
+    np.cumsum(quality, axis=1, out=cumulative[:, 1:])
+    totals = cumulative[rows, ends] - cumulative[rows, starts]
+
+    start = np.zeros(n, dtype=np.int64)
+    end = np.zeros(n, dtype=np.int64)
+    length = np.zeros(n, dtype=np.int64)
+    score = np.zeros(n)
+    if len(rows):
+        # Sort runs by row, best first, and keep the first run of every row.
+        order = np.lexsort((-totals, rows))
+        best = order[np.unique(rows[order], return_index=True)[1]]
+        best_rows, first, last = rows[best], starts[best], ends[best] - 1
+        length[best_rows] = last - first + 1
+        start[best_rows] = arrays.hour_dt[best_rows, first]
+        end[best_rows] = arrays.hour_dt[best_rows, last] + SECONDS_PER_HOUR
+        score[best_rows] = totals[best] / length[best_rows]
+
+    return WindowScores(
+        hourly_quality=quality, start=start, end=end, hours=length, score=score
+    )
+
+
+def score_forecasts(
+    forecasts: Sequence[CompactForecast],
+    hours: int = SCORE_HORIZON_HOURS,
+    min_quality: float = SCORE_MIN_HOUR_QUALITY,
+) -> WindowScores:
+    return score_windows(forecast_arrays(forecasts, hours), min_quality)
@@ -0,0 +1,229 @@
+"""Spatial index of dark-sky sites and a search for the best one near a user.
+
+Sites are loaded from a CSV file with `name,lat,lon` columns. The index sorts them by
+a fixed lat/lon bucket, so a radius query only measures the sites in the handful of
+buckets overlapping the search circle, whatever the size of the file.
+"""
+import asyncio
+import csv
+import datetime
+import logging
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from sky_alert.constants import DARK_SKY_BUCKET_DEGREES, DARK_SKY_MAX_FETCHES
+from sky_alert.forecast import CompactForecast
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.protocol import BestSites, DarkSkySite, ObservingWindow, SiteScore
+from sky_alert.quantizer import format_coord, parse_coord
+from sky_alert.scoring import score_forecasts
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(
+    lat1: float,
+    lon1: float,
+    lat2: npt.NDArray[np.float64],
+    lon2: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Great-circle distances from one point to many, in kilometres."""
+    phi1, phi2 = math.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    distance: npt.NDArray[np.float64] = (
+        2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    )
+    return distance
+
+
+class SiteIndex:
+    """Dark-sky sites bucketed on a `bucket_degrees` lat/lon grid.
+
+    Sites are stored sorted by bucket id (`row * columns + column`), so the buckets of
+    one grid row that a query touches form a single contiguous slice, found with two
+    binary searches.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        lats: Sequence[float],
+        lons: Sequence[float],
+        bucket_degrees: float = DARK_SKY_BUCKET_DEGREES,
+    ) -> None:
+        if not (len(names) == len(lats) == len(lons)):
+            raise ValueError("names, lats and lons must have the same length")
+        self.bucket_degrees = bucket_degrees
+        self._rows = math.ceil(180 / bucket_degrees)
+        self._columns = math.ceil(360 / bucket_degrees)
+
+        lat = np.asarray(lats, dtype=np.float64)
+        lon = (np.asarray(lons, dtype=np.float64) + 180.0) % 360.0 - 180.0
+        buckets = self._row(lat) * self._columns + self._column(lon)
+        order = np.argsort(buckets, kind="stable")
+        self.lats = lat[order]
+        self.lons = lon[order]
+        self.names = [names[i] for i in order.tolist()]
+        self._buckets = buckets[order]
+
+    @classmethod
+    def from_csv(
+        cls, path: str, bucket_degrees: float = DARK_SKY_BUCKET_DEGREES
+    ) -> "SiteIndex":
+        names, lats, lons = [], [], []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                lat, lon = parse_coord(row["lat"], row["lon"])
+                names.append(row["name"])
+                lats.append(lat)
+                lons.append(lon)
+        return cls(names, lats, lons, bucket_degrees)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _row(self, lat: npt.NDArray[np.float64]) -> npt.NDArray[np.int64]:
+        row = np.floor((lat + 90.0) / self.bucket_degrees).astype(np.int64)
+        clipped: npt.NDArray[np.int64] = np.clip(row, 0, self._rows - 1)
+        return clipped
+
+    def _column(self, lon: npt.NDArray[np.float64]) -> npt.NDArray[np.int64]:
+        column = np.floor((lon + 180.0) / self.bucket_degrees).astype(np.int64)
+        clipped: npt.NDArray[np.int64] = np.clip(column, 0, self._columns - 1)
+        return clipped
+
+    def within(
+        self, lat: float, lon: float, radius_km: float
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float64]]:
+        """Indices of the sites within `radius_km`, nearest first, and their distances."""
+        dlat = radius_km / KM_PER_DEGREE
+        lat_low, lat_high = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        # Widen the longitude span for the highest latitude the circle reaches
+        widest = math.cos(math.radians(max(abs(lat_low), abs(lat_high))))
+        dlon = 180.0 if widest < 1e-6 else min(dlat / widest, 180.0)
+
+        rows = range(
+            int(self._row(np.array(lat_low))), int(self._row(np.array(lat_high))) + 1
+        )
+        spans = self._column_spans(lon - dlon, lon + dlon)
+        slices = []
+        for row in rows:
+            for first, last in spans:
+                start, end = np.searchsorted(
+                    self._buckets,
+                    [row * self._columns + first, row * self._columns + last + 1],
+                )
+                slices.append(np.arange(start, end))
+
+        candidates = np.concatenate(slices) if slices else np.array([], np.int64)
+        distance = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        inside = distance <= radius_km
+        candidates, distance = candidates[inside], distance[inside]
+        order = np.argsort(distance, kind="stable")
+        return candidates[order], distance[order]
+
+    def _column_spans(self, lon_low: float, lon_high: float) -> list[tuple[int, int]]:
+        """Column ranges covering `[lon_low, lon_high]`, split at the antimeridian."""
+        if lon_high - lon_low >= 360.0:
+            return [(0, self._columns - 1)]
+        low = int(self._column(np.array((lon_low + 180.0) % 360.0 - 180.0)))
+        high = int(self._column(np.array((lon_high + 180.0) % 360.0 - 180.0)))
+        if low <= high:
+            return [(low, high)]
+        return [(low, self._columns - 1), (0, high)]
+
+    def coordinate(self, index: int) -> tuple[str, str]:
+        return format_coord(float(self.lats[index])), format_coord(
+            float(self.lons[index])
+        )
+
+    def site(self, index: int, distance_km: float) -> DarkSkySite:
+        lat, lon = self.coordinate(index)
+        return DarkSkySite(
+            name=self.names[index], lat=lat, lon=lon, distance_km=round(distance_km, 1)
+        )
+
+
+async def best_sites(
+    service: AsyncOpenweatherService,
+    index: SiteIndex,
+    lat: str,
+    lon: str,
+    radius_km: float,
+    limit: int,
+    max_fetches: int = DARK_SKY_MAX_FETCHES,
+) -> BestSites:
+    """Rank the sites within `radius_km` by their best observing window.
+
+    Sites sharing a forecast cell share one forecast, and cached cells are scored
+    without a fetch. Of the uncached cells only the `max_fetches` nearest are fetched,
+    so a search in a dense area cannot fan out into hundreds of upstream calls; sites
+    left without a forecast are counted in `unscored`.
+    """
+    user_lat, user_lon = parse_coord(lat, lon)
+    sites, distances = index.within(user_lat, user_lon, radius_km)
+
+    forecasts: dict[tuple[str, str], Optional[CompactForecast]] = {}
+    to_fetch: list[tuple[str, str]] = []
+    cell_of = []
+    for i in sites.tolist():
+        site_lat, site_lon = index.coordinate(i)
+        cell = service.cache_key(site_lat, site_lon)
+        cell_of.append(cell)
+        if cell in forecasts:
+            continue
+        forecasts[cell] = service.cached_forecast(site_lat, site_lon)
+        if forecasts[cell] is None and len(to_fetch) < max_fetches:
+            to_fetch.append((site_lat, site_lon))
+
+    fetched = await asyncio.gather(
+        *(service.update_most_recent_weather(*coord) for coord in to_fetch),
+        return_exceptions=True,
+    )
+    for coord, result in zip(to_fetch, fetched):
+        if isinstance(result, CompactForecast):
+            forecasts[service.cache_key(*coord)] = result
+        else:
+            logger.warning("Could not fetch forecast for site at %s", coord)
+
+    scored = []
+    for position, cell in enumerate(cell_of):
+        forecast = forecasts[cell]
+        if forecast is not None:
+            scored.append((position, forecast))
+    if not scored:
+        return BestSites(sites=[], unscored=len(cell_of))
+    scores = score_forecasts([forecast for _, forecast in scored])
+    # Sites are in distance order, so equal scores rank the nearest first
+    ranked = np.argsort(-scores.score, kind="stable")[:limit]
+
+    results = []
+    for row in ranked.tolist():
+        position = scored[row][0]
+        window = None
+        if scores.hours[row]:
+            window = ObservingWindow(
+                start=_utc(int(scores.start[row])),
+                end=_utc(int(scores.end[row])),
+                hours=int(scores.hours[row]),
+                score=round(float(scores.score[row]), 3),
+            )
+        results.append(
+            SiteScore(
+                site=index.site(int(sites[position]), float(distances[position])),
+                best_window=window,
+            )
+        )
+    return BestSites(sites=results, unscored=len(cell_of) - len(scored))
+
+
+def _utc(timestamp: int) -> datetime.datetime:
+    return datetime.datetime.utcfromtimestamp(timestamp)
@@ -0,0 +1,116 @@
+"""Compressed, append-only snapshots of cached forecasts, and a loader to replay them.
+
+Each snapshot is a gzipped JSON Lines file with one cached forecast per line:
+
+    {"lat": "43.25", "lon": "-79.05", "expires_at": 1700000600.0, "forecast": {...}}
+
+A snapshot is written to a hidden temporary file in the snapshot directory and then
+renamed into place, so readers only ever see complete files. Names are timestamped
+and never reused, so earlier snapshots are never overwritten.
+"""
+import gzip
+import io
+import itertools
+import json
+import os
+import datetime
+from typing import Any, Iterable, Iterator, NamedTuple
+from sky_alert.constants import SNAPSHOT_COMPRESS_LEVEL
+from sky_alert.forecast import CompactForecast
+
+SNAPSHOT_PREFIX = "forecasts-"
+SNAPSHOT_SUFFIX = ".jsonl.gz"
+
+
+class SnapshotRecord(NamedTuple):
+    key: tuple[str, str]
+    forecast: CompactForecast
+    expires_at: float
+
+
+class SnapshotWriter:
+    """Write snapshots of forecasts into `directory`, one new file per snapshot."""
+
+    def __init__(
+        self, directory: str, compress_level: int = SNAPSHOT_COMPRESS_LEVEL
+    ) -> None:
+        self.directory = directory
+        self.compress_level = compress_level
+        self._sequence = itertools.count()
+
+    def next_path(self) -> str:
+        """Reserve the path of the next snapshot.
+
+        The UTC timestamp keeps names in chronological order; the process id and a
+        per-writer sequence number keep them unique across workers and calls.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        name = (
+            f"{SNAPSHOT_PREFIX}{now:%Y%m%dT%H%M%S.%fZ}"
+            f"-{os.getpid()}-{next(self._sequence)}{SNAPSHOT_SUFFIX}"
+        )
+        return os.path.join(self.directory, name)
+
+    def write(self, records: Iterable[SnapshotRecord], path: str) -> int:
+        """Stream `records` to the snapshot at `path` and return how many were written.
+
+        The snapshot only appears at `path` once it has been fully written and synced.
+        """
+        directory, name = os.path.split(path)
+        os.makedirs(directory or ".", exist_ok=True)
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        written = 0
+        try:
+            with open(tmp_path, "wb") as raw:
+                with gzip.GzipFile(
+                    filename=name,
+                    mode="wb",
+                    fileobj=raw,
+                    compresslevel=self.compress_level,
+                ) as compressed, io.TextIOWrapper(compressed, encoding="utf-8") as text:
+                    for key, forecast, expires_at in records:
+                        text.write(_dumps_record(key, forecast, expires_at))
+                        written += 1
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return written
+
+
+def _dumps_record(
+    key: tuple[str, str], forecast: CompactForecast, expires_at: float
+) -> str:
+    record: dict[str, Any] = {
+        "lat": key[0],
+        "lon": key[1],
+        "expires_at": expires_at,
+        "forecast": forecast.to_dict(),
+    }
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def load_snapshot(path: str) -> Iterator[SnapshotRecord]:
+    """Stream the records of a snapshot without reading the whole file into memory."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield SnapshotRecord(
+                key=(record["lat"], record["lon"]),
+                forecast=CompactForecast.from_dict(record["forecast"]),
+                expires_at=record["expires_at"],
+            )
+
+
+def list_snapshots(directory: str) -> list[str]:
+    """Return the paths of the complete snapshots in `directory`, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)
+    ]
@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+from sky_alert.constants import SQLITE_BUSY_TIMEOUT_MS
+from sky_alert.forecast import dumps_forecast, loads_forecast
+
+CacheKey = tuple[str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    lat TEXT NOT NULL,
+    lon TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (lat, lon)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS forecasts_expires_at ON forecasts (expires_at);
+"""
+
+
+class SqliteWeatherCache:
+    """On-disk forecast cache shared by every worker process on the host.
+
+    The database runs in WAL mode so that many processes can read while one writes.
+    Each thread gets its own connection, since sqlite3 connections can't be shared.
+    Payloads are CompactForecasts unless other `dumps`/`loads` functions are given.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        clock: Callable[[], float] = time.time,
+        dumps: Callable[[Any], str] = dumps_forecast,
+        loads: Callable[[str], Any] = loads_forecast,
+    ) -> None:
+        self.path = path
+        self._clock = clock
+        self._dumps = dumps
+        self._loads = loads
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: CacheKey) -> Optional[tuple[Any, float]]:
+        """Return `(payload, expires_at)` for an unexpired entry, or None."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT payload, expires_at FROM forecasts "
+                "WHERE lat = ? AND lon = ? AND expires_at > ?",
+                (key[0], key[1], self._clock()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return self._loads(row[0]), row[1]
+
+    def set(self, key: CacheKey, value: Any, expires_at: float) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO forecasts (lat, lon, payload, expires_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key[0], key[1], self._dumps(value), expires_at),
+        )
+
+    def load_unexpired(
+        self, limit: Optional[int]
+    ) -> Iterator[tuple[CacheKey, Any, float]]:
+        """Yield up to `limit` (or all) unexpired entries, longest-lived first."""
+        # A negative LIMIT means no limit in SQLite
+        rows = self._connection().execute(
+            "SELECT lat, lon, payload, expires_at FROM forecasts "
+            "WHERE expires_at > ? ORDER BY expires_at DESC LIMIT ?",
+            (self._clock(), -1 if limit is None else limit),
+        )
+        for lat, lon, payload, expires_at in rows:
+            yield (lat, lon), self._loads(payload), expires_at
+
+    def purge_expired(self) -> int:
+        """Delete expired entries. Returns the number of rows removed."""
+        cursor = self._connection().execute(
+            "DELETE FROM forecasts WHERE expires_at <= ?", (self._clock(),)
+        )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
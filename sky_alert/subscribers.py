@@ -0,0 +1,187 @@
+import sqlite3
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional
+from sky_alert.constants import ALERT_BATCH_SUBSCRIBERS, SQLITE_BUSY_TIMEOUT_MS
+from sky_alert.protocol import Subscriber
+
+CellKey = tuple[str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscribers (
+    id INTEGER PRIMARY KEY,
+    lat TEXT NOT NULL,
+    lon TEXT NOT NULL,
+    cell_lat TEXT NOT NULL,
+    cell_lon TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    contact TEXT NOT NULL,
+    min_score REAL NOT NULL,
+    min_hours INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS subscribers_cell ON subscribers (cell_lat, cell_lon, id);
+"""
+
+_COLUMNS = "id, lat, lon, channel, contact, min_score, min_hours, cell_lat, cell_lon"
+
+
+def _identity_cell(lat: str, lon: str) -> CellKey:
+    return (lat, lon)
+
+
+def _subscriber(row: tuple[Any, ...]) -> tuple[CellKey, Subscriber]:
+    return (
+        (row[7], row[8]),
+        # Rows were validated on the way in
+        Subscriber.model_construct(
+            id=row[0],
+            lat=row[1],
+            lon=row[2],
+            channel=row[3],
+            contact=row[4],
+            min_score=row[5],
+            min_hours=row[6],
+        ),
+    )
+
+
+class SqliteSubscriberStore:
+    """Alert subscribers with their forecast cell, readable in cell order.
+
+    Each subscriber's forecast cell is computed once by `cell_key` when it is added;
+    pass the `cache_key` of the service that evaluates alerts so that every
+    subscriber of a cell is served by one cached forecast. The connection handling
+    mirrors SqliteWeatherCache: WAL mode, one connection per thread.
+    """
+
+    def __init__(
+        self, path: str, cell_key: Callable[[str, str], CellKey] = _identity_cell
+    ) -> None:
+        self.path = path
+        self.cell_key = cell_key
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def add(self, subscriber: Subscriber) -> int:
+        """Store a subscriber and return its id."""
+        return self.add_many([subscriber])[0]
+
+    def add_many(self, subscribers: Iterable[Subscriber]) -> list[int]:
+        """Store subscribers in one transaction and return their ids."""
+        connection = self._connection()
+        ids = []
+        connection.execute("BEGIN")
+        try:
+            for subscriber in subscribers:
+                cell_lat, cell_lon = self.cell_key(subscriber.lat, subscriber.lon)
+                cursor = connection.execute(
+                    "INSERT INTO subscribers (id, lat, lon, cell_lat, cell_lon, "
+                    "channel, contact, min_score, min_hours) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        subscriber.id,
+                        subscriber.lat,
+                        subscriber.lon,
+                        cell_lat,
+                        cell_lon,
+                        subscriber.channel,
+                        subscriber.contact,
+                        subscriber.min_score,
+                        subscriber.min_hours,
+                    ),
+                )
+                ids.append(int(cursor.lastrowid or 0))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return ids
+
+    def remove(self, subscriber_id: int) -> bool:
+        cursor = self._connection().execute(
+            "DELETE FROM subscribers WHERE id = ?", (subscriber_id,)
+        )
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        row = self._connection().execute("SELECT COUNT(*) FROM subscribers").fetchone()
+        return int(row[0])
+
+    def iter_batches(
+        self, batch_size: int = ALERT_BATCH_SUBSCRIBERS
+    ) -> Iterator[list[tuple[CellKey, Subscriber]]]:
+        """Yield every subscriber with its cell in batches, ordered by cell.
+
+        Batches are read with keyset pagination, so memory stays bounded by
+        `batch_size` however many subscribers there are, and subscribers added or
+        removed during a run do not shift the pages.
+        """
+        last: tuple[str, str, int] = ("", "", -1)
+        while True:
+            # Fetch the connection per page: the pages may be read from any thread
+            rows = (
+                self._connection()
+                .execute(
+                    f"SELECT {_COLUMNS} FROM subscribers "
+                    "WHERE (cell_lat, cell_lon, id) > (?, ?, ?) "
+                    "ORDER BY cell_lat, cell_lon, id LIMIT ?",
+                    (*last, batch_size),
+                )
+                .fetchall()
+            )
+            if not rows:
+                return
+            yield [_subscriber(row) for row in rows]
+            last = (rows[-1][7], rows[-1][8], rows[-1][0])
+
+    def iter_cells(
+        self, cells: Iterable[CellKey], batch_size: int = ALERT_BATCH_SUBSCRIBERS
+    ) -> Iterator[list[tuple[CellKey, Subscriber]]]:
+        """Yield the subscribers of `cells` in batches, ordered by cell like `iter_batches`.
+
+        Each cell is read as a range of the cell index, so the cost follows the cells
+        asked for and their subscribers, not the size of the table.
+        """
+        batch: list[tuple[CellKey, Subscriber]] = []
+        for cell in sorted(set(cells)):
+            last_id = -1
+            while True:
+                rows = (
+                    self._connection()
+                    .execute(
+                        f"SELECT {_COLUMNS} FROM subscribers "
+                        "WHERE cell_lat = ? AND cell_lon = ? AND id > ? "
+                        "ORDER BY id LIMIT ?",
+                        (*cell, last_id, batch_size),
+                    )
+                    .fetchall()
+                )
+                batch.extend(_subscriber(row) for row in rows)
+                while len(batch) >= batch_size:
+                    yield batch[:batch_size]
+                    batch = batch[batch_size:]
+                if len(rows) < batch_size:
+                    break
+                last_id = rows[-1][0]
+        if batch:
+            yield batch
+
+    def close(self) -> None:
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,224 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from sky_alert.protocol import CacheStats
+from sky_alert.constants import (
+    WEATHER_CACHE_TTL_SECONDS,
+    WEATHER_CACHE_MAX_ENTRIES,
+)
+
+CacheKey = tuple[str, str]
+
+
+def json_size(value: Any) -> int:
+    """Approximate the memory cost of a payload by its compact JSON length."""
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+def payload_size(value: Any) -> int:
+    """Use the value's own `nbytes` estimate when it has one, else its JSON length."""
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return json_size(value)
+
+
+class _CacheEntry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, size: int) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class WeatherCache:
+    """Thread-safe LRU cache of forecasts with a per-entry time to live.
+
+    Entries expire `ttl_seconds` after the forecast's observation time. A forecast
+    that is already older than that (lagging upstream or clock skew) is kept for
+    one full TTL from insertion so that we don't re-poll on every request.
+
+    With `stale_seconds` set, expired entries are kept that much longer (until
+    evicted) so that `get_stale` can serve them while the upstream is unhealthy.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = WEATHER_CACHE_TTL_SECONDS,
+        max_entries: Optional[int] = WEATHER_CACHE_MAX_ENTRIES,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = payload_size,
+        clock: Callable[[], float] = time.time,
+        stale_seconds: float = 0,
+    ) -> None:
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        if stale_seconds < 0:
+            raise ValueError("stale_seconds must not be negative")
+
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def expiry_for(self, observed_at: Optional[float]) -> float:
+        """Return the absolute expiry time for a forecast observed at `observed_at`."""
+        now = self._clock()
+        if observed_at is None or observed_at + self.ttl_seconds <= now:
+            return now + self.ttl_seconds
+        return min(observed_at, now) + self.ttl_seconds
+
+    def _live_entry(self, key: CacheKey, now: float) -> Optional[_CacheEntry]:
+        """Return the unexpired entry for `key`, if any. Lock must be held."""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= now:
+            self._drop_if_past_grace(key, now)
+            return None
+        return entry
+
+    def _drop_if_past_grace(self, key: CacheKey, now: float) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at + self.stale_seconds <= now:
+            self._remove(key)
+            self._expirations += 1
+
+    def _remove(self, key: CacheKey) -> _CacheEntry:
+        entry = self._entries.pop(key)
+        self._size_bytes -= entry.size
+        return entry
+
+    def _over_budget(self) -> bool:
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._size_bytes > self.max_bytes
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss. Updates stats and recency."""
+        with self._lock:
+            entry = self._live_entry(key, self._clock())
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def peek(self, key: CacheKey) -> Optional[Any]:
+        """Return the cached value for `key` without touching stats or recency."""
+        with self._lock:
+            entry = self._live_entry(key, self._clock())
+            return None if entry is None else entry.value
+
+    def get_stale(self, key: CacheKey) -> Optional[Any]:
+        """Return the value for `key` even if expired, as long as it is within the
+        stale grace period. Does not touch stats or recency."""
+        with self._lock:
+            now = self._clock()
+            self._drop_if_past_grace(key, now)
+            entry = self._entries.get(key)
+            return None if entry is None else entry.value
+
+    def ttl_remaining(self, key: CacheKey) -> Optional[float]:
+        """Return the seconds until `key` expires, or None if it is not cached."""
+        with self._lock:
+            now = self._clock()
+            entry = self._live_entry(key, now)
+            return None if entry is None else entry.expires_at - now
+
+    def set(
+        self,
+        key: CacheKey,
+        value: Any,
+        observed_at: Optional[float] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """Insert `value`, evicting least recently used entries to stay within budget.
+
+        The expiry is derived from `observed_at` unless an absolute `expires_at` is
+        given. The newest entry is never evicted by its own insertion, even if it
+        alone exceeds `max_bytes`, so a caller can always read back what it just wrote.
+        """
+        size = self._sizeof(value)
+        if expires_at is None:
+            expires_at = self.expiry_for(observed_at)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(
+                value=value, expires_at=expires_at, size=size
+            )
+            self._size_bytes += size
+
+            while len(self._entries) > 1 and self._over_budget():
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+    def items(self) -> list[tuple[CacheKey, Any, float]]:
+        """Return every unexpired `(key, value, expires_at)`, least recent first.
+
+        The list is copied under the lock, so callers can work through it (e.g.
+        serialize it) without holding up other threads. Stats and recency are not
+        touched.
+        """
+        with self._lock:
+            now = self._clock()
+            return [
+                (key, entry.value, entry.expires_at)
+                for key, entry in self._entries.items()
+                if entry.expires_at > now
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                entries=len(self._entries),
+                size_bytes=self._size_bytes,
+            )
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, tuple):
+            return False
+        return self.peek(key) is not None
+
+    def __getitem__(self, key: CacheKey) -> Any:
+        value = self.peek(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: CacheKey, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: CacheKey) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
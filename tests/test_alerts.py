@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from typing import Any, Sequence
+from sky_alert.alerts import AlertPipeline
+from sky_alert.fake_provider import FakeWeatherProvider
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.protocol import Alert, Subscriber
+from sky_alert.subscribers import SqliteSubscriberStore
+from sky_alert.weather_cache import WeatherCache
+
+HOUR = 3600
+
+
+def night_payload(clouds: int) -> dict[str, Any]:
+    """48 hours from now with the sun down from hour 2 to 8 and from hour 20 to 32."""
+    now = int(time.time()) // HOUR * HOUR
+    return {
+        "current": {"dt": now},
+        "hourly": [{"dt": now + h * HOUR, "clouds": clouds} for h in range(48)],
+        "daily": [
+            {"dt": now, "sunrise": now + start * HOUR, "sunset": now + end * HOUR}
+            for start, end in ((-10, 2), (8, 20), (32, 44))
+        ],
+    }
+
+
+def payload(lat: str, lon: str) -> dict[str, Any]:
+    if lat == "0":
+        raise RuntimeError("upstream down")
+    return night_payload(clouds=0 if lat == "1" else 100)
+
+
+class RecordingNotifier:
+    def __init__(self) -> None:
+        self.sent: list[Alert] = []
+
+    async def send(self, alerts: Sequence[Alert]) -> int:
+        self.sent.extend(alerts)
+        return len(alerts)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class ThreadTrackingStore(SqliteSubscriberStore):
+    """Records the threads that open a connection and those that close theirs."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.opened: set[int] = set()
+        self.closed: set[int] = set()
+        super().__init__(*args, **kwargs)
+
+    def _connection(self) -> sqlite3.Connection:
+        if getattr(self._local, "connection", None) is None:
+            self.opened.add(threading.get_ident())
+        return super()._connection()
+
+    def close(self) -> None:
+        self.closed.add(threading.get_ident())
+        super().close()
+
+
+class TestAlertPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.provider = FakeWeatherProvider(payload_factory=payload)
+        self.service = AsyncOpenweatherService(
+            cache=WeatherCache(), provider=self.provider
+        )
+        self.store = ThreadTrackingStore(
+            os.path.join(self.tmpdir.name, "subscribers.db"),
+            cell_key=self.service.cache_key,
+        )
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    async def test_alerts_subscribers_whose_thresholds_are_met(self) -> None:
+        # GIVEN
+        self.store.add_many(
+            [
+                Subscriber(lat="1", lon="0", channel="email", contact="clear"),
+                Subscriber(
+                    lat="1", lon="0", channel="email", contact="picky", min_hours=13
+                ),
+                Subscriber(lat="1", lon="0", channel="sms", contact="no backend"),
+                Subscriber(lat="2", lon="0", channel="email", contact="cloudy"),
+                Subscriber(lat="0", lon="0", channel="email", contact="failed"),
+            ]
+        )
+        notifier = RecordingNotifier()
+        pipeline = AlertPipeline(
+            self.service, self.store, {"email": notifier}, batch_size=2
+        )
+
+        # WHEN
+        stats = await pipeline.run()
+
+        # THEN
+        self.assertEqual([alert.contact for alert in notifier.sent], ["clear"])
+        self.assertEqual(notifier.sent[0].window.hours, 12)
+        self.assertEqual(stats.subscribers, 5)
+        self.assertEqual(stats.cells, 3)
+        self.assertEqual(stats.failed_cells, 1)
+        self.assertEqual(stats.alerts, 2)
+        self.assertEqual(stats.delivered, 1)
+        self.assertEqual(stats.undeliverable, 1)
+
+    async def test_each_cell_is_fetched_once(self) -> None:
+        # GIVEN
+        self.store.add_many(
+            Subscriber(lat="1", lon="0", channel="email", contact=str(i))
+            for i in range(50)
+        )
+        notifier = RecordingNotifier()
+
+        # WHEN
+        await AlertPipeline(
+            self.service, self.store, {"email": notifier}, batch_size=7
+        ).run()
+
+        # THEN
+        self.assertEqual(self.provider.calls, 1)
+        self.assertEqual(len(notifier.sent), 50)
+
+    async def test_run_for_changed_cells_only(self) -> None:
+        # GIVEN
+        self.store.add_many(
+            [
+                Subscriber(lat="1", lon="0", channel="email", contact="clear"),
+                Subscriber(lat="2", lon="0", channel="email", contact="cloudy"),
+            ]
+        )
+        notifier = RecordingNotifier()
+
+        # WHEN
+        stats = await AlertPipeline(self.service, self.store, {"email": notifier}).run(
+            cells=[self.service.cache_key("1", "0")]
+        )
+
+        # THEN
+        self.assertEqual([alert.contact for alert in notifier.sent], ["clear"])
+        self.assertEqual(stats.subscribers, 1)
+        self.assertEqual(self.provider.calls, 1)
+
+    async def test_failed_batch_counts_failed_cells(self) -> None:
+        # GIVEN
+        self.service.provider = FakeWeatherProvider(error_rate=1.0)
+        self.store.add_many(
+            Subscriber(lat=str(i), lon="0", channel="email", contact=str(i))
+            for i in range(1, 4)
+        )
+        notifier = RecordingNotifier()
+
+        # WHEN
+        stats = await AlertPipeline(self.service, self.store, {"email": notifier}).run()
+
+        # THEN
+        self.assertEqual(stats.subscribers, 3)
+        self.assertEqual(stats.failed_cells, 3)
+        self.assertEqual(stats.alerts, 0)
+        self.assertEqual(notifier.sent, [])
+
+    async def test_run_reads_through_one_connection_and_closes_it(self) -> None:
+        # GIVEN
+        self.store.add_many(
+            Subscriber(lat="1", lon="0", channel="email", contact=str(i))
+            for i in range(10)
+        )
+
+        # WHEN
+        await AlertPipeline(self.service, self.store, {}, batch_size=2).run()
+
+        # THEN
+        readers = self.store.opened - {threading.get_ident()}
+        self.assertEqual(len(readers), 1)
+        self.assertLessEqual(readers, self.store.closed)
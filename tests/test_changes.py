@@ -0,0 +1,188 @@
+import asyncio
+from datetime import timedelta
+import time
+import unittest
+from typing import Any
+from sky_alert.changes import ChangeDetector, ChangeStream, diff_forecasts
+from sky_alert.fake_provider import FakeWeatherProvider
+from sky_alert.forecast import CompactForecast
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.protocol import ForecastChange
+
+HOUR = 3600
+NOW = 1_700_000_000 // HOUR * HOUR
+KEY = ("1", "2")
+
+
+def night_forecast(clouds: list[int], first_hour: int = 0) -> CompactForecast:
+    """Hours from `first_hour` to 47 with the sun down from hour 20 to 32."""
+    return CompactForecast.from_json(
+        {
+            "current": {"dt": NOW + first_hour * HOUR},
+            "hourly": [
+                {"dt": NOW + h * HOUR, "clouds": clouds[h]}
+                for h in range(first_hour, 48)
+            ],
+            "daily": [
+                {"dt": NOW, "sunrise": NOW + start * HOUR, "sunset": NOW + end * HOUR}
+                for start, end in ((-10, -4), (8, 20), (32, 44))
+            ],
+        }
+    )
+
+
+def change(kind: str, lat: str = "1", lon: str = "2") -> ForecastChange:
+    return ForecastChange(lat=lat, lon=lon, kind=kind)
+
+
+class TestDiffForecasts(unittest.TestCase):
+    def test_unchanged_forecast_has_no_changes(self) -> None:
+        # GIVEN
+        forecast = night_forecast([100] * 48)
+
+        # WHEN / THEN
+        self.assertEqual(diff_forecasts(KEY, forecast, night_forecast([100] * 48)), [])
+
+    def test_clearing_night_opens_a_window(self) -> None:
+        # GIVEN
+        previous = night_forecast([100] * 48)
+        current = night_forecast([100] * 22 + [0] * 6 + [100] * 20)
+
+        # WHEN
+        changes = diff_forecasts(KEY, previous, current)
+
+        # THEN
+        self.assertEqual([c.kind for c in changes], ["window_opened", "clearing"])
+        assert changes[0].window is not None
+        self.assertEqual(changes[0].window.hours, 6)
+        self.assertEqual(changes[1].start, changes[0].window.start)
+        self.assertEqual(changes[1].end, changes[0].window.end)
+
+    def test_clouding_over_closes_the_window(self) -> None:
+        # GIVEN
+        previous = night_forecast([0] * 48)
+        current = night_forecast([100] * 48)
+
+        # WHEN
+        changes = diff_forecasts(KEY, previous, current)
+
+        # THEN
+        self.assertEqual([c.kind for c in changes], ["window_closed", "clouding"])
+        self.assertEqual(
+            changes[0].window, diff_forecasts(KEY, current, previous)[0].window
+        )
+        assert changes[1].start is not None
+        self.assertEqual(changes[1].end, changes[1].start + timedelta(hours=48))
+
+    def test_later_forecast_with_the_same_outlook_has_no_changes(self) -> None:
+        # GIVEN
+        previous = night_forecast([0] * 48)
+        current = night_forecast([0] * 48, first_hour=3)
+
+        # WHEN / THEN
+        self.assertEqual(diff_forecasts(KEY, previous, current), [])
+
+
+class TestChangeStream(unittest.IsolatedAsyncioTestCase):
+    async def test_changes_reach_subscribers_of_their_cell(self) -> None:
+        # GIVEN
+        stream = ChangeStream()
+        everything = stream.subscribe()
+        cell = stream.subscribe([("1", "2")])
+        other = stream.subscribe([("3", "4")])
+
+        # WHEN
+        delivered = stream.publish(change("clearing"))
+
+        # THEN
+        self.assertEqual(delivered, 2)
+        self.assertEqual((await cell.get()).kind, "clearing")
+        self.assertEqual((await everything.get()).kind, "clearing")
+        self.assertEqual(other.pending(), 0)
+
+    async def test_get_waits_for_the_next_change(self) -> None:
+        # GIVEN
+        stream = ChangeStream()
+        subscription = stream.subscribe([("1", "2")])
+
+        # WHEN
+        waiting = asyncio.ensure_future(subscription.get())
+        await asyncio.sleep(0)
+        stream.publish(change("clouding"))
+
+        # THEN
+        self.assertEqual((await asyncio.wait_for(waiting, 1)).kind, "clouding")
+
+    async def test_wait_times_out_without_changes(self) -> None:
+        # GIVEN
+        stream = ChangeStream()
+        subscription = stream.subscribe([("1", "2")])
+
+        # WHEN
+        timed_out = await subscription.wait(0.01)
+        waiting = asyncio.ensure_future(subscription.wait(1))
+        await asyncio.sleep(0)
+        stream.publish(change("clearing"))
+
+        # THEN
+        self.assertFalse(timed_out)
+        self.assertTrue(await waiting)
+        self.assertEqual([c.kind for c in subscription.drain()], ["clearing"])
+
+    async def test_queue_is_bounded_and_subscriptions_close(self) -> None:
+        # GIVEN
+        stream = ChangeStream()
+
+        # WHEN
+        with stream.subscribe([("1", "2")], max_queued=2) as subscription:
+            for kind in ("clearing", "clouding", "window_opened"):
+                stream.publish(change(kind))
+            self.assertEqual(len(stream), 1)
+
+        # THEN
+        self.assertEqual(subscription.dropped, 1)
+        self.assertEqual((await subscription.get()).kind, "clouding")
+        self.assertEqual(len(stream), 0)
+        self.assertEqual(stream.publish(change("clearing")), 0)
+
+
+class TestChangeDetection(unittest.IsolatedAsyncioTestCase):
+    async def test_refresh_publishes_changes(self) -> None:
+        # GIVEN
+        clouds = [100]
+
+        def payload(lat: str, lon: str) -> Any:
+            now = int(time.time()) // HOUR * HOUR
+            return {
+                "current": {"dt": now},
+                "hourly": [
+                    {"dt": now + h * HOUR, "clouds": clouds[0]} for h in range(48)
+                ],
+                "daily": [
+                    {"dt": now, "sunrise": now + s * HOUR, "sunset": now + e * HOUR}
+                    for s, e in ((-10, 2), (8, 20), (32, 44))
+                ],
+            }
+
+        stream = ChangeStream()
+        service = AsyncOpenweatherService(
+            provider=FakeWeatherProvider(payload_factory=payload),
+            changes=ChangeDetector(stream),
+        )
+        subscription = stream.subscribe([KEY])
+
+        # WHEN
+        await service.refresh(KEY)
+        first_fetch = subscription.drain()
+        await service.refresh(KEY)
+        unchanged = subscription.drain()
+        clouds[0] = 0
+        await service.refresh(KEY)
+
+        # THEN
+        self.assertEqual([c.kind for c in first_fetch], ["updated"])
+        self.assertEqual(unchanged, [])
+        self.assertEqual(
+            [c.kind for c in subscription.drain()],
+            ["window_opened", "clearing", "updated"],
+        )
@@ -0,0 +1,47 @@
+import unittest
+from pydantic import ValidationError
+from sky_alert.config import ConfigError, Settings, build_provider
+from sky_alert.constants import SNAPSHOT_DIRECTORY
+from sky_alert.fake_provider import FakeWeatherProvider
+from sky_alert.resilience import ResilientProvider
+
+
+class TestSettings(unittest.TestCase):
+    def test_from_env_reads_and_converts_values(self) -> None:
+        # WHEN
+        settings = Settings.from_env(
+            {
+                "OPENWEATHER_API_KEY": "key",
+                "OPENWEATHER_API_URL": "http://upstream",
+                "SKY_ALERT_WARM_SITES": "true",
+                "SKY_ALERT_STARTUP_BUDGET_SECONDS": "0.5",
+                "SKY_ALERT_CACHE_PATH": "",
+            }
+        )
+
+        # THEN
+        self.assertEqual(settings.openweather_api_key, "key")
+        self.assertTrue(settings.warm_sites)
+        self.assertEqual(settings.startup_budget_seconds, 0.5)
+        self.assertIsNone(settings.cache_path)
+        self.assertEqual(settings.snapshot_dir, SNAPSHOT_DIRECTORY)
+        settings.check()
+
+    def test_malformed_values_are_rejected(self) -> None:
+        with self.assertRaises(ValidationError):
+            Settings.from_env({"SKY_ALERT_PROVIDER": "carrier-pigeon"})
+        with self.assertRaises(ValidationError):
+            Settings.from_env({"SKY_ALERT_STARTUP_BUDGET_SECONDS": "soon"})
+
+    def test_check_names_missing_upstream_settings(self) -> None:
+        with self.assertRaisesRegex(ConfigError, "OPENWEATHER_API_URL"):
+            Settings.from_env({"OPENWEATHER_API_KEY": "key"}).check()
+        Settings.from_env({"SKY_ALERT_PROVIDER": "fake"}).check()
+
+    def test_build_provider(self) -> None:
+        self.assertIsInstance(
+            build_provider(Settings(provider="fake")), FakeWeatherProvider
+        )
+        self.assertIsInstance(
+            build_provider(Settings(provider="openweather")), ResilientProvider
+        )
@@ -1,4 +1,5 @@
 from typing import Any
+from sky_alert.forecast import CompactForecast
 
 MOCK_OPENWEATHER_RESPONSE_JSON: dict[str, Any] = {
     "current": {
@@ -42,3 +43,5 @@ MOCK_OPENWEATHER_RESPONSE_JSON: dict[str, Any] = {
 }
 
 HOURS_IN_DAY = 24
+
+MOCK_FORECAST = CompactForecast.from_json(MOCK_OPENWEATHER_RESPONSE_JSON)
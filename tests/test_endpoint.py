@@ -1,8 +1,27 @@
 from fastapi.testclient import TestClient
 from sky_alert.endpoint import app
+from sky_alert import endpoint
+from sky_alert.providers import OpenweatherProvider
+from sky_alert.snapshots import SnapshotWriter, load_snapshot
+from sky_alert.history import ForecastArchive
+from sky_alert.forecast import CompactForecast
+from sky_alert.fake_provider import FakeWeatherProvider, synthetic_one_call
+from sky_alert.config import ConfigError, Settings
+from sky_alert.constants import WARM_SITES
+from sky_alert.metrics import STARTUP_SECONDS
+from sky_alert.quantizer import format_coord
+from sky_alert.weather_cache import WeatherCache
+from tests.test_constants import MOCK_OPENWEATHER_RESPONSE_JSON
 import unittest
 from unittest.mock import patch
 import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
 from typing import Any
 
 client = TestClient(app)
@@ -19,9 +38,392 @@ class MockOpenweatherResponse:
 
 class TestSunEndpoints(unittest.TestCase):
     def setUp(self) -> None:
-        self.client = TestClient(app)
+        # Entering the client runs the lifespan, which builds endpoint.ows
+        self.client = self.enterContext(TestClient(app))
 
     def test_healthz(self) -> None:
         response = self.client.get("/healthz")
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.json())
+
+    def test_sun_data_is_computed_locally(self) -> None:
+        # GIVEN
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise AssertionError("sun data must not call the upstream")
+
+        mock_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        # WHEN
+        with patch.object(
+            endpoint.ows, "provider", OpenweatherProvider(client=mock_client)
+        ):
+            response = self.client.get(
+                "/openweather_sun_data",
+                params={"lat": "43.65", "lon": "-79.38", "date": "2024-01-01"},
+            )
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        sunrise = datetime.datetime.fromisoformat(response.json()["sunrise"])
+        sunset = datetime.datetime.fromisoformat(response.json()["sunset"])
+        # Published times for Toronto are 12:51 and 21:51 UTC
+        self.assertAlmostEqual(
+            sunrise,
+            datetime.datetime(2024, 1, 1, 12, 51),
+            delta=datetime.timedelta(minutes=2),
+        )
+        self.assertAlmostEqual(
+            sunset,
+            datetime.datetime(2024, 1, 1, 21, 51),
+            delta=datetime.timedelta(minutes=2),
+        )
+
+    def test_sun_data_during_polar_day(self) -> None:
+        # WHEN
+        response = self.client.get(
+            "/openweather_sun_data",
+            params={"lat": "78.22", "lon": "15.65", "date": "2024-06-21"},
+        )
+
+        # THEN
+        self.assertEqual(response.status_code, 422)
+
+    def test_ephemeris_range(self) -> None:
+        # WHEN
+        response = self.client.get(
+            "/ephemeris",
+            params={"lat": "78.22", "lon": "15.65", "start": "2024-06-20", "days": 3},
+        )
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [day["date"] for day in response.json()],
+            ["2024-06-20", "2024-06-21", "2024-06-22"],
+        )
+        self.assertIsNone(response.json()[0]["sun"])
+
+    def test_sky_conditions(self) -> None:
+        # GIVEN
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        mock_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        # WHEN
+        with patch.object(
+            endpoint.ows, "provider", OpenweatherProvider(client=mock_client)
+        ):
+            response = self.client.get(
+                "/sky_conditions", params={"lat": "3.5", "lon": "4.5"}
+            )
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"sun", "moon", "clouds"})
+        self.assertEqual(response.json()["moon"]["moonphase"], 0.5)
+        self.assertEqual(len(response.json()["clouds"]["cloud_cover"]), 24)
+
+    def test_stargazing_score(self) -> None:
+        # GIVEN
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        mock_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        # WHEN
+        with patch.object(
+            endpoint.ows, "provider", OpenweatherProvider(client=mock_client)
+        ):
+            response = self.client.get(
+                "/stargazing_score", params={"lat": "5.5", "lon": "6.5"}
+            )
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["hourly_quality"]), 24)
+        self.assertIn("best_window", response.json())
+
+    def test_invalid_coordinates_are_rejected(self) -> None:
+        # WHEN
+        responses = [
+            self.client.get(path, params={"lat": "95", "lon": "0"})
+            for path in (
+                "/openweather_cloud_data",
+                "/sky_conditions",
+                "/stargazing_score",
+                "/outlook",
+            )
+        ]
+
+        # THEN
+        for response in responses:
+            self.assertEqual(response.status_code, 422)
+            self.assertIn("Latitude out of range", response.json()["detail"])
+
+    def test_outlook(self) -> None:
+        # WHEN
+        with patch.object(endpoint.ows, "provider", FakeWeatherProvider()):
+            response = self.client.get(
+                "/outlook", params={"lat": "7.5", "lon": "8.5", "hours": 12}
+            )
+        too_far = self.client.get("/outlook", params={"first_day": 7, "days": 2})
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        first_hour = datetime.datetime.fromisoformat(
+            response.json()["hours"]["time"][0]
+        )
+        self.assertLess(
+            datetime.datetime.utcnow() - first_hour, datetime.timedelta(hours=1)
+        )
+        self.assertEqual(len(response.json()["hours"]["cloud_cover"]), 12)
+        self.assertEqual(len(response.json()["days"]), 8)
+        self.assertEqual(too_far.status_code, 422)
+
+    def test_clouds_consensus(self) -> None:
+        # WHEN
+        with patch.object(endpoint.ows, "provider", FakeWeatherProvider()):
+            response = self.client.get(
+                "/clouds/consensus", params={"lat": "9.5", "lon": "10.5", "hours": 6}
+            )
+        with patch.object(
+            endpoint.ows, "provider", FakeWeatherProvider(error_rate=1.0)
+        ):
+            unavailable = self.client.get(
+                "/clouds/consensus", params={"lat": "-9.5", "lon": "10.5"}
+            )
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["cloud_cover"]), 6)
+        self.assertEqual(response.json()["source_count"], [1] * 6)
+        self.assertEqual(
+            response.json()["sources"],
+            [{"name": "openweather", "weight": 1.0, "status": "ok"}],
+        )
+        self.assertEqual(unavailable.status_code, 503)
+
+    def test_sky_conditions_stream_rejects_bad_coordinates(self) -> None:
+        # WHEN
+        missing = self.client.get("/sky_conditions/stream")
+        invalid = self.client.get(
+            "/sky_conditions/stream", params={"coord": ["43.65,-79.38", "95,0"]}
+        )
+        malformed = self.client.get("/sky_conditions/stream", params={"coord": "43.65"})
+
+        # THEN
+        self.assertEqual(missing.status_code, 422)
+        self.assertEqual(invalid.status_code, 422)
+        self.assertIn("'95,0'", invalid.json()["detail"])
+        self.assertEqual(malformed.status_code, 422)
+
+    def test_best_dark_sky_sites(self) -> None:
+        # GIVEN
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        mock_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        # WHEN
+        with patch.object(
+            endpoint.ows, "provider", OpenweatherProvider(client=mock_client)
+        ):
+            response = self.client.get(
+                "/dark_sky_sites/best",
+                params={"lat": "44.5", "lon": "-79.0", "radius_km": "150"},
+            )
+            too_far = self.client.get(
+                "/dark_sky_sites/best", params={"radius_km": "10000"}
+            )
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        names = {s["site"]["name"] for s in response.json()["sites"]}
+        self.assertIn("Torrance Barrens Dark-Sky Preserve", names)
+        self.assertTrue(
+            all(s["site"]["distance_km"] <= 150 for s in response.json()["sites"])
+        )
+        self.assertEqual(too_far.status_code, 422)
+
+    def test_best_dark_sky_sites_without_forecasts(self) -> None:
+        # WHEN
+        nothing_in_range = self.client.get("/dark_sky_sites/best")
+        # Other tests may have cached these sites' forecasts
+        with patch.object(
+            endpoint.ows, "provider", FakeWeatherProvider(error_rate=1.0)
+        ), patch.object(endpoint.ows, "most_recent_weather", WeatherCache()):
+            all_failed = self.client.get(
+                "/dark_sky_sites/best",
+                params={"lat": "44.5", "lon": "-79.0", "radius_km": "150"},
+            )
+
+        # THEN
+        self.assertEqual(nothing_in_range.status_code, 200)
+        self.assertEqual(nothing_in_range.json(), {"sites": [], "unscored": 0})
+        self.assertEqual(all_failed.status_code, 200)
+        self.assertEqual(all_failed.json()["sites"], [])
+        self.assertGreater(all_failed.json()["unscored"], 0)
+
+    def test_export_snapshot_of_chosen_coordinates(self) -> None:
+        # GIVEN
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        mock_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        coordinates = [{"lat": "12.5", "lon": "22.5"}, {"lat": "95", "lon": "0"}]
+
+        # WHEN
+        with tempfile.TemporaryDirectory() as tmpdir, patch.object(
+            endpoint.ows, "provider", OpenweatherProvider(client=mock_client)
+        ), patch.object(endpoint, "snapshot_writer", SnapshotWriter(tmpdir)):
+            response = self.client.post("/snapshots", json=coordinates)
+            records = list(load_snapshot(response.json()["path"]))
+
+        # THEN the invalid coordinate is left out
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["entries"], 1)
+        self.assertEqual(
+            [key for key, _, _ in records], [endpoint.ows.cache_key("12.5", "22.5")]
+        )
+
+    def test_history_endpoints(self) -> None:
+        # GIVEN
+        now = datetime.datetime(2024, 3, 1, 12, tzinfo=datetime.timezone.utc)
+        key = endpoint.ows.cache_key("45.01", "-76.93")
+        payload = synthetic_one_call(*key, now=now.timestamp())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive = ForecastArchive(tmpdir)
+            archive.record(key, CompactForecast.from_json(payload))
+
+            # WHEN
+            with patch.object(endpoint.ows, "archive", archive):
+                params = {
+                    "lat": "45.01",
+                    "lon": "-76.93",
+                    "start": "2024-03-01T00:00:00Z",
+                    "end": "2024-03-02T00:00:00Z",
+                }
+                hourly = self.client.get("/history/hourly", params=params)
+                accuracy = self.client.get(
+                    "/history/cloud_accuracy", params={**params, "lead_hours": 24}
+                )
+                # Times without a zone are UTC, whatever the server's zone
+                with patch.dict(os.environ, {"TZ": "America/Toronto"}):
+                    time.tzset()
+                    naive = self.client.get(
+                        "/history/hourly",
+                        params={
+                            **params,
+                            "start": "2024-03-01T11:30:00",
+                            "end": "2024-03-01T12:30:00",
+                        },
+                    )
+                time.tzset()
+            archive.close()
+        disabled = self.client.get("/history/hourly")
+
+        # THEN
+        self.assertEqual(hourly.status_code, 200)
+        self.assertEqual(
+            [h["clouds"] for h in hourly.json()], [payload["hourly"][0]["clouds"]]
+        )
+        self.assertEqual(naive.json(), hourly.json())
+        self.assertEqual(
+            accuracy.json(),
+            {"lead_hours": 24, "hours": 0, "mean_absolute_error": None, "bias": None},
+        )
+        self.assertEqual(disabled.status_code, 404)
+
+    def test_sky_conditions_batch(self) -> None:
+        # GIVEN
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        mock_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        coordinates = [{"lat": "10.5", "lon": "20.5"}, {"lat": "11.5", "lon": "21.5"}]
+
+        # WHEN
+        with patch.object(
+            endpoint.ows, "provider", OpenweatherProvider(client=mock_client)
+        ):
+            response = self.client.post("/sky_conditions/batch", json=coordinates)
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(
+            sorted((line["lat"], line["lon"]) for line in lines),
+            [("10.5", "20.5"), ("11.5", "21.5")],
+        )
+        self.assertTrue(all(line["error"] is None for line in lines))
+
+    def test_metrics(self) -> None:
+        # GIVEN
+        self.client.get("/healthz")
+
+        # WHEN
+        response = self.client.get("/metrics")
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'sky_alert_http_request_seconds_count{route="/healthz",status_code="200"}',
+            response.text,
+        )
+        self.assertIn("sky_alert_cache_hit_ratio", response.text)
+
+
+class TestLifespan(unittest.TestCase):
+    def test_startup_fits_budget_and_warms_sites(self) -> None:
+        # GIVEN
+        settings = Settings(provider="fake", warm_sites=True)
+        sites = [(format_coord(lat), format_coord(lon)) for lat, lon in WARM_SITES]
+
+        # WHEN
+        with patch.object(Settings, "from_env", return_value=settings), TestClient(app):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and not all(
+                endpoint.ows.cached_forecast(*site) for site in sites
+            ):
+                time.sleep(0.01)
+            warmed = [endpoint.ows.cached_forecast(*site) for site in sites]
+
+        # THEN
+        self.assertLess(
+            STARTUP_SECONDS.value(phase="lifespan"), settings.startup_budget_seconds
+        )
+        self.assertGreater(STARTUP_SECONDS.value(phase="config"), 0)
+        self.assertTrue(all(warmed))
+
+    def test_import_reads_no_config_and_builds_no_service(self) -> None:
+        # GIVEN an environment without any settings
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = {"PATH": os.environ.get("PATH", ""), "PYTHONPATH": root}
+        script = (
+            "from sky_alert import endpoint; "
+            "from sky_alert.metrics import REGISTRY; "
+            "print(hasattr(endpoint, 'settings'), hasattr(endpoint, 'ows')); "
+            "print('sky_alert_cache_entries 0' in REGISTRY.render())"
+        )
+
+        # WHEN
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            env=env,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+
+        # THEN
+        self.assertEqual(output.split(), ["False", "False", "True"])
+
+    def test_startup_fails_fast_on_missing_config(self) -> None:
+        # WHEN / THEN
+        with patch.object(
+            Settings, "from_env", return_value=Settings()
+        ), self.assertRaisesRegex(ConfigError, "OPENWEATHER_API_KEY"):
+            with TestClient(app):
+                pass
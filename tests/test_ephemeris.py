@@ -0,0 +1,134 @@
+import datetime
+import unittest
+import numpy as np
+from sky_alert.ephemeris import (
+    Ephemeris,
+    compute_events,
+    moon_phase,
+    moon_rise_altitude,
+)
+
+MINUTE = 60
+
+
+def epoch(year: int, month: int, day: int, hour: int = 0, minute: int = 0) -> float:
+    return datetime.datetime(
+        year, month, day, hour, minute, tzinfo=datetime.timezone.utc
+    ).timestamp()
+
+
+class TestComputeEvents(unittest.TestCase):
+    def test_sun_events_match_published_times(self) -> None:
+        # GIVEN
+        greenwich = (51.4769, 0.0)
+
+        # WHEN
+        events = compute_events(
+            [greenwich[0]], [greenwich[1]], datetime.date(2024, 3, 20), 1
+        )[0][0]
+
+        # THEN
+        assert events.sunrise is not None and events.sunset is not None
+        self.assertAlmostEqual(
+            events.sunrise, epoch(2024, 3, 20, 6, 2), delta=2 * MINUTE
+        )
+        self.assertAlmostEqual(
+            events.sunset, epoch(2024, 3, 20, 18, 14), delta=2 * MINUTE
+        )
+        self.assertLess(events.astronomical_dawn or 0, events.sunrise)
+        self.assertGreater(events.astronomical_dusk or 0, events.sunset)
+
+    def test_polar_day_and_white_nights_have_no_events(self) -> None:
+        # WHEN
+        svalbard, london = compute_events(
+            [78.22, 51.5], [15.65, 0.0], datetime.date(2024, 6, 21), 1
+        )
+
+        # THEN
+        self.assertIsNone(svalbard[0].sunrise)
+        self.assertIsNotNone(london[0].sunrise)
+        self.assertIsNone(london[0].astronomical_dusk)
+
+    def test_moon_phase_follows_lunations(self) -> None:
+        # GIVEN
+        new_moon = epoch(2024, 1, 11, 11, 57)
+        full_moon = epoch(2024, 6, 22, 1, 8)
+
+        # WHEN
+        phases = moon_phase(np.array([new_moon, full_moon]))
+
+        # THEN
+        self.assertAlmostEqual(min(phases[0], 1 - phases[0]), 0, delta=0.01)
+        self.assertAlmostEqual(phases[1], 0.5, delta=0.01)
+
+    def test_moon_is_on_horizon_at_moonrise_and_moonset(self) -> None:
+        # WHEN
+        days = compute_events([43.65], [-79.38], datetime.date(2024, 1, 1), 30)[0]
+
+        # THEN
+        for day in days:
+            assert day.moonrise is not None and day.moonset is not None
+            altitudes = moon_rise_altitude(
+                np.array([day.moonrise, day.moonset], dtype=np.float64),
+                np.array([43.65]),
+                np.array([-79.38]),
+            )
+            self.assertLess(np.abs(altitudes).max(), 0.05)
+
+
+class TestEphemeris(unittest.TestCase):
+    def test_events_are_memoized_per_cell_and_day(self) -> None:
+        # GIVEN
+        ephemeris = Ephemeris(grid_degrees=0.1)
+        day = datetime.date(2024, 1, 1)
+
+        # WHEN
+        first = ephemeris.sun_data(lat="43.651", lon="-79.381", day=day)
+        second = ephemeris.sun_data(lat="43.659", lon="-79.389", day=day)
+
+        # THEN
+        self.assertEqual(first, second)
+        self.assertEqual(ephemeris.computed, 1)
+
+    def test_precompute_fills_memo_for_every_site(self) -> None:
+        # GIVEN
+        ephemeris = Ephemeris()
+        sites = [("43.65", "-79.38"), ("-33.87", "151.21")]
+
+        # WHEN
+        computed = ephemeris.precompute(sites, datetime.date(2024, 1, 1), days=10)
+        ephemeris.days(lat="-33.87", lon="151.21", start=datetime.date(2024, 1, 5))
+
+        # THEN
+        self.assertEqual(computed, 20)
+        self.assertEqual(ephemeris.computed, 20)
+
+    def test_memo_is_bounded(self) -> None:
+        # GIVEN
+        ephemeris = Ephemeris(max_entries=5)
+
+        # WHEN
+        ephemeris.precompute([("0", "0")], datetime.date(2024, 1, 1), days=10)
+
+        # THEN
+        self.assertEqual(len(ephemeris._memo), 5)
+
+    def test_today_uses_the_wrapped_longitude(self) -> None:
+        # GIVEN 23:00 UTC, when it is already the next day at 170 E
+        ephemeris = Ephemeris(clock=lambda: epoch(2024, 1, 1, 23))
+
+        # WHEN
+        wrapped = ephemeris.today(lat="0", lon="170")
+        unwrapped = ephemeris.today(lat="0", lon="-190")
+
+        # THEN
+        self.assertEqual(wrapped, datetime.date(2024, 1, 2))
+        self.assertEqual(unwrapped, wrapped)
+
+    def test_polar_day_raises(self) -> None:
+        # GIVEN
+        ephemeris = Ephemeris()
+
+        # WHEN / THEN
+        with self.assertRaises(ValueError):
+            ephemeris.sun_data(lat="78.22", lon="15.65", day=datetime.date(2024, 6, 21))
@@ -0,0 +1,55 @@
+import unittest
+from fastapi.testclient import TestClient
+from sky_alert.fake_provider import FakeWeatherProvider, synthetic_one_call, app
+from sky_alert.forecast import CompactForecast
+from sky_alert.openweather_service import AsyncOpenweatherService, parse_sky_conditions
+
+
+class TestSyntheticOneCall(unittest.TestCase):
+    def test_payload_is_deterministic_and_parseable(self) -> None:
+        # WHEN
+        first = synthetic_one_call("44.94", "-79.51", now=1_700_000_000)
+        second = synthetic_one_call("44.94", "-79.51", now=1_700_000_100)
+
+        # THEN
+        self.assertEqual(first, second)
+        conditions = parse_sky_conditions(CompactForecast.from_json(first))
+        self.assertEqual(len(conditions.clouds.cloud_cover), 24)
+        self.assertTrue(0 <= conditions.moon.moonphase < 1)
+
+    def test_server_serves_one_call_payloads(self) -> None:
+        # GIVEN
+        client = TestClient(app)
+
+        # WHEN
+        response = client.get("/data/3.0/onecall", params={"lat": "1", "lon": "2"})
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["hourly"]), 48)
+
+
+class TestFakeWeatherProvider(unittest.IsolatedAsyncioTestCase):
+    async def test_service_runs_end_to_end_against_fake(self) -> None:
+        # GIVEN
+        provider = FakeWeatherProvider(latency_seconds=0.001)
+        ows = AsyncOpenweatherService(provider=provider)
+
+        # WHEN
+        conditions = await ows.get_sky_conditions(lat="44.94", lon="-79.51")
+        await ows.get_sun_data(lat="44.94", lon="-79.51")
+
+        # THEN
+        self.assertEqual(len(conditions.clouds.cloud_cover), 24)
+        self.assertEqual(provider.calls, 1)
+
+    async def test_error_rate_produces_errors(self) -> None:
+        # GIVEN
+        provider = FakeWeatherProvider(error_rate=1.0, error_status=503)
+
+        # WHEN
+        res = await provider.fetch(lat="1", lon="2")
+
+        # THEN
+        self.assertEqual(res.status_code, 503)
+        self.assertIsNone(res.json_data)
@@ -0,0 +1,114 @@
+import unittest
+from sky_alert.fake_provider import synthetic_one_call
+from sky_alert.forecast import CompactForecast, dumps_forecast, loads_forecast
+from sky_alert.weather_cache import json_size
+from tests.test_constants import MOCK_OPENWEATHER_RESPONSE_JSON, HOURS_IN_DAY
+
+
+class TestCompactForecast(unittest.TestCase):
+    def test_from_json_projects_used_fields(self) -> None:
+        # WHEN
+        forecast = CompactForecast.from_json(MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        # THEN
+        self.assertEqual(forecast.dt, MOCK_OPENWEATHER_RESPONSE_JSON["current"]["dt"])
+        self.assertEqual(
+            forecast.sunrise, MOCK_OPENWEATHER_RESPONSE_JSON["current"]["sunrise"]
+        )
+        self.assertEqual(forecast.hourly_clouds.tolist(), list(range(1, 25)))
+        self.assertEqual(len(forecast.hourly_dt), HOURS_IN_DAY)
+        self.assertEqual(forecast.daily_moon_phase.tolist(), [0.5])
+
+    def test_from_json_tolerates_missing_sections(self) -> None:
+        # GIVEN
+        json_data = {"current": "oops", "hourly": [{"clouds": 5}, {"temp": 1}]}
+
+        # WHEN
+        forecast = CompactForecast.from_json(json_data)
+
+        # THEN
+        self.assertIsNone(forecast.dt)
+        self.assertEqual(forecast.hourly_clouds.tolist(), [5])
+        self.assertEqual(len(forecast.daily_dt), 0)
+
+    def test_round_trip_through_serialized_form(self) -> None:
+        # GIVEN
+        forecast = CompactForecast.from_json(MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        # WHEN
+        loaded = loads_forecast(dumps_forecast(forecast))
+
+        # THEN
+        self.assertEqual(loaded, forecast)
+
+    def test_compact_form_is_smaller_than_payload(self) -> None:
+        # GIVEN
+        json_data = synthetic_one_call(lat="43.65", lon="-79.38", now=1_700_000_000)
+        forecast = CompactForecast.from_json(json_data)
+
+        # WHEN / THEN
+        self.assertLess(forecast.nbytes, json_size(json_data))
+
+    def test_from_json_projects_observing_conditions(self) -> None:
+        # GIVEN
+        json_data = {
+            "hourly": [
+                {"dt": 1, "clouds": 5, "humidity": 80, "visibility": 20000},
+                {"dt": 2, "clouds": 6, "wind_speed": 3.5},
+            ],
+            "daily": [{"dt": 1, "sunrise": 10, "sunset": 20}],
+        }
+
+        # WHEN
+        forecast = CompactForecast.from_json(json_data)
+
+        # THEN
+        self.assertEqual(forecast.hourly_humidity.tolist(), [80, 0])
+        self.assertEqual(forecast.hourly_visibility.tolist(), [10000, 10000])
+        self.assertEqual(forecast.hourly_wind_speed.tolist(), [0.0, 3.5])
+        self.assertEqual(forecast.daily_sunset.tolist(), [20])
+
+    def test_from_dict_fills_series_missing_from_older_snapshots(self) -> None:
+        # GIVEN
+        data = CompactForecast.from_json(MOCK_OPENWEATHER_RESPONSE_JSON).to_dict()
+        for name in ("hourly_humidity", "hourly_visibility", "daily_sunrise"):
+            del data[name]
+
+        # WHEN
+        forecast = CompactForecast.from_dict(data)
+
+        # THEN
+        self.assertEqual(len(forecast.hourly_visibility), HOURS_IN_DAY)
+        self.assertEqual(forecast.daily_sunrise.tolist(), [0])
+
+    def test_slices_are_views_of_the_series(self) -> None:
+        # GIVEN
+        json_data = synthetic_one_call(lat="43.65", lon="-79.38", now=1_700_000_000)
+        forecast = CompactForecast.from_json(json_data)
+
+        # WHEN
+        hours = forecast.hours(2, 3)
+        days = forecast.days(1)
+
+        # THEN
+        self.assertIs(hours.clouds.obj, forecast.hourly_clouds)
+        self.assertEqual(hours.clouds.tolist(), forecast.hourly_clouds[2:5].tolist())
+        self.assertEqual(
+            days.moon_phase.tolist(), forecast.daily_moon_phase[1:].tolist()
+        )
+        self.assertEqual(len(forecast.hours(40, 100).dt), 8)
+
+    def test_hours_from_skips_hours_that_have_ended(self) -> None:
+        # GIVEN
+        forecast = CompactForecast.from_json(
+            synthetic_one_call(lat="43.65", lon="-79.38", now=1_700_000_000)
+        )
+        first = forecast.hourly_dt[0]
+
+        # WHEN
+        in_progress = forecast.hours_from(first + 5400, 2)
+        past_end = forecast.hours_from(first + 100 * 3600)
+
+        # THEN
+        self.assertEqual(in_progress.dt.tolist(), [first + 3600, first + 7200])
+        self.assertEqual(len(past_end.dt), 0)
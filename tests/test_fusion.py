@@ -0,0 +1,115 @@
+import asyncio
+import time
+import unittest
+from typing import Any
+from sky_alert.fake_provider import FakeWeatherProvider, synthetic_one_call
+from sky_alert.forecast import CompactForecast
+from sky_alert.fusion import ForecastSource, FusionEngine
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.quantizer import GridQuantizer
+from sky_alert.weather_cache import WeatherCache
+
+NOW = 1_700_000_000
+
+
+def constant_clouds(clouds: int) -> Any:
+    def payload(lat: str, lon: str) -> Any:
+        json_data = synthetic_one_call(lat, lon, now=NOW)
+        for hour in json_data["hourly"]:
+            hour["clouds"] = clouds
+        return json_data
+
+    return payload
+
+
+def make_source(
+    name: str, clouds: int, weight: float = 1.0, **provider_args: Any
+) -> ForecastSource:
+    provider = FakeWeatherProvider(
+        payload_factory=constant_clouds(clouds), **provider_args
+    )
+    cache = WeatherCache(stale_seconds=3600)
+    return ForecastSource(
+        name,
+        AsyncOpenweatherService(
+            cache=cache, quantizer=GridQuantizer(degrees=0.01), provider=provider
+        ),
+        weight,
+    )
+
+
+class TestFusionEngine(unittest.IsolatedAsyncioTestCase):
+    async def test_weighted_consensus(self) -> None:
+        # GIVEN
+        engine = FusionEngine(
+            [make_source("a", clouds=20), make_source("b", clouds=80, weight=3.0)]
+        )
+
+        # WHEN
+        fused = await engine.cloud_cover("43.65", "-79.38", hours=12, now=NOW)
+
+        # THEN
+        self.assertEqual(fused.cloud_cover, [65.0] * 12)
+        self.assertEqual(fused.source_count, [2] * 12)
+        self.assertEqual([s.status for s in fused.sources], ["ok", "ok"])
+
+    async def test_slow_source_misses_deadline_but_still_fills_its_cache(
+        self,
+    ) -> None:
+        # GIVEN
+        slow = make_source("slow", clouds=80, latency_seconds=0.2)
+        engine = FusionEngine(
+            [make_source("fast", clouds=20), slow], deadline_seconds=0.05
+        )
+
+        # WHEN
+        start = time.monotonic()
+        fused = await engine.cloud_cover("43.65", "-79.38", hours=6, now=NOW)
+        elapsed = time.monotonic() - start
+        await asyncio.sleep(0.3)
+
+        # THEN
+        self.assertLess(elapsed, 0.15)
+        self.assertEqual(fused.cloud_cover, [20.0] * 6)
+        self.assertEqual([s.status for s in fused.sources], ["ok", "timeout"])
+        self.assertIsNotNone(slow.service.cached_forecast("43.65", "-79.38"))
+
+    async def test_slow_source_falls_back_to_its_stale_forecast(self) -> None:
+        # GIVEN
+        slow = make_source("slow", clouds=80, latency_seconds=0.2)
+        key = slow.service.cache_key("43.65", "-79.38")
+        expired = CompactForecast.from_json(constant_clouds(60)("43.65", "-79.38"))
+        slow.service.most_recent_weather.set(key, expired, expires_at=time.time() - 1)
+        engine = FusionEngine([slow], deadline_seconds=0.05)
+
+        # WHEN
+        fused = await engine.cloud_cover("43.65", "-79.38", hours=3, now=NOW)
+
+        # THEN
+        self.assertEqual(fused.cloud_cover, [60.0] * 3)
+        self.assertEqual(fused.sources[0].status, "stale")
+
+    async def test_failing_source_is_left_out(self) -> None:
+        # GIVEN
+        engine = FusionEngine(
+            [make_source("a", clouds=20), make_source("b", clouds=80, error_rate=1.0)]
+        )
+
+        # WHEN
+        fused = await engine.cloud_cover("43.65", "-79.38", hours=3, now=NOW)
+        nothing = await FusionEngine([engine.sources[1]]).cloud_cover(
+            "43.65", "-79.38", now=NOW
+        )
+
+        # THEN
+        self.assertEqual(fused.cloud_cover, [20.0] * 3)
+        self.assertEqual(fused.sources[1].status, "error")
+        self.assertEqual(nothing.cloud_cover, [])
+
+    async def test_rejects_invalid_configuration_and_coordinates(self) -> None:
+        with self.assertRaises(ValueError):
+            FusionEngine([make_source("a", 0), make_source("a", 0)])
+        with self.assertRaises(ValueError):
+            FusionEngine([make_source("a", 0, weight=0)])
+        with self.assertRaises(ValueError):
+            await FusionEngine([make_source("a", 0)]).cloud_cover("95", "0")
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import time
+import unittest
+from sky_alert.fake_provider import FakeWeatherProvider, synthetic_one_call
+from sky_alert.forecast import CompactForecast
+from sky_alert.history import ForecastArchive, HourRecord
+from sky_alert.openweather_service import AsyncOpenweatherService
+
+HOUR = 3600
+# 2024-01-31 22:00 UTC, so a 48-hour forecast spans two monthly partitions
+ISSUED = 1706738400
+KEY = ("45.0", "-76.9")
+
+
+def forecast_at(now: float, lat: str = "45.0", lon: str = "-76.9") -> CompactForecast:
+    return CompactForecast.from_json(synthetic_one_call(lat, lon, now=now))
+
+
+class TestForecastArchive(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive = ForecastArchive(self.tmpdir.name, lead_hours=(0, 1, 3))
+
+    def tearDown(self) -> None:
+        self.archive.close()
+        self.tmpdir.cleanup()
+
+    def test_records_only_the_archived_leads(self) -> None:
+        # WHEN
+        added = self.archive.record(KEY, forecast_at(ISSUED + 600))
+
+        # THEN
+        self.assertEqual(added, 3)
+        self.assertEqual(self.archive.partitions(), ["2024-01", "2024-02"])
+        ahead = self.archive.hourly(KEY, ISSUED, ISSUED + 10 * HOUR, lead_hours=3)
+        self.assertEqual([r.hour for r in ahead], [ISSUED + 3 * HOUR])
+
+    def test_first_record_wins(self) -> None:
+        # GIVEN
+        forecast = forecast_at(ISSUED)
+        self.archive.record(KEY, forecast)
+
+        # WHEN the same hour is fetched again
+        added = self.archive.record(KEY, forecast_at(ISSUED + 1800))
+
+        # THEN
+        self.assertEqual(added, 0)
+        self.assertEqual(
+            self.archive.hourly(KEY, ISSUED, ISSUED + HOUR),
+            [
+                HourRecord(
+                    ISSUED,
+                    forecast.hourly_clouds[0],
+                    forecast.hourly_humidity[0],
+                    forecast.hourly_visibility[0],
+                    forecast.hourly_wind_speed[0],
+                )
+            ],
+        )
+
+    def test_hourly_history_across_partitions(self) -> None:
+        # GIVEN a forecast fetched every hour for a day
+        for h in range(24):
+            self.archive.record(KEY, forecast_at(ISSUED + h * HOUR))
+        self.archive.record(("1.0", "2.0"), forecast_at(ISSUED, "1.0", "2.0"))
+
+        # WHEN
+        observed = self.archive.hourly(KEY, ISSUED, ISSUED + 24 * HOUR)
+
+        # THEN
+        self.assertEqual(
+            [r.hour for r in observed], [ISSUED + h * HOUR for h in range(24)]
+        )
+
+    def test_compare_clouds_pairs_forecast_with_observed(self) -> None:
+        # GIVEN
+        for h in range(6):
+            self.archive.record(KEY, forecast_at(ISSUED + h * HOUR))
+
+        # WHEN
+        comparisons = self.archive.compare_clouds(
+            KEY, ISSUED, ISSUED + 6 * HOUR, lead_hours=3
+        )
+
+        # THEN hours 3..5 were both forecast 3 hours ahead and observed
+        self.assertEqual(
+            [c.hour for c in comparisons], [ISSUED + h * HOUR for h in (3, 4, 5)]
+        )
+        # The synthetic payload is deterministic per hour, so forecasts are perfect
+        self.assertTrue(all(c.forecast == c.actual for c in comparisons))
+
+    def test_daily_records(self) -> None:
+        self.archive.record(KEY, forecast_at(ISSUED))
+        days = self.archive.daily(KEY, ISSUED - 86400, ISSUED + 3 * 86400)
+        self.assertGreater(len(days), 0)
+        self.assertTrue(all(d.sunrise < d.sunset for d in days))
+
+    def test_queries_do_not_create_partitions(self) -> None:
+        self.assertEqual(self.archive.hourly(KEY, 0, 90 * 86400), [])
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+
+class TestServiceArchive(unittest.IsolatedAsyncioTestCase):
+    async def test_fetched_forecasts_are_archived(self) -> None:
+        # GIVEN
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive = ForecastArchive(tmpdir)
+            service = AsyncOpenweatherService(
+                provider=FakeWeatherProvider(), archive=archive
+            )
+
+            # WHEN
+            await service.update_most_recent_weather("45.0", "-76.9")
+
+            # THEN
+            now = int(time.time())
+            observed = archive.hourly(KEY, now - HOUR, now + HOUR)
+            archive.close()
+        self.assertEqual(len(observed), 1)
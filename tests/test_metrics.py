@@ -0,0 +1,77 @@
+import unittest
+from sky_alert.metrics import Registry, register_cache_metrics
+from sky_alert.protocol import CacheStats
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.registry = Registry()
+
+    def test_counter_renders_labelled_samples(self) -> None:
+        # GIVEN
+        counter = self.registry.counter(
+            "upstream_total", "Upstream calls.", labels=("status_code",)
+        )
+
+        # WHEN
+        counter.inc(status_code="200")
+        counter.inc(2, status_code="429")
+
+        # THEN
+        rendered = self.registry.render()
+        self.assertIn("# TYPE upstream_total counter", rendered)
+        self.assertIn('upstream_total{status_code="200"} 1', rendered)
+        self.assertIn('upstream_total{status_code="429"} 2', rendered)
+
+    def test_counter_rejects_wrong_labels(self) -> None:
+        # GIVEN
+        counter = self.registry.counter("c", "C.", labels=("a",))
+
+        # WHEN / THEN
+        with self.assertRaises(ValueError):
+            counter.inc(b="1")
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        # GIVEN
+        histogram = self.registry.histogram(
+            "stage_seconds", "Stage time.", labels=("stage",), buckets=(0.1, 1.0)
+        )
+
+        # WHEN
+        histogram.observe(0.05, stage="parse")
+        histogram.observe(0.5, stage="parse")
+        histogram.observe(5, stage="parse")
+
+        # THEN
+        rendered = self.registry.render()
+        self.assertIn('stage_seconds_bucket{stage="parse",le="0.1"} 1', rendered)
+        self.assertIn('stage_seconds_bucket{stage="parse",le="1"} 2', rendered)
+        self.assertIn('stage_seconds_bucket{stage="parse",le="+Inf"} 3', rendered)
+        self.assertIn('stage_seconds_count{stage="parse"} 3', rendered)
+        self.assertIn('stage_seconds_sum{stage="parse"} 5.55', rendered)
+
+    def test_gauge_tracks_in_progress(self) -> None:
+        # GIVEN
+        gauge = self.registry.gauge("in_flight", "In flight.")
+
+        # WHEN
+        with gauge.track_in_progress():
+            during = gauge.value()
+
+        # THEN
+        self.assertEqual(during, 1)
+        self.assertEqual(gauge.value(), 0)
+
+    def test_cache_metrics_are_read_at_render_time(self) -> None:
+        # GIVEN
+        stats = CacheStats(
+            hits=3, misses=1, evictions=0, expirations=0, entries=1, size_bytes=10
+        )
+        register_cache_metrics(lambda: stats, self.registry)
+
+        # WHEN
+        rendered = self.registry.render()
+
+        # THEN
+        self.assertIn("sky_alert_cache_hits_total 3", rendered)
+        self.assertIn("sky_alert_cache_hit_ratio 0.75", rendered)
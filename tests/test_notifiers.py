@@ -0,0 +1,55 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from sky_alert.notifiers import FileNotifier, SmtpNotifier, SmtpSink
+from sky_alert.protocol import Alert, ObservingWindow
+
+ALERT = Alert(
+    subscriber_id=7,
+    channel="email",
+    contact="stargazer@example.com",
+    lat="43.65",
+    lon="-79.38",
+    window=ObservingWindow(
+        start=datetime.datetime(2024, 1, 1, 22),
+        end=datetime.datetime(2024, 1, 2, 3),
+        hours=5,
+        score=0.91,
+    ),
+)
+
+
+class TestNotifiers(unittest.IsolatedAsyncioTestCase):
+    async def test_file_notifier_appends_json_lines(self) -> None:
+        # GIVEN
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alerts.jsonl")
+            notifier = FileNotifier(path)
+
+            # WHEN
+            delivered = await notifier.send([ALERT, ALERT])
+            with open(path) as f:
+                lines = f.readlines()
+
+        # THEN
+        self.assertEqual(delivered, 2)
+        self.assertEqual(json.loads(lines[1])["subscriber_id"], 7)
+
+    async def test_smtp_notifier_delivers_to_sink(self) -> None:
+        # GIVEN
+        sink = SmtpSink()
+        port = await sink.start()
+        notifier = SmtpNotifier("127.0.0.1", port, sender="alerts@example.com")
+
+        # WHEN
+        try:
+            delivered = await notifier.send([ALERT])
+        finally:
+            await sink.stop()
+
+        # THEN
+        self.assertEqual(delivered, 1)
+        self.assertEqual(sink.messages[0]["to"], ["<stargazer@example.com>"])
+        self.assertIn("Subject: Clear skies at 43.65, -79.38", sink.messages[0]["data"])
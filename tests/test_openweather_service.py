@@ -1,9 +1,32 @@
+import asyncio
+import os
+import tempfile
+import time
 import unittest
 from unittest.mock import patch
 import uuid
+import httpx
 from typing import Any
-from sky_alert.openweather_service import OpenweatherService
-from tests.test_constants import MOCK_OPENWEATHER_RESPONSE_JSON, HOURS_IN_DAY
+from sky_alert.config import Settings
+from sky_alert.providers import OpenweatherProvider
+from sky_alert.openweather_service import (
+    OpenweatherService,
+    AsyncOpenweatherService,
+    parse_sun_data,
+    parse_moon_data,
+    parse_cloud_data,
+    parse_outlook,
+)
+from sky_alert.fake_provider import synthetic_one_call
+from sky_alert.forecast import CompactForecast
+from sky_alert.weather_cache import WeatherCache
+from sky_alert.sqlite_cache import SqliteWeatherCache
+from sky_alert.quantizer import GridQuantizer
+from tests.test_constants import (
+    MOCK_OPENWEATHER_RESPONSE_JSON,
+    MOCK_FORECAST,
+    HOURS_IN_DAY,
+)
 import datetime
 
 
@@ -20,7 +43,7 @@ class TestOpenweatherService(unittest.TestCase):
     def setUp(self) -> None:
         self.ows = OpenweatherService()
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_populate_for_coord_success(self, mock_get: Any) -> None:
         # GIVEN
         mock_json_data = MOCK_OPENWEATHER_RESPONSE_JSON
@@ -37,10 +60,28 @@ class TestOpenweatherService(unittest.TestCase):
         # THEN
         self.assertEqual(response.status_code, 200)
         self.assertEqual(
-            self.ows.most_recent_weather[(sample_lat, sample_lon)], mock_json_data
+            self.ows.most_recent_weather[(sample_lat, sample_lon)], MOCK_FORECAST
         )
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
+    def test_settings_are_read_once(self, mock_get: Any) -> None:
+        # GIVEN
+        mock_get.return_value = MockOpenweatherResponse(
+            json_data=MOCK_OPENWEATHER_RESPONSE_JSON, status_code=200
+        )
+        settings = Settings(
+            openweather_api_key="key", openweather_api_url="http://upstream.invalid"
+        )
+
+        # WHEN
+        with patch.dict(os.environ, {"OPENWEATHER_API_KEY": "changed"}):
+            OpenweatherService(settings=settings).populate_for_coord(lat="1", lon="2")
+
+        # THEN
+        self.assertEqual(mock_get.call_args.args, ("http://upstream.invalid",))
+        self.assertEqual(mock_get.call_args.kwargs["params"]["appid"], "key")
+
+    @patch("requests.get")
     def test_populate_for_coord_401(self, mock_get: Any) -> None:
         # GIVEN
         mock_json_data: dict[str, str] = {}
@@ -58,7 +99,7 @@ class TestOpenweatherService(unittest.TestCase):
         self.assertEqual(response.status_code, 401)
         self.assertFalse((sample_lat, sample_lon) in self.ows.most_recent_weather)
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_populate_for_coord_404(self, mock_get: Any) -> None:
         # GIVEN
         mock_json_data: dict[str, str] = {}
@@ -76,7 +117,7 @@ class TestOpenweatherService(unittest.TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertFalse((sample_lat, sample_lon) in self.ows.most_recent_weather)
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_populate_for_coord_500(self, mock_get: Any) -> None:
         # GIVEN
         mock_json_data: dict[str, str] = {}
@@ -94,7 +135,7 @@ class TestOpenweatherService(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertFalse((sample_lat, sample_lon) in self.ows.most_recent_weather)
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_update_most_recent_weather_with_no_data(self, mock_get: Any) -> None:
         # GIVEN
         sample_lat = str(uuid.uuid4())
@@ -112,15 +153,13 @@ class TestOpenweatherService(unittest.TestCase):
         self.assertTrue((sample_lat, sample_lon) in self.ows.most_recent_weather)
         mock_get.assert_called_once()
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_update_most_recent_weather_with_data(self, mock_get: Any) -> None:
         # GIVEN
         sample_lat = str(uuid.uuid4())
         sample_lon = str(uuid.uuid4())
 
-        self.ows.most_recent_weather[
-            (sample_lat, sample_lon)
-        ] = MOCK_OPENWEATHER_RESPONSE_JSON
+        self.ows.most_recent_weather[(sample_lat, sample_lon)] = MOCK_FORECAST
 
         mock_json_data = MOCK_OPENWEATHER_RESPONSE_JSON
         mock_get.return_value = MockOpenweatherResponse(
@@ -134,12 +173,58 @@ class TestOpenweatherService(unittest.TestCase):
         self.assertTrue((sample_lat, sample_lon) in self.ows.most_recent_weather)
         self.assertFalse(mock_get.called)
 
+    @patch("requests.get")
+    def test_update_most_recent_weather_with_expired_data(self, mock_get: Any) -> None:
+        # GIVEN
+        sample_lat = str(uuid.uuid4())
+        sample_lon = str(uuid.uuid4())
+
+        now = [1_000_000.0]
+        self.ows = OpenweatherService(
+            cache=WeatherCache(ttl_seconds=60, clock=lambda: now[0])
+        )
+        self.ows.most_recent_weather[(sample_lat, sample_lon)] = MOCK_FORECAST
+        now[0] += 60
+
+        mock_get.return_value = MockOpenweatherResponse(
+            json_data=MOCK_OPENWEATHER_RESPONSE_JSON, status_code=200
+        )
+
+        # WHEN
+        self.ows.update_most_recent_weather(lat=sample_lat, lon=sample_lon)
+
+        # THEN
+        mock_get.assert_called_once()
+        self.assertEqual(self.ows.most_recent_weather.stats().expirations, 1)
+
+    @patch("requests.get")
+    def test_update_most_recent_weather_shares_quantized_cell(
+        self, mock_get: Any
+    ) -> None:
+        # GIVEN
+        quantizer = GridQuantizer(degrees=0.01)
+        self.ows = OpenweatherService(quantizer=quantizer)
+        mock_get.return_value = MockOpenweatherResponse(
+            json_data=MOCK_OPENWEATHER_RESPONSE_JSON, status_code=200
+        )
+
+        # WHEN
+        self.ows.update_most_recent_weather(lat="44.9416", lon="-79.5133")
+        self.ows.update_most_recent_weather(lat="44.9416", lon="-79.5133")
+        self.ows.update_most_recent_weather(lat="44.94168431", lon="-79.51330035")
+
+        # THEN
+        mock_get.assert_called_once()
+        self.assertEqual(mock_get.call_args.kwargs["params"]["lat"], "44.945000")
+        # Repeating the coordinate that filled the cell would have hit without it
+        self.assertEqual(quantizer.stats().saved_upstream_calls, 1)
+
 
 class TestSunDataParsing(unittest.TestCase):
     def setUp(self) -> None:
         self.ows = OpenweatherService()
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_get_sunrise_sunset_from_json_update_not_called(
         self, mock_get: Any
     ) -> None:
@@ -147,16 +232,14 @@ class TestSunDataParsing(unittest.TestCase):
         sample_lat = str(uuid.uuid4())
         sample_lon = str(uuid.uuid4())
 
-        self.ows.most_recent_weather[
-            (sample_lat, sample_lon)
-        ] = MOCK_OPENWEATHER_RESPONSE_JSON
+        self.ows.most_recent_weather[(sample_lat, sample_lon)] = MOCK_FORECAST
 
         # WHEN
         response = self.ows.get_sun_data(lat=sample_lat, lon=sample_lon)
 
         # THEN
         sunrise_datetime = datetime.datetime.utcfromtimestamp(
-            MOCK_OPENWEATHER_RESPONSE_JSON.get("current").get("sunrise")
+            MOCK_OPENWEATHER_RESPONSE_JSON["current"]["sunrise"]
         )
         sunset_datetime = datetime.datetime.utcfromtimestamp(
             MOCK_OPENWEATHER_RESPONSE_JSON["current"]["sunset"]
@@ -167,7 +250,7 @@ class TestSunDataParsing(unittest.TestCase):
         # mock_get shouldn't have been called since we have data with sample_lat and sample_lon
         self.assertFalse(mock_get.called)
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_get_sunrise_sunset_from_json_update_called(self, mock_get: Any) -> None:
         # GIVEN
         sample_lat = str(uuid.uuid4())
@@ -194,7 +277,7 @@ class TestSunDataParsing(unittest.TestCase):
         # mock_get should have been called since we don't have data with sample_lat and sample_lon
         mock_get.assert_called_once()
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_given_sunrise_sunset_without_data(self, mock_get: Any) -> None:
         # GIVEN
         sample_lat = str(uuid.uuid4())
@@ -210,11 +293,50 @@ class TestSunDataParsing(unittest.TestCase):
             response = self.ows.get_sun_data(lat=sample_lat, lon=sample_lon)
 
 
+class TestSkyConditionsParsing(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ows = OpenweatherService()
+
+    @patch("requests.get")
+    def test_get_sky_conditions_from_json_update_not_called(
+        self, mock_get: Any
+    ) -> None:
+        # GIVEN
+        sample_lat = str(uuid.uuid4())
+        sample_lon = str(uuid.uuid4())
+
+        self.ows.most_recent_weather[(sample_lat, sample_lon)] = MOCK_FORECAST
+
+        # WHEN
+        response = self.ows.get_sky_conditions(lat=sample_lat, lon=sample_lon)
+
+        # THEN
+        self.assertEqual(
+            response.sun, self.ows.get_sun_data(lat=sample_lat, lon=sample_lon)
+        )
+        self.assertEqual(
+            response.moon, self.ows.get_moon_data(lat=sample_lat, lon=sample_lon)
+        )
+        self.assertEqual(
+            response.clouds, self.ows.get_cloud_data(lat=sample_lat, lon=sample_lon)
+        )
+        self.assertFalse(mock_get.called)
+
+    @patch("requests.get")
+    def test_given_sky_conditions_without_data(self, mock_get: Any) -> None:
+        # GIVEN
+        mock_get.return_value = MockOpenweatherResponse(json_data={}, status_code=200)
+
+        # WHEN
+        with self.assertRaises(KeyError):
+            self.ows.get_sky_conditions(lat="1", lon="2")
+
+
 class TestMoonDataParsing(unittest.TestCase):
     def setUp(self) -> None:
         self.ows = OpenweatherService()
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_get_moonrise_moonset_from_json_update_not_called(
         self, mock_get: Any
     ) -> None:
@@ -222,9 +344,7 @@ class TestMoonDataParsing(unittest.TestCase):
         sample_lat = str(uuid.uuid4())
         sample_lon = str(uuid.uuid4())
 
-        self.ows.most_recent_weather[
-            (sample_lat, sample_lon)
-        ] = MOCK_OPENWEATHER_RESPONSE_JSON
+        self.ows.most_recent_weather[(sample_lat, sample_lon)] = MOCK_FORECAST
 
         # WHEN
         response = self.ows.get_moon_data(lat=sample_lat, lon=sample_lon)
@@ -244,7 +364,7 @@ class TestMoonDataParsing(unittest.TestCase):
         # mock_get shouldn't have been called since we have data with sample_lat and sample_lon
         self.assertFalse(mock_get.called)
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_get_moonrise_moonset_from_json_update_called(self, mock_get: Any) -> None:
         # GIVEN
         sample_lat = str(uuid.uuid4())
@@ -275,7 +395,7 @@ class TestMoonDataParsing(unittest.TestCase):
         # mock_get should have been called since we don't have data with sample_lat and sample_lon
         mock_get.assert_called_once()
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_given_moonrise_moonset_without_data(self, mock_get: Any) -> None:
         # GIVEN
         sample_lat = str(uuid.uuid4())
@@ -295,7 +415,7 @@ class TestCloudDataParsing(unittest.TestCase):
     def setUp(self) -> None:
         self.ows = OpenweatherService()
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_get_hourly_cloud_data_from_json_update_not_called(
         self, mock_get: Any
     ) -> None:
@@ -303,9 +423,7 @@ class TestCloudDataParsing(unittest.TestCase):
         sample_lat = str(uuid.uuid4())
         sample_lon = str(uuid.uuid4())
 
-        self.ows.most_recent_weather[
-            (sample_lat, sample_lon)
-        ] = MOCK_OPENWEATHER_RESPONSE_JSON
+        self.ows.most_recent_weather[(sample_lat, sample_lon)] = MOCK_FORECAST
 
         # WHEN
         response = self.ows.get_cloud_data(lat=sample_lat, lon=sample_lon)
@@ -320,7 +438,7 @@ class TestCloudDataParsing(unittest.TestCase):
         # mock_get shouldn't have been called since we have data with sample_lat and sample_lon
         self.assertFalse(mock_get.called)
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_get_hourly_cloud_data_from_json_update_called(self, mock_get: Any) -> None:
         # GIVEN
         sample_lat = str(uuid.uuid4())
@@ -344,7 +462,7 @@ class TestCloudDataParsing(unittest.TestCase):
         # mock_get should have been called since we don't have data with sample_lat and sample_lon
         mock_get.assert_called_once()
 
-    @patch("sky_alert.openweather_service.requests.get")
+    @patch("requests.get")
     def test_given_clouds_without_data(self, mock_get: Any) -> None:
         # GIVEN
         sample_lat = str(uuid.uuid4())
@@ -358,3 +476,243 @@ class TestCloudDataParsing(unittest.TestCase):
         # WHEN
         with self.assertRaises(KeyError):
             response = self.ows.get_cloud_data(lat=sample_lat, lon=sample_lon)
+
+
+class TestAsyncOpenweatherService(unittest.IsolatedAsyncioTestCase):
+    def make_service(self, status_code: int, json_data: dict[str, Any]) -> None:
+        self.requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return httpx.Response(status_code, json=json_data)
+
+        self.ows = AsyncOpenweatherService(
+            provider=OpenweatherProvider(
+                client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            )
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.ows.aclose()
+
+    async def test_populate_for_coord_success(self) -> None:
+        # GIVEN
+        self.make_service(status_code=200, json_data=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        sample_lat = str(uuid.uuid4())
+        sample_lon = str(uuid.uuid4())
+
+        # WHEN
+        response = await self.ows.populate_for_coord(lat=sample_lat, lon=sample_lon)
+
+        # THEN
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.ows.most_recent_weather[(sample_lat, sample_lon)],
+            MOCK_FORECAST,
+        )
+        self.assertEqual(self.requests[0].url.params["lat"], sample_lat)
+
+    async def test_populate_for_coord_500(self) -> None:
+        # GIVEN
+        self.make_service(status_code=500, json_data={})
+
+        sample_lat = str(uuid.uuid4())
+        sample_lon = str(uuid.uuid4())
+
+        # WHEN
+        response = await self.ows.populate_for_coord(lat=sample_lat, lon=sample_lon)
+
+        # THEN
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse((sample_lat, sample_lon) in self.ows.most_recent_weather)
+
+    async def test_get_data_fetches_once(self) -> None:
+        # GIVEN
+        self.make_service(status_code=200, json_data=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        sample_lat = str(uuid.uuid4())
+        sample_lon = str(uuid.uuid4())
+
+        # WHEN
+        sun = await self.ows.get_sun_data(lat=sample_lat, lon=sample_lon)
+        moon = await self.ows.get_moon_data(lat=sample_lat, lon=sample_lon)
+        clouds = await self.ows.get_cloud_data(lat=sample_lat, lon=sample_lon)
+
+        # THEN
+        self.assertEqual(
+            sun.sunrise,
+            datetime.datetime.utcfromtimestamp(
+                MOCK_OPENWEATHER_RESPONSE_JSON["current"]["sunrise"]
+            ),
+        )
+        self.assertEqual(moon.moonphase, 0.5)
+        self.assertEqual(len(clouds.cloud_cover), HOURS_IN_DAY)
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_update_most_recent_weather_raises_on_error(self) -> None:
+        # GIVEN
+        self.make_service(status_code=401, json_data={})
+
+        # WHEN / THEN
+        with self.assertRaises(Exception):
+            await self.ows.update_most_recent_weather(lat="1", lon="2")
+
+    async def test_concurrent_misses_fetch_once(self) -> None:
+        # GIVEN
+        self.make_service(status_code=200, json_data=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        # WHEN
+        results = await asyncio.gather(
+            *(self.ows.get_cloud_data(lat="1", lon="2") for _ in range(20))
+        )
+
+        # THEN
+        self.assertEqual(len(results), 20)
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_get_sky_conditions(self) -> None:
+        # GIVEN
+        self.make_service(status_code=200, json_data=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        # WHEN
+        response = await self.ows.get_sky_conditions(lat="1", lon="2")
+
+        # THEN
+        self.assertEqual(response.sun, parse_sun_data(MOCK_FORECAST))
+        self.assertEqual(response.moon, parse_moon_data(MOCK_FORECAST))
+        self.assertEqual(response.clouds, parse_cloud_data(MOCK_FORECAST))
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_get_sky_conditions_batch(self) -> None:
+        # GIVEN
+        self.make_service(status_code=200, json_data=MOCK_OPENWEATHER_RESPONSE_JSON)
+        coords = [("1", "2"), ("3", "4"), ("1", "2"), ("north", "4")]
+        self.ows.quantizer = GridQuantizer(degrees=1)
+
+        # WHEN
+        results = [
+            result
+            async for result in self.ows.get_sky_conditions_batch(coords, concurrency=2)
+        ]
+
+        # THEN
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(self.requests), 2)
+        errors = [result for result in results if result.error is not None]
+        self.assertEqual([(e.lat, e.lon) for e in errors], [("north", "4")])
+        self.assertTrue(
+            all(result.conditions is not None for result in results if not result.error)
+        )
+
+    async def test_get_sky_conditions_batch_reports_upstream_errors(self) -> None:
+        # GIVEN
+        self.make_service(status_code=500, json_data={})
+
+        # WHEN
+        results = [
+            result async for result in self.ows.get_sky_conditions_batch([("1", "2")])
+        ]
+
+        # THEN
+        self.assertEqual(len(results), 1)
+        self.assertIsNone(results[0].conditions)
+        self.assertIn("500", results[0].error or "")
+
+    async def test_persistent_cache_is_shared_between_services(self) -> None:
+        # GIVEN
+        self.make_service(status_code=200, json_data=MOCK_OPENWEATHER_RESPONSE_JSON)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            persistent_cache = SqliteWeatherCache(os.path.join(tmpdir, "cache.db"))
+            self.ows.persistent_cache = persistent_cache
+            await self.ows.get_sun_data(lat="1", lon="2")
+
+            # WHEN
+            other = AsyncOpenweatherService(persistent_cache=persistent_cache)
+            conditions = await other.get_sky_conditions(lat="1", lon="2")
+            warmed = AsyncOpenweatherService(persistent_cache=persistent_cache)
+            loaded = warmed.warm_start()
+            persistent_cache.close()
+
+        # THEN
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(conditions.moon.moonphase, 0.5)
+        self.assertEqual(loaded, 1)
+        self.assertTrue(("1", "2") in warmed.most_recent_weather)
+
+    async def test_warm_start_fills_an_unbounded_cache(self) -> None:
+        # GIVEN
+        self.make_service(status_code=200, json_data=MOCK_OPENWEATHER_RESPONSE_JSON)
+        self.ows.most_recent_weather = WeatherCache(max_entries=None)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            persistent_cache = SqliteWeatherCache(os.path.join(tmpdir, "cache.db"))
+            for lon in ("2", "3", "4"):
+                persistent_cache.set(("1", lon), MOCK_FORECAST, time.time() + 600)
+            self.ows.persistent_cache = persistent_cache
+            bounded = AsyncOpenweatherService(
+                cache=WeatherCache(max_entries=2), persistent_cache=persistent_cache
+            )
+
+            # WHEN
+            loaded = (bounded.warm_start(), self.ows.warm_start())
+            persistent_cache.close()
+
+        # THEN
+        self.assertEqual(loaded, (2, 3))
+        self.assertEqual(len(self.ows.most_recent_weather), 3)
+
+    async def test_stale_forecast_is_served_when_upstream_fails(self) -> None:
+        # GIVEN
+        self.make_service(status_code=503, json_data={})
+        now = [1_000_000.0]
+        self.ows.most_recent_weather = WeatherCache(
+            ttl_seconds=60, stale_seconds=600, clock=lambda: now[0]
+        )
+        self.ows.most_recent_weather[("1", "2")] = MOCK_FORECAST
+        now[0] += 120
+
+        # WHEN
+        forecast = await self.ows.update_most_recent_weather(lat="1", lon="2")
+
+        # THEN
+        self.assertEqual(forecast, MOCK_FORECAST)
+        self.assertEqual(len(self.requests), 1)
+
+
+class TestOutlookParsing(unittest.TestCase):
+    def test_outlook_covers_requested_horizon(self) -> None:
+        # GIVEN
+        now = 1_700_000_000
+        forecast = CompactForecast.from_json(
+            synthetic_one_call(lat="43.65", lon="-79.38", now=now)
+        )
+
+        # WHEN
+        outlook = parse_outlook(forecast, hours=36, first_day=2, days=3, now=now + 7200)
+
+        # THEN
+        self.assertEqual(len(outlook.hours.cloud_cover), 36)
+        self.assertEqual(
+            outlook.hours.time[0],
+            datetime.datetime.utcfromtimestamp(forecast.hourly_dt[2]),
+        )
+        self.assertEqual(
+            outlook.hours.cloud_cover, forecast.hourly_clouds[2:38].tolist()
+        )
+        self.assertEqual(
+            [day.date for day in outlook.days],
+            [
+                datetime.datetime.utcfromtimestamp(dt).date()
+                for dt in forecast.daily_dt[2:5]
+            ],
+        )
+        self.assertTrue(all(day.sun is not None for day in outlook.days))
+
+    def test_outlook_stops_at_the_end_of_the_forecast(self) -> None:
+        # WHEN
+        outlook = parse_outlook(MOCK_FORECAST, hours=48, first_day=0, days=8, now=0)
+
+        # THEN
+        self.assertEqual(len(outlook.hours.cloud_cover), HOURS_IN_DAY)
+        self.assertEqual(len(outlook.days), 1)
+        self.assertEqual(outlook.days[0].moon, parse_moon_data(MOCK_FORECAST))
@@ -0,0 +1,102 @@
+import json
+import time
+import unittest
+from typing import Any, AsyncGenerator
+from sky_alert.changes import ChangeDetector, ChangeStream
+from sky_alert.fake_provider import FakeWeatherProvider
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.protocol import ForecastChange
+from sky_alert.push import KEEPALIVE, condition_events
+
+HOUR = 3600
+
+
+def event_data(frame: bytes) -> Any:
+    event, data = frame.strip().split(b"\n")
+    assert event == b"event: sky_conditions"
+    return json.loads(data[len(b"data: ") :])
+
+
+class TestConditionEvents(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.clouds = {"1": 100, "3": 100}
+
+        def payload(lat: str, lon: str) -> Any:
+            if lat == "0":
+                raise RuntimeError("upstream down")
+            now = int(time.time()) // HOUR * HOUR
+            return {
+                "current": {"dt": now, "sunrise": now - HOUR, "sunset": now + HOUR},
+                "hourly": [
+                    {"dt": now + h * HOUR, "clouds": self.clouds[lat]}
+                    for h in range(48)
+                ],
+                "daily": [
+                    {
+                        "dt": now,
+                        "moonrise": now,
+                        "moonset": now + HOUR,
+                        "moon_phase": 0.5,
+                    }
+                ],
+            }
+
+        self.stream = ChangeStream()
+        self.service = AsyncOpenweatherService(
+            provider=FakeWeatherProvider(payload_factory=payload),
+            changes=ChangeDetector(self.stream),
+        )
+
+    def events(
+        self, *coordinates: tuple[str, str], **kwargs: Any
+    ) -> AsyncGenerator[bytes, None]:
+        return condition_events(
+            self.service, self.stream, coordinates, keepalive_seconds=0.05, **kwargs
+        )
+
+    async def test_sends_conditions_then_pushes_changes(self) -> None:
+        # GIVEN
+        events = self.events(("1", "2"), ("3", "4"))
+        initial = [event_data(await events.__anext__()) for _ in range(2)]
+        idle = await events.__anext__()
+
+        # WHEN
+        self.clouds["1"] = 0
+        await self.service.refresh(("1", "2"))
+        update = event_data(await events.__anext__())
+        await events.aclose()
+
+        # THEN
+        self.assertEqual(
+            [(e["lat"], e["lon"]) for e in initial], [("1", "2"), ("3", "4")]
+        )
+        self.assertEqual(initial[0]["conditions"]["clouds"]["cloud_cover"], [100] * 24)
+        self.assertEqual(idle, KEEPALIVE)
+        self.assertEqual((update["lat"], update["lon"]), ("1", "2"))
+        self.assertEqual(update["conditions"]["clouds"]["cloud_cover"], [0] * 24)
+        self.assertEqual(len(self.stream), 0)
+
+    async def test_overflow_resends_every_coordinate(self) -> None:
+        # GIVEN
+        events = self.events(("1", "2"), ("3", "4"), max_queued=1)
+        for _ in range(2):
+            await events.__anext__()
+
+        # WHEN
+        for _ in range(3):
+            self.stream.publish(ForecastChange(lat="1", lon="2", kind="updated"))
+        resent = [event_data(await events.__anext__()) for _ in range(2)]
+        await events.aclose()
+
+        # THEN
+        self.assertEqual([e["lat"] for e in resent], ["1", "3"])
+
+    async def test_failed_forecast_is_sent_as_an_error(self) -> None:
+        # WHEN
+        events = self.events(("0", "0"))
+        event = event_data(await events.__anext__())
+        await events.aclose()
+
+        # THEN
+        self.assertIsNone(event["conditions"])
+        self.assertIn("upstream down", event["error"])
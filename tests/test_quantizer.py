@@ -0,0 +1,97 @@
+import unittest
+from sky_alert.quantizer import (
+    GridQuantizer,
+    GeohashQuantizer,
+    geohash_encode,
+    geohash_decode,
+)
+
+
+class TestGridQuantizer(unittest.TestCase):
+    def test_nearby_coordinates_share_a_cell(self) -> None:
+        # GIVEN
+        quantizer = GridQuantizer(degrees=0.01)
+
+        # WHEN
+        short = quantizer.cell("44.9416", "-79.5133")
+        precise = quantizer.cell("44.94168431", "-79.51330035")
+
+        # THEN
+        self.assertEqual(short, precise)
+        self.assertEqual(short, ("44.945000", "-79.515000"))
+        self.assertEqual(quantizer.stats().requests, 2)
+        self.assertEqual(quantizer.stats().remapped, 2)
+
+    def test_only_hits_from_other_coordinates_save_calls(self) -> None:
+        # GIVEN
+        quantizer = GridQuantizer(degrees=0.01)
+        key = quantizer.cell("44.9416", "-79.5133")
+        first, second = ("44.9416", "-79.5133"), ("44.9417", "-79.5134")
+
+        # WHEN
+        for raw, hit in [(first, False), (first, True), (second, True)]:
+            quantizer.record_lookup(key, raw, hit, max_entries=None)
+        # Once refetched for the second coordinate, hits from the first are shared
+        for raw, hit in [(second, False), (second, True), (first, True)]:
+            quantizer.record_lookup(key, raw, hit, max_entries=None)
+
+        # THEN
+        self.assertEqual(quantizer.stats().saved_upstream_calls, 2)
+
+    def test_fillers_are_kept_for_as_many_cells_as_the_cache_holds(self) -> None:
+        # GIVEN
+        quantizer = GridQuantizer(degrees=1)
+        keys = [quantizer.cell("0.5", lon) for lon in ("0.5", "1.5", "2.5")]
+
+        # WHEN
+        quantizer.record_lookup(keys[0], ("0.1", "0.1"), False, max_entries=2)
+        quantizer.record_lookup(keys[1], ("0.1", "1.1"), False, max_entries=2)
+        quantizer.record_lookup(keys[0], ("0.2", "0.2"), True, max_entries=2)
+        quantizer.record_lookup(keys[2], ("0.1", "2.1"), False, max_entries=2)
+        # The second cell was evicted, so its filler is forgotten like its entry
+        quantizer.record_lookup(keys[1], ("0.2", "1.2"), True, max_entries=2)
+        quantizer.record_lookup(keys[2], ("0.2", "2.2"), True, max_entries=2)
+
+        # THEN
+        self.assertEqual(quantizer.stats().saved_upstream_calls, 2)
+
+    def test_longitude_is_wrapped(self) -> None:
+        # GIVEN
+        quantizer = GridQuantizer(degrees=1)
+
+        # WHEN / THEN
+        self.assertEqual(quantizer.cell("0", "190"), quantizer.cell("0", "-170"))
+
+    def test_invalid_coordinates_raise(self) -> None:
+        # GIVEN
+        quantizer = GridQuantizer(degrees=0.01)
+
+        # WHEN / THEN
+        with self.assertRaises(ValueError):
+            quantizer.cell("91", "0")
+        with self.assertRaises(ValueError):
+            quantizer.cell("north", "0")
+
+
+class TestGeohashQuantizer(unittest.TestCase):
+    def test_geohash_round_trip(self) -> None:
+        # GIVEN
+        geohash = geohash_encode(57.64911, 10.40744, 11)
+
+        # WHEN
+        lat, lon = geohash_decode(geohash)
+
+        # THEN
+        self.assertEqual(geohash, "u4pruydqqvj")
+        self.assertAlmostEqual(lat, 57.64911, places=4)
+        self.assertAlmostEqual(lon, 10.40744, places=4)
+
+    def test_nearby_coordinates_share_a_cell(self) -> None:
+        # GIVEN
+        quantizer = GeohashQuantizer(precision=5)
+
+        # WHEN / THEN
+        self.assertEqual(
+            quantizer.cell("44.9416", "-79.5133"),
+            quantizer.cell("44.94168431", "-79.51330035"),
+        )
@@ -0,0 +1,114 @@
+import unittest
+import httpx
+from sky_alert.providers import OpenweatherProvider
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.refresher import BackgroundRefresher
+from sky_alert.weather_cache import WeatherCache
+from tests.test_constants import MOCK_OPENWEATHER_RESPONSE_JSON
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBackgroundRefresher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.clock = FakeClock(now=1_000_000.0)
+        self.requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return httpx.Response(200, json=MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        self.ows = AsyncOpenweatherService(
+            cache=WeatherCache(ttl_seconds=600, clock=self.clock),
+            provider=OpenweatherProvider(
+                client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            ),
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.ows.aclose()
+
+    async def read(self, lat: str, lon: str, times: int) -> None:
+        for _ in range(times):
+            await self.ows.get_cloud_data(lat=lat, lon=lon)
+
+    async def test_hot_entry_is_refreshed_before_expiry(self) -> None:
+        # GIVEN
+        refresher = BackgroundRefresher(
+            self.ows, refresh_ahead_seconds=60, min_accesses=3, clock=self.clock
+        )
+        await self.read("1", "2", times=3)
+        self.clock.now += 550
+
+        # WHEN
+        scheduled = await refresher.run_once()
+
+        # THEN
+        self.assertEqual(scheduled, 1)
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(refresher.refreshed, 1)
+        self.assertEqual(self.ows.most_recent_weather.ttl_remaining(("1", "2")), 600)
+
+    async def test_cold_or_fresh_entries_are_left_alone(self) -> None:
+        # GIVEN
+        refresher = BackgroundRefresher(
+            self.ows, refresh_ahead_seconds=60, min_accesses=3, clock=self.clock
+        )
+        await self.read("1", "2", times=1)
+        await self.read("3", "4", times=3)
+
+        # WHEN
+        scheduled = await refresher.run_once()
+
+        # THEN
+        self.assertEqual(scheduled, 0)
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_watched_entries_are_refreshed_even_when_cold(self) -> None:
+        # GIVEN
+        refresher = BackgroundRefresher(
+            self.ows,
+            refresh_ahead_seconds=60,
+            min_accesses=3,
+            clock=self.clock,
+            watched=lambda: [("1", "2"), ("3", "4")],
+        )
+        await self.read("1", "2", times=1)
+        self.clock.now += 550
+
+        # WHEN
+        due = refresher.due_keys()
+
+        # THEN the missing entry is due first
+        self.assertEqual(due, [("3", "4"), ("1", "2")])
+
+    async def test_refreshes_respect_per_minute_budget(self) -> None:
+        # GIVEN
+        refresher = BackgroundRefresher(
+            self.ows,
+            refresh_ahead_seconds=60,
+            min_accesses=1,
+            budget_per_minute=2,
+            clock=self.clock,
+        )
+        for lat in ("1", "2", "3"):
+            await self.read(lat, "0", times=1)
+        self.clock.now += 550
+
+        # WHEN
+        first = await refresher.run_once()
+        await self.read("1", "0", times=1)
+        await self.read("2", "0", times=1)
+        await self.read("3", "0", times=1)
+        second = await refresher.run_once()
+
+        # THEN
+        self.assertEqual(first, 2)
+        self.assertEqual(second, 0)
+        self.assertEqual(refresher.over_budget, 2)
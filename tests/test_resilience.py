@@ -0,0 +1,159 @@
+import unittest
+from typing import Union
+import httpx
+from sky_alert.constants import UPSTREAM_MAX_ATTEMPTS
+from sky_alert.providers import ProviderResponse
+from sky_alert.resilience import CircuitBreaker, ResilientProvider, TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScriptedProvider:
+    """Replays a fixed sequence of responses (or exceptions to raise)."""
+
+    def __init__(self, script: list[Union[int, Exception]]) -> None:
+        self.script = script
+        self.calls = 0
+
+    async def fetch(self, lat: str, lon: str) -> ProviderResponse:
+        outcome = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return ProviderResponse(
+            status_code=outcome, json_data={} if outcome == 200 else None
+        )
+
+    async def aclose(self) -> None:
+        pass
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_bucket_refills_at_rate(self) -> None:
+        # GIVEN
+        clock = FakeClock(now=0)
+        bucket = TokenBucket(rate_per_second=1, capacity=2, clock=clock)
+
+        # WHEN
+        burst = [bucket.try_acquire() for _ in range(3)]
+        clock.now += 1
+
+        # THEN
+        self.assertEqual(burst, [True, True, False])
+        self.assertTrue(bucket.try_acquire())
+
+    def test_throttling_halves_rate_and_success_recovers(self) -> None:
+        # GIVEN
+        bucket = TokenBucket(rate_per_second=10, capacity=1)
+
+        # WHEN
+        bucket.on_throttled()
+        throttled = bucket.rate
+        for _ in range(1000):
+            bucket.on_success()
+
+        # THEN
+        self.assertEqual(throttled, 5)
+        self.assertEqual(bucket.rate, 10)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_half_opens_after_reset(self) -> None:
+        # GIVEN
+        clock = FakeClock(now=0)
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=clock)
+
+        # WHEN
+        breaker.record_failure()
+        breaker.record_failure()
+        while_open = breaker.allow_request()
+        clock.now += 30
+        trial = breaker.allow_request()
+        second_trial = breaker.allow_request()
+        breaker.record_success()
+
+        # THEN
+        self.assertFalse(while_open)
+        self.assertTrue(trial)
+        self.assertFalse(second_trial)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class TestResilientProvider(unittest.IsolatedAsyncioTestCase):
+    def make_provider(
+        self,
+        script: list[Union[int, Exception]],
+        max_attempts: int = UPSTREAM_MAX_ATTEMPTS,
+    ) -> tuple[ResilientProvider, ScriptedProvider]:
+        upstream = ScriptedProvider(script)
+        provider = ResilientProvider(
+            upstream,
+            limiter=TokenBucket(rate_per_second=1000, capacity=100),
+            max_attempts=max_attempts,
+            backoff_base_seconds=0,
+        )
+        return provider, upstream
+
+    async def test_retries_server_errors(self) -> None:
+        # GIVEN
+        provider, upstream = self.make_provider([500, 429, 200])
+
+        # WHEN
+        res = await provider.fetch(lat="1", lon="2")
+
+        # THEN
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(upstream.calls, 3)
+
+    async def test_does_not_retry_client_errors(self) -> None:
+        # GIVEN
+        provider, upstream = self.make_provider([401])
+
+        # WHEN
+        res = await provider.fetch(lat="1", lon="2")
+
+        # THEN
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(upstream.calls, 1)
+
+    async def test_transport_errors_are_raised_after_last_attempt(self) -> None:
+        # GIVEN
+        provider, upstream = self.make_provider([httpx.ConnectError("down")])
+
+        # WHEN / THEN
+        with self.assertRaises(httpx.ConnectError):
+            await provider.fetch(lat="1", lon="2")
+        self.assertEqual(upstream.calls, 3)
+
+    async def test_open_circuit_fails_fast(self) -> None:
+        # GIVEN
+        provider, upstream = self.make_provider([503], max_attempts=1)
+        provider.breaker = CircuitBreaker(failure_threshold=1)
+        await provider.fetch(lat="1", lon="2")
+
+        # WHEN
+        res = await provider.fetch(lat="1", lon="2")
+
+        # THEN
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(upstream.calls, 1)
+
+    async def test_empty_bucket_short_circuits(self) -> None:
+        # GIVEN
+        provider, upstream = self.make_provider([200])
+        provider.limiter = TokenBucket(rate_per_second=0.001, capacity=1)
+        provider.max_wait_seconds = 0
+        await provider.fetch(lat="1", lon="2")
+
+        # WHEN
+        res = await provider.fetch(lat="1", lon="2")
+
+        # THEN
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(upstream.calls, 1)
@@ -0,0 +1,78 @@
+import unittest
+from sky_alert.fake_provider import FakeWeatherProvider, synthetic_one_call
+from sky_alert.forecast import CompactForecast
+from sky_alert.openweather_service import (
+    AsyncOpenweatherService,
+    parse_cloud_data,
+    parse_sun_data,
+)
+from sky_alert.protocol import CloudData
+from sky_alert.responses import EncodedResponseCache
+
+KEY = ("1.0", "2.0")
+
+
+def forecast() -> CompactForecast:
+    return CompactForecast.from_json(synthetic_one_call(*KEY))
+
+
+class TestEncodedResponseCache(unittest.TestCase):
+    def test_reuses_body_while_forecast_is_unchanged(self) -> None:
+        # GIVEN
+        cache = EncodedResponseCache()
+        cached = forecast()
+        body = cache.get(parse_cloud_data, KEY, cached)
+
+        # WHEN
+        again = cache.get(parse_cloud_data, KEY, cached)
+
+        # THEN
+        self.assertIs(again, body)
+        self.assertEqual(CloudData.model_validate_json(body), parse_cloud_data(cached))
+
+    def test_refreshed_forecast_is_reencoded(self) -> None:
+        # GIVEN
+        cache = EncodedResponseCache()
+        first = cache.get(parse_cloud_data, KEY, forecast())
+
+        # WHEN
+        second = cache.get(parse_cloud_data, KEY, forecast())
+
+        # THEN an equal body, but encoded afresh for the new entry
+        self.assertEqual(second, first)
+        self.assertIsNot(second, first)
+        self.assertEqual(len(cache), 1)
+
+    def test_views_are_cached_separately_and_bounded(self) -> None:
+        # GIVEN
+        cache = EncodedResponseCache(max_entries=1)
+        cached = forecast()
+
+        # WHEN
+        cloud = cache.get(parse_cloud_data, KEY, cached)
+        sun = cache.get(parse_sun_data, KEY, cached)
+
+        # THEN
+        self.assertNotEqual(cloud, sun)
+        self.assertEqual(len(cache), 1)
+
+    def test_view_errors_are_not_cached(self) -> None:
+        cache = EncodedResponseCache()
+        with self.assertRaises(KeyError):
+            cache.get(parse_cloud_data, KEY, CompactForecast())
+        self.assertEqual(len(cache), 0)
+
+
+class TestGetEncoded(unittest.IsolatedAsyncioTestCase):
+    async def test_get_encoded_fetches_once(self) -> None:
+        # GIVEN
+        provider = FakeWeatherProvider()
+        service = AsyncOpenweatherService(provider=provider)
+
+        # WHEN
+        first = await service.get_encoded("1.0", "2.0", parse_cloud_data)
+        second = await service.get_encoded("1.0", "2.0", parse_cloud_data)
+
+        # THEN
+        self.assertIs(second, first)
+        self.assertEqual(provider.calls, 1)
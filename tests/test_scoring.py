@@ -0,0 +1,136 @@
+from __future__ import annotations
+import unittest
+from array import array
+from typing import Any
+import numpy as np
+from sky_alert.forecast import CompactForecast
+from sky_alert.scoring import (
+    forecast_arrays,
+    darkness_mask,
+    moon_interference,
+    score_forecasts,
+    _relevant,
+)
+from tests.test_constants import MOCK_FORECAST
+
+HOUR = 3600
+
+
+def make_forecast(clouds: list[int], **kwargs: array[Any]) -> CompactForecast:
+    """Hourly forecast from midnight UTC with the sun up from 06:00 to 20:00."""
+    hours = len(clouds)
+    return CompactForecast(
+        dt=0,
+        hourly_dt=array("q", [h * HOUR for h in range(hours)]),
+        hourly_clouds=array("B", clouds),
+        hourly_humidity=kwargs.get("humidity", array("B", [0] * hours)),
+        hourly_visibility=kwargs.get("visibility", array("H", [10000] * hours)),
+        hourly_wind_speed=kwargs.get("wind_speed", array("f", [0.0] * hours)),
+        daily_dt=array("q", [12 * HOUR]),
+        daily_sunrise=array("q", [6 * HOUR]),
+        daily_sunset=array("q", [20 * HOUR]),
+        daily_moonrise=kwargs.get("moonrise", array("q", [0])),
+        daily_moonset=kwargs.get("moonset", array("q", [0])),
+        daily_moon_phase=kwargs.get("moon_phase", array("d", [0.0])),
+    )
+
+
+class TestScoring(unittest.TestCase):
+    def test_darkness_mask_excludes_daylight_hours(self) -> None:
+        # GIVEN
+        arrays = forecast_arrays([make_forecast([0] * 24)], hours=24)
+
+        # WHEN
+        dark = darkness_mask(arrays)
+
+        # THEN
+        self.assertEqual(dark[0].tolist(), [True] * 6 + [False] * 14 + [True] * 4)
+
+    def test_darkness_falls_back_to_current_sun_times(self) -> None:
+        # GIVEN
+        forecast = make_forecast([0] * 24)
+        forecast.daily_sunrise, forecast.daily_sunset = array("q"), array("q")
+        forecast.sunrise, forecast.sunset = 6 * HOUR, 20 * HOUR
+
+        # WHEN
+        dark = darkness_mask(forecast_arrays([forecast], hours=24))
+
+        # THEN
+        self.assertEqual(dark[0].sum(), 10)
+
+    def test_full_moon_interferes_only_while_up(self) -> None:
+        # GIVEN
+        forecast = make_forecast(
+            [0] * 24,
+            moonrise=array("q", [22 * HOUR]),
+            moonset=array("q", [2 * HOUR]),
+            moon_phase=array("d", [0.5]),
+        )
+
+        # WHEN
+        interference = moon_interference(forecast_arrays([forecast], hours=24))
+
+        # THEN
+        self.assertEqual(interference[0, :2].tolist(), [0.0, 0.0])
+        self.assertEqual(interference[0, 22:].tolist(), [1.0, 1.0])
+
+    def test_best_window_is_longest_clear_dark_run(self) -> None:
+        # GIVEN
+        clouds = [100] * 2 + [0] * 4 + [0] * 14 + [0, 90, 0, 0]
+
+        # WHEN
+        scores = score_forecasts([make_forecast(clouds)], hours=24)
+
+        # THEN
+        self.assertEqual(scores.hours.tolist(), [4])
+        self.assertEqual(scores.start.tolist(), [2 * HOUR])
+        self.assertEqual(scores.end.tolist(), [6 * HOUR])
+        self.assertEqual(scores.score.tolist(), [1.0])
+
+    def test_scores_many_locations_independently(self) -> None:
+        # GIVEN
+        forecasts = [
+            make_forecast([100] * 24),
+            make_forecast([0] * 24, humidity=array("B", [100] * 24)),
+            make_forecast([0] * 12),
+        ]
+
+        # WHEN
+        scores = score_forecasts(forecasts, hours=24)
+
+        # THEN
+        self.assertEqual(scores.hours.tolist(), [0, 6, 6])
+        self.assertEqual(scores.score.tolist(), [0.0, 0.5, 1.0])
+
+    def test_short_forecast_is_padded_with_cloud(self) -> None:
+        # WHEN
+        arrays = forecast_arrays([MOCK_FORECAST], hours=48)
+
+        # THEN
+        self.assertEqual(arrays.clouds[0, 23:].tolist(), [24.0] + [100.0] * 24)
+
+    def test_no_forecasts_or_hours_score_nothing(self) -> None:
+        # WHEN
+        none = score_forecasts([])
+        empty = score_forecasts([make_forecast([])])
+        no_hours = score_forecasts([make_forecast([0] * 24)], hours=0)
+
+        # THEN
+        self.assertEqual(none.hours.tolist(), [])
+        self.assertEqual(empty.hours.tolist(), [0])
+        self.assertEqual(no_hours.hours.tolist(), [0])
+
+    def test_only_intervals_overlapping_the_hours_are_relevant(self) -> None:
+        # GIVEN a forecast of hours 10 to 12 and one without hours, padded with zeros
+        hour_dt = np.array([[10 * HOUR, 11 * HOUR, 12 * HOUR], [0, 0, 0]])
+        intervals = np.array(
+            [[[2 * HOUR, 5 * HOUR], [9 * HOUR, 11 * HOUR], [13 * HOUR, 15 * HOUR]]] * 2
+        )
+
+        # WHEN
+        relevant = _relevant(hour_dt, intervals)
+        no_hours = _relevant(hour_dt[1:], intervals[1:])
+
+        # THEN
+        self.assertEqual(relevant.tolist(), [False, True, False])
+        self.assertEqual(no_hours.tolist(), [False, False, False])
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from sky_alert.singleflight import SingleFlight, AsyncSingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self) -> None:
+        # GIVEN
+        flight: SingleFlight[str, int] = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch() -> int:
+            calls.append(1)
+            release.wait(timeout=5)
+            return 42
+
+        # WHEN
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(flight.do, "key", fetch) for _ in range(8)]
+            while flight.shared_calls < 7:
+                pass
+            release.set()
+            results = [future.result() for future in futures]
+
+        # THEN
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_error_is_raised_to_caller_and_not_remembered(self) -> None:
+        # GIVEN
+        flight: SingleFlight[str, int] = SingleFlight()
+
+        def fail() -> int:
+            raise ValueError("upstream down")
+
+        # WHEN / THEN
+        with self.assertRaises(ValueError):
+            flight.do("key", fail)
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_awaits_share_one_call(self) -> None:
+        # GIVEN
+        flight: AsyncSingleFlight[str, int] = AsyncSingleFlight()
+        calls = []
+
+        async def fetch() -> int:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 42
+
+        # WHEN
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(10)))
+
+        # THEN
+        self.assertEqual(results, [42] * 10)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.shared_calls, 9)
+        self.assertEqual(flight.in_flight(), 0)
+
+    async def test_cancelled_waiter_does_not_cancel_others(self) -> None:
+        # GIVEN
+        flight: AsyncSingleFlight[str, int] = AsyncSingleFlight()
+
+        async def fetch() -> int:
+            await asyncio.sleep(0.01)
+            return 42
+
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+
+        # WHEN
+        first.cancel()
+
+        # THEN
+        self.assertEqual(await second, 42)
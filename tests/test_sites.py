@@ -0,0 +1,145 @@
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from sky_alert.fake_provider import FakeWeatherProvider
+from sky_alert.forecast import CompactForecast
+from sky_alert.openweather_service import AsyncOpenweatherService
+from sky_alert.quantizer import GridQuantizer
+from sky_alert.config import DEFAULT_SITES_PATH
+from sky_alert.sites import SiteIndex, best_sites, haversine_km
+from sky_alert.weather_cache import WeatherCache
+from tests.test_alerts import night_payload
+
+
+class TestSiteIndex(unittest.TestCase):
+    def test_within_matches_brute_force(self) -> None:
+        # GIVEN
+        rng = random.Random(1)
+        lats = [rng.uniform(-89, 89) for _ in range(5000)]
+        lons = [rng.uniform(-180, 180) for _ in range(5000)]
+        index = SiteIndex([str(i) for i in range(5000)], lats, lons)
+
+        for lat, lon, radius in [(45, -79, 300), (0, 179.9, 500), (88, 10, 400)]:
+            # WHEN
+            found, distances = index.within(lat, lon, radius)
+
+            # THEN
+            expected = haversine_km(lat, lon, np.array(lats), np.array(lons))
+            self.assertEqual(
+                sorted(index.names[i] for i in found.tolist()),
+                sorted(str(i) for i in np.flatnonzero(expected <= radius).tolist()),
+            )
+            self.assertTrue(np.all(np.diff(distances) >= 0))
+
+    def test_within_across_antimeridian(self) -> None:
+        # GIVEN
+        index = SiteIndex(["east", "west", "far"], [0, 0, 0], [179.8, -179.8, 170])
+
+        # WHEN
+        found, distances = index.within(0, 180, 50)
+
+        # THEN
+        self.assertEqual(
+            sorted(index.names[i] for i in found.tolist()), ["east", "west"]
+        )
+        self.assertAlmostEqual(float(distances[0]), 22.2, places=1)
+
+    def test_from_csv(self) -> None:
+        # GIVEN
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "sites.csv")
+            with open(path, "w") as f:
+                f.write("name,lat,lon\nA,10,20\nB,-10,200\n")
+
+            # WHEN
+            index = SiteIndex.from_csv(path)
+
+        # THEN
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.site(int(index.within(-10, -160, 1)[0][0]), 0).name, "B")
+
+    def test_packaged_sites_load(self) -> None:
+        index = SiteIndex.from_csv(DEFAULT_SITES_PATH)
+        found, _ = index.within(44.5, -79.0, 200)
+        self.assertGreater(len(found), 0)
+
+
+class TestBestSites(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.provider = FakeWeatherProvider(
+            payload_factory=lambda lat, lon: night_payload(
+                clouds=0 if float(lat) > 44.5 else 100
+            )
+        )
+        self.service = AsyncOpenweatherService(
+            cache=WeatherCache(),
+            quantizer=GridQuantizer(degrees=0.1),
+            provider=self.provider,
+        )
+        self.index = SiteIndex(
+            ["cloudy near", "clear far", "clear farther"],
+            [44.0, 45.0, 45.5],
+            [-79.0, -79.0, -79.0],
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.service.aclose()
+
+    async def test_ranks_by_score_then_distance(self) -> None:
+        # WHEN
+        result = await best_sites(self.service, self.index, "44.0", "-79.0", 200, 10)
+
+        # THEN
+        self.assertEqual(
+            [s.site.name for s in result.sites],
+            ["clear far", "clear farther", "cloudy near"],
+        )
+        self.assertIsNone(result.sites[-1].best_window)
+        self.assertEqual(result.unscored, 0)
+
+    async def test_fetches_at_most_max_fetches_uncached_cells(self) -> None:
+        # GIVEN
+        await self.service.update_most_recent_weather("45.5", "-79.0")
+        self.provider.calls = 0
+
+        # WHEN
+        result = await best_sites(
+            self.service, self.index, "44.0", "-79.0", 200, 10, max_fetches=1
+        )
+
+        # THEN only the nearest uncached site was fetched; the cached one is scored
+        self.assertEqual(self.provider.calls, 1)
+        self.assertEqual(
+            [s.site.name for s in result.sites], ["clear farther", "cloudy near"]
+        )
+        self.assertEqual(result.unscored, 1)
+
+    async def test_no_sites_in_range(self) -> None:
+        # WHEN
+        result = await best_sites(self.service, self.index, "0", "0", 100, 10)
+
+        # THEN
+        self.assertEqual(result.sites, [])
+        self.assertEqual(result.unscored, 0)
+
+    async def test_every_fetch_failing_leaves_sites_unscored(self) -> None:
+        # GIVEN
+        self.service.provider = FakeWeatherProvider(error_rate=1.0)
+
+        # WHEN
+        result = await best_sites(self.service, self.index, "44.0", "-79.0", 200, 10)
+
+        # THEN
+        self.assertEqual(result.sites, [])
+        self.assertEqual(result.unscored, 3)
+
+    async def test_cached_forecast_does_not_fetch(self) -> None:
+        self.assertIsNone(self.service.cached_forecast("44.0", "-79.0"))
+        forecast = await self.service.update_most_recent_weather("44.0", "-79.0")
+        self.assertIsInstance(
+            self.service.cached_forecast("44.04", "-78.96"), CompactForecast
+        )
+        self.assertIs(self.service.cached_forecast("44.0", "-79.0"), forecast)
+        self.assertEqual(self.provider.calls, 1)
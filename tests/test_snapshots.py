@@ -0,0 +1,92 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+from typing import Iterator
+from sky_alert.fake_provider import synthetic_one_call
+from sky_alert.forecast import CompactForecast
+from sky_alert.openweather_service import OpenweatherService
+from sky_alert.snapshots import (
+    SnapshotRecord,
+    SnapshotWriter,
+    list_snapshots,
+    load_snapshot,
+)
+
+
+def record(lat: str, lon: str, expires_at: float) -> SnapshotRecord:
+    forecast = CompactForecast.from_json(synthetic_one_call(lat, lon))
+    return SnapshotRecord((lat, lon), forecast, expires_at)
+
+
+class TestSnapshots(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.writer = SnapshotWriter(self.tmpdir.name)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_write_and_load_round_trip(self) -> None:
+        # GIVEN
+        records = [record("1.0", "2.0", 100.0), record("3.0", "4.0", 200.0)]
+
+        # WHEN
+        path = self.writer.next_path()
+        written = self.writer.write(iter(records), path)
+
+        # THEN
+        self.assertEqual(written, 2)
+        self.assertEqual(list(load_snapshot(path)), records)
+        self.assertEqual(list_snapshots(self.tmpdir.name), [path])
+
+    def test_snapshots_are_never_overwritten(self) -> None:
+        # WHEN
+        first = self.writer.next_path()
+        second = self.writer.next_path()
+        self.writer.write([record("1.0", "2.0", 100.0)], first)
+        self.writer.write([], second)
+
+        # THEN
+        self.assertNotEqual(first, second)
+        self.assertEqual(list_snapshots(self.tmpdir.name), [first, second])
+        self.assertEqual(len(list(load_snapshot(first))), 1)
+
+    def test_failed_write_leaves_no_file(self) -> None:
+        # GIVEN
+        def records() -> Iterator[SnapshotRecord]:
+            yield record("1.0", "2.0", 100.0)
+            raise RuntimeError("cache went away")
+
+        # WHEN
+        path = self.writer.next_path()
+        with self.assertRaises(RuntimeError):
+            self.writer.write(records(), path)
+
+        # THEN
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+    def test_snapshot_is_gzipped_json_lines(self) -> None:
+        path = self.writer.next_path()
+        self.writer.write([record("1.0", "2.0", 100.0)], path)
+        with gzip.open(path, "rt") as f:
+            self.assertTrue(f.readline().startswith('{"lat":"1.0","lon":"2.0"'))
+
+    def test_service_restores_unexpired_entries(self) -> None:
+        # GIVEN
+        now = time.time()
+        path = self.writer.next_path()
+        self.writer.write(
+            [record("1.0", "2.0", now + 600), record("3.0", "4.0", now - 1)], path
+        )
+        service = OpenweatherService()
+
+        # WHEN
+        loaded = service.restore_snapshot(path)
+
+        # THEN
+        self.assertEqual(loaded, 1)
+        self.assertEqual(
+            [key for key, _, _ in service.snapshot_records()], [("1.0", "2.0")]
+        )
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from sky_alert.sqlite_cache import SqliteWeatherCache
+from sky_alert.forecast import CompactForecast
+from tests.test_constants import MOCK_FORECAST
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSqliteWeatherCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "forecasts.db")
+        self.clock = FakeClock(now=1_000_000.0)
+        self.cache = SqliteWeatherCache(self.path, clock=self.clock)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_set_and_get(self) -> None:
+        # GIVEN
+        self.cache.set(("1", "2"), MOCK_FORECAST, expires_at=1_000_600)
+
+        # WHEN
+        record = self.cache.get(("1", "2"))
+
+        # THEN
+        self.assertEqual(record, (MOCK_FORECAST, 1_000_600))
+        self.assertIsNone(self.cache.get(("3", "4")))
+
+    def test_expired_entries_are_not_returned_and_can_be_purged(self) -> None:
+        # GIVEN
+        self.cache.set(("1", "2"), CompactForecast(), expires_at=1_000_600)
+        self.clock.now = 1_000_600
+
+        # WHEN
+        record = self.cache.get(("1", "2"))
+        purged = self.cache.purge_expired()
+
+        # THEN
+        self.assertIsNone(record)
+        self.assertEqual(purged, 1)
+
+    def test_entries_are_visible_to_another_connection(self) -> None:
+        # GIVEN
+        self.cache.set(("1", "2"), MOCK_FORECAST, expires_at=1_000_600)
+        other = SqliteWeatherCache(self.path, clock=self.clock)
+
+        # WHEN
+        loaded = list(other.load_unexpired(limit=10))
+        other.close()
+
+        # THEN
+        self.assertEqual(loaded, [(("1", "2"), MOCK_FORECAST, 1_000_600)])
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from sky_alert.protocol import Subscriber
+from sky_alert.subscribers import SqliteSubscriberStore
+
+
+def subscriber(lat: str, lon: str, contact: str = "a@example.com") -> Subscriber:
+    return Subscriber(lat=lat, lon=lon, channel="email", contact=contact)
+
+
+class TestSqliteSubscriberStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SqliteSubscriberStore(
+            os.path.join(self.tmpdir.name, "subscribers.db"),
+            cell_key=lambda lat, lon: (lat[:2], lon[:2]),
+        )
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_batches_are_ordered_by_cell_and_bounded(self) -> None:
+        # GIVEN
+        self.store.add_many(
+            [
+                subscriber("20.1", "30.1"),
+                subscriber("10.1", "30.1"),
+                subscriber("20.2", "30.2"),
+                subscriber("10.2", "30.2"),
+                subscriber("15.0", "30.0"),
+            ]
+        )
+
+        # WHEN
+        batches = list(self.store.iter_batches(batch_size=2))
+
+        # THEN
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        cells = [cell for batch in batches for cell, _ in batch]
+        self.assertEqual(
+            cells,
+            [("10", "30"), ("10", "30"), ("15", "30"), ("20", "30"), ("20", "30")],
+        )
+        self.assertEqual(batches[0][0][1].lat, "10.1")
+
+    def test_iter_cells_reads_only_the_requested_cells(self) -> None:
+        # GIVEN
+        self.store.add_many(
+            [
+                subscriber("20.1", "30.1"),
+                subscriber("10.1", "30.1"),
+                subscriber("20.2", "30.2"),
+                subscriber("10.2", "30.2"),
+                subscriber("15.0", "30.0"),
+            ]
+        )
+
+        # WHEN
+        batches = list(
+            self.store.iter_cells([("20", "30"), ("10", "30"), ("99", "99")], 3)
+        )
+
+        # THEN
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        self.assertEqual(
+            [s.lat for batch in batches for _, s in batch],
+            ["10.1", "10.2", "20.1", "20.2"],
+        )
+
+    def test_add_count_and_remove(self) -> None:
+        # GIVEN
+        subscriber_id = self.store.add(subscriber("1", "2"))
+
+        # WHEN
+        removed = self.store.remove(subscriber_id)
+
+        # THEN
+        self.assertTrue(removed)
+        self.assertFalse(self.store.remove(subscriber_id))
+        self.assertEqual(self.store.count(), 0)
+
+    def test_failed_bulk_insert_is_rolled_back(self) -> None:
+        # GIVEN
+        first = self.store.add(subscriber("1", "2"))
+        duplicate = subscriber("3", "4")
+        duplicate.id = first
+
+        # WHEN
+        with self.assertRaises(Exception):
+            self.store.add_many([subscriber("5", "6"), duplicate])
+
+        # THEN
+        self.assertEqual(self.store.count(), 1)
@@ -0,0 +1,137 @@
+import unittest
+from sky_alert.weather_cache import WeatherCache
+from tests.test_constants import MOCK_OPENWEATHER_RESPONSE_JSON
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestWeatherCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock(now=1_000_000.0)
+
+    def test_get_counts_hits_and_misses(self) -> None:
+        # GIVEN
+        cache = WeatherCache(ttl_seconds=60, clock=self.clock)
+        cache.set(("1", "2"), MOCK_OPENWEATHER_RESPONSE_JSON)
+
+        # WHEN
+        hit = cache.get(("1", "2"))
+        miss = cache.get(("3", "4"))
+
+        # THEN
+        self.assertEqual(hit, MOCK_OPENWEATHER_RESPONSE_JSON)
+        self.assertIsNone(miss)
+        stats = cache.stats()
+        self.assertEqual(stats.hits, 1)
+        self.assertEqual(stats.misses, 1)
+        self.assertEqual(stats.entries, 1)
+
+    def test_entry_expires_relative_to_observation_time(self) -> None:
+        # GIVEN
+        cache = WeatherCache(ttl_seconds=60, clock=self.clock)
+        cache.set(("1", "2"), {}, observed_at=self.clock.now - 30)
+
+        # WHEN
+        self.clock.now += 29
+        before_expiry = cache.get(("1", "2"))
+        self.clock.now += 1
+        after_expiry = cache.get(("1", "2"))
+
+        # THEN
+        self.assertEqual(before_expiry, {})
+        self.assertIsNone(after_expiry)
+        self.assertEqual(cache.stats().expirations, 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_outdated_observation_is_kept_for_a_full_ttl(self) -> None:
+        # GIVEN
+        cache = WeatherCache(ttl_seconds=60, clock=self.clock)
+
+        # WHEN
+        cache.set(("1", "2"), {}, observed_at=self.clock.now - 3600)
+        self.clock.now += 59
+
+        # THEN
+        self.assertTrue(("1", "2") in cache)
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        # GIVEN
+        cache = WeatherCache(ttl_seconds=60, max_entries=2, clock=self.clock)
+        cache.set(("a", "a"), 1)
+        cache.set(("b", "b"), 2)
+        cache.get(("a", "a"))
+
+        # WHEN
+        cache.set(("c", "c"), 3)
+
+        # THEN
+        self.assertTrue(("a", "a") in cache)
+        self.assertFalse(("b", "b") in cache)
+        self.assertTrue(("c", "c") in cache)
+        self.assertEqual(cache.stats().evictions, 1)
+
+    def test_byte_budget_evicts_but_keeps_newest_entry(self) -> None:
+        # GIVEN
+        cache = WeatherCache(
+            ttl_seconds=60,
+            max_entries=None,
+            max_bytes=10,
+            sizeof=lambda value: len(value),
+            clock=self.clock,
+        )
+        cache.set(("a", "a"), "x" * 6)
+
+        # WHEN
+        cache.set(("b", "b"), "y" * 20)
+
+        # THEN
+        self.assertFalse(("a", "a") in cache)
+        self.assertEqual(cache[("b", "b")], "y" * 20)
+        self.assertEqual(cache.stats().size_bytes, 20)
+
+    def test_getitem_raises_key_error_on_miss(self) -> None:
+        # GIVEN
+        cache = WeatherCache(clock=self.clock)
+
+        # WHEN / THEN
+        with self.assertRaises(KeyError):
+            cache[("1", "2")]
+
+    def test_expired_entry_is_served_stale_within_grace(self) -> None:
+        # GIVEN
+        cache = WeatherCache(ttl_seconds=60, stale_seconds=120, clock=self.clock)
+        cache.set(("1", "2"), {})
+
+        # WHEN
+        self.clock.now += 100
+        live = cache.get(("1", "2"))
+        stale = cache.get_stale(("1", "2"))
+        self.clock.now += 80
+        gone = cache.get_stale(("1", "2"))
+
+        # THEN
+        self.assertIsNone(live)
+        self.assertEqual(stale, {})
+        self.assertIsNone(gone)
+        self.assertEqual(cache.stats().expirations, 1)
+
+    def test_items_lists_live_entries_without_touching_stats(self) -> None:
+        # GIVEN
+        cache = WeatherCache(ttl_seconds=60, stale_seconds=120, clock=self.clock)
+        cache.set(("1", "2"), "old")
+        self.clock.now += 30
+        cache.set(("3", "4"), "new")
+        self.clock.now += 40
+
+        # WHEN
+        items = cache.items()
+
+        # THEN the expired (if still stale-servable) entry is left out
+        self.assertEqual(items, [(("3", "4"), "new", self.clock.now + 20)])
+        self.assertEqual(cache.stats().hits + cache.stats().misses, 0)